@@ -38,3 +38,17 @@ export async function getEmployeeStats() {
     throw new Error(msg);
   }
 }
+
+// Podgląd na żywo (Server-Sent Events) zamiast odpytywania /logs i /stats.
+// EventSource sam wznawia połączenie z Last-Event-ID; "resync" = serwer nie ma już
+// brakujących zdarzeń (albo bufor się przepełnił) - trzeba pobrać stan od nowa.
+// onOpen / onError: połączenie gotowe albo nieudane (EventSource ponawia je sam).
+export function subscribeAccessEvents({ onAccess, onStats, onResync, onOpen, onError }) {
+  const source = new EventSource(`${ADMIN_URL}/events`);
+  source.addEventListener("open", () => onOpen?.());
+  source.addEventListener("error", () => onError?.());
+  source.addEventListener("access", (event) => onAccess?.(JSON.parse(event.data)));
+  source.addEventListener("stats", (event) => onStats?.(JSON.parse(event.data)));
+  source.addEventListener("resync", () => onResync?.());
+  return () => source.close();
+}
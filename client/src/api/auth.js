@@ -2,10 +2,22 @@ import axios from "axios";
 
 const URL = "http://localhost:5000/api/auth";
 
+// Stały identyfikator kiosku (przeglądarki) - serwer trzyma per kiosk sesję śledzenia twarzy,
+// więc kolejne klatki tej samej osoby nie wymagają detekcji na całym kadrze
+function getKioskId() {
+  let id = localStorage.getItem("kioskId");
+  if (!id) {
+    id = crypto.randomUUID ? crypto.randomUUID() : `kiosk-${Date.now()}-${Math.random().toString(36).slice(2)}`;
+    localStorage.setItem("kioskId", id);
+  }
+  return id;
+}
+
 const api = axios.create({
   baseURL: URL,
   headers: {
     "Content-Type": "application/json",
+    "X-Kiosk-Id": getKioskId(),
   },
 });
 
@@ -30,4 +42,107 @@ export async function verifyFace(employeeId, image) {
     const msg = err?.response?.data?.message || err?.message;
     throw new Error(msg);
   }
-}
\ No newline at end of file
+}
+
+// Zdjęcie idzie jako surowe body image/jpeg (bez base64 w JSON-ie), kod QR w query stringu
+async function toBlob(image) {
+  if (image instanceof Blob) return image;
+  const response = await fetch(image); // data URL -> Blob
+  return response.blob();
+}
+
+// Seria klatek (tablica) idzie jako multipart "images" - serwer wybiera najlepszą
+async function postFrames(path, image, fields) {
+  if (!Array.isArray(image)) {
+    const blob = await toBlob(image);
+    return api.post(path, blob, {
+      params: fields,
+      headers: { "Content-Type": blob.type || "image/jpeg" },
+    });
+  }
+  const form = new FormData();
+  Object.entries(fields).forEach(([key, value]) => form.append(key, value));
+  const blobs = await Promise.all(image.map(toBlob));
+  blobs.forEach((blob, i) => form.append("images", blob, `frame${i}.jpg`));
+  return api.post(path, form, { headers: { "Content-Type": "multipart/form-data" } });
+}
+
+export async function verifyAccess(qrCode, image) {
+  try {
+    const response = await postFrames("/verify", image, { qr_code: qrCode });
+    return response.data;
+  } catch (err) {
+    const msg = err?.response?.data?.message || err?.message;
+    throw new Error(msg);
+  }
+}
+
+// Kanał WebSocket kiosku (/api/kiosk/stream): jedno stałe połączenie zamiast requestu na próbę.
+// Serwer liczy zawsze tylko najnowszą klatkę. Gdy kanał jest niedostępny (np. serwer bez
+// flask-sock), weryfikacja wraca do zwykłego POST /verify.
+const STREAM_URL = URL.replace(/^http/, "ws").replace(/\/auth$/, "/kiosk/stream");
+let stream = null;
+
+function openStream() {
+  if (stream && stream.readyState <= WebSocket.OPEN) return stream;
+  stream = new WebSocket(`${STREAM_URL}?kiosk_id=${encodeURIComponent(getKioskId())}`);
+  stream.binaryType = "arraybuffer";
+  return stream;
+}
+
+function waitForOpen(socket) {
+  if (socket.readyState === WebSocket.OPEN) return Promise.resolve();
+  return new Promise((resolve, reject) => {
+    socket.addEventListener("open", () => resolve(), { once: true });
+    socket.addEventListener("error", () => reject(new Error("stream unavailable")), { once: true });
+  });
+}
+
+// Próba kończy się wynikiem ("result") albo błędem. "retry" (zła klatka, brak twarzy, zajęty serwer)
+// czeka jeszcze chwilę na wynik z kolejnych klatek serii, potem kończy próbę jak przy HTTP.
+const RETRY_GRACE_MS = 1500;
+let attemptCounter = 0;
+
+function nextOutcome(socket, attempt) {
+  return new Promise((resolve, reject) => {
+    let retryTimer = null;
+    const done = (fn, value) => {
+      clearTimeout(retryTimer);
+      socket.removeEventListener("message", onMessage);
+      socket.removeEventListener("close", onClose);
+      fn(value);
+    };
+    const onMessage = (event) => {
+      const message = JSON.parse(event.data);
+      if (message.attempt !== attempt) return; // "ready" albo spóźniona odpowiedź poprzedniej próby
+      if (message.type === "result" && message.status === "granted") done(resolve, message);
+      else if (message.type === "result" || message.type === "error") done(reject, new Error(message.message));
+      else if (message.type === "retry") {
+        clearTimeout(retryTimer);
+        retryTimer = setTimeout(
+          () => done(reject, new Error(`Spróbuj ponownie (${message.reason})`)),
+          RETRY_GRACE_MS,
+        );
+      }
+    };
+    const onClose = () => done(reject, new Error("Połączenie z serwerem przerwane"));
+    socket.addEventListener("message", onMessage);
+    socket.addEventListener("close", onClose);
+  });
+}
+
+export async function verifyAccessLive(qrCode, image) {
+  const socket = openStream();
+  try {
+    await waitForOpen(socket);
+  } catch {
+    return verifyAccess(qrCode, image);
+  }
+  const attempt = ++attemptCounter;
+  const outcome = nextOutcome(socket, attempt);
+  socket.send(JSON.stringify({ type: "qr", qr_code: qrCode, attempt }));
+  const frames = Array.isArray(image) ? image : [image];
+  const blobs = await Promise.all(frames.map(toBlob));
+  blobs.forEach((blob) => socket.send(blob));
+  return outcome;
+}
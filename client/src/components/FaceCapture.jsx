@@ -3,7 +3,10 @@ import { Button } from "@mui/material";
 import React, { useEffect, useRef, useState } from "react";
 import "./FaceCapture.css";
 
-const FaceCapture = ({ onCapture, automatic = false }) => {
+// Odstęp między klatkami serii (serwer wybiera najostrzejszą)
+const BURST_INTERVAL_MS = 120;
+
+const FaceCapture = ({ onCapture, automatic = false, burst = 1 }) => {
   const videoRef = useRef(null);
   const canvasRef = useRef(null);
   const [stream, setStream] = useState(null);
@@ -58,27 +61,41 @@ const FaceCapture = ({ onCapture, automatic = false }) => {
     }
   };
 
-  const captureImage = (isAutomatic = false) => {
-    if (videoRef.current && canvasRef.current) {
-      const video = videoRef.current;
-      const canvas = canvasRef.current;
-      const context = canvas.getContext("2d");
+  const grabFrame = () => {
+    if (!videoRef.current || !canvasRef.current) return null;
+    const video = videoRef.current;
+    const canvas = canvasRef.current;
+    const context = canvas.getContext("2d");
 
-      // Set canvas dimensions to match video
-      canvas.width = video.videoWidth;
-      canvas.height = video.videoHeight;
+    // Set canvas dimensions to match video
+    canvas.width = video.videoWidth;
+    canvas.height = video.videoHeight;
 
-      // Draw the video frame to canvas
-      context.drawImage(video, 0, 0, canvas.width, canvas.height);
+    // Draw the video frame to canvas
+    context.drawImage(video, 0, 0, canvas.width, canvas.height);
 
-      // Convert canvas to base64 image
-      const imageData = canvas.toDataURL("image/jpeg", 0.8);
+    // Convert canvas to base64 image
+    return canvas.toDataURL("image/jpeg", 0.8);
+  };
 
-      if (isAutomatic) {
-        handleConfirm(imageData);
-      } else {
-        setCapturedImage(imageData);
+  const captureImage = async (isAutomatic = false) => {
+    if (!isAutomatic) {
+      const imageData = grabFrame();
+      if (imageData) setCapturedImage(imageData);
+      return;
+    }
+
+    // Automatycznie: seria `burst` klatek, onCapture dostaje tablicę (albo jedną klatkę)
+    const frames = [];
+    for (let i = 0; i < burst; i++) {
+      if (i > 0) {
+        await new Promise((resolve) => setTimeout(resolve, BURST_INTERVAL_MS));
       }
+      const frame = grabFrame();
+      if (frame) frames.push(frame);
+    }
+    if (frames.length > 0) {
+      handleConfirm(burst > 1 ? frames : frames[0]);
     }
   };
 
@@ -7,7 +7,7 @@ import {
 } from "@mui/icons-material";
 import React, { useEffect, useState } from "react";
 import { Link } from "react-router-dom";
-import { verifyFace, verifyQRCode } from "../api/auth";
+import { verifyAccessLive } from "../api/auth";
 import FaceCapture from "../components/FaceCapture";
 import QRReader from "../components/QRReader";
 import "./Home.css";
@@ -31,37 +31,29 @@ const Home = () => {
     }
   }, [errorMessage]);
 
-  const handleQrScan = async (data) => {
+  // QR i twarz idą do serwera razem - kanałem WebSocket kiosku, a bez niego /api/auth/verify
+  const handleQrScan = (data) => {
     if (isPaused) return;
 
     setIsPaused(true);
     setErrorMessage("");
-
-    try {
-      const result = await verifyQRCode(data);
-      setQrData(data);
-      setEmployeeId(result.employee_id);
-      setAccessGranted(true);
-      setStep("face");
-    } catch (error) {
-      setErrorMessage(error.message || "QR Code verification failed");
-      setTimeout(() => {
-        setIsPaused(false);
-      }, 2000);
-    }
+    setQrData(data);
+    setStep("face");
   };
 
   const handleFaceCapture = (image) => {
     if (image) {
       setFaceImage(image);
       setStep("verifying-background");
-      handleVerification(employeeId, image);
+      handleVerification(qrData, image);
     }
   };
 
-  const handleVerification = async (empId, face) => {
+  const handleVerification = async (qrCode, face) => {
     try {
-      const result = await verifyFace(empId, face);
+      const result = await verifyAccessLive(qrCode, face);
+      setEmployeeId(result.employee_id);
+      setAccessGranted(true);
       // You can use this result for logging or minor UI feedback
       setVerificationResult({ success: true, data: result });
       console.log("Background verification success:", result);
@@ -71,6 +63,7 @@ const Home = () => {
         success: false,
         error: error.message || "Verification failed",
       });
+      setErrorMessage(error.message || "Verification failed");
       console.error("Background verification error:", error);
       setTimeout(() => reset(), 3000);
     }
@@ -82,6 +75,7 @@ const Home = () => {
     setFaceImage(null);
     setVerificationResult(null);
     setAccessGranted(false);
+    setIsPaused(false);
   };
 
   const getStepNumber = () => {
@@ -235,7 +229,7 @@ const Home = () => {
                   Please look at the camera for identity verification.
                 </p>
                 <div className="verification-container">
-                  <FaceCapture onCapture={handleFaceCapture} automatic={true} />
+                  <FaceCapture onCapture={handleFaceCapture} automatic={true} burst={3} />
                 </div>
               </div>
               <div className="instructions-column">{renderInstructions()}</div>
@@ -11,11 +11,29 @@ import {
   SyncOutlined,
   LocalPolice,
 } from "@mui/icons-material";
-import React, { useEffect, useState } from "react";
+import React, { useEffect, useRef, useState } from "react";
 import { Link } from "react-router-dom";
-import { getAccessLogs, getEmployeeStats } from "../../api/admin";
+import {
+  getAccessLogs,
+  getEmployeeStats,
+  subscribeAccessEvents,
+} from "../../api/admin";
 import "./Dashboard.css";
 
+// Tyle, ile serwer oddaje na jedną stronę /logs - lista z SSE nie rośnie bez końca
+const MAX_RECENT_ACTIVITY = 500;
+
+// Liczniki dzienne serwer liczy w UTC
+const todayUtc = () => new Date().toISOString().slice(0, 10);
+
+const toActivity = (log) => ({
+  id: log.id,
+  employee: log.employee_name || `Employee ${log.employee_id}`,
+  action: log.status === "granted" ? "Checked In" : "Denied",
+  method: log.verification_method === "face" ? "Face Recognition" : "QR Code",
+  time: new Date(log.timestamp).toLocaleTimeString(),
+});
+
 const Dashboard = () => {
   const [stats, setStats] = useState({
     totalEmployees: 0,
@@ -26,12 +44,49 @@ const Dashboard = () => {
 
   const [recentActivity, setRecentActivity] = useState([]);
   const [loading, setLoading] = useState(true);
+  // Lista widoczna na ekranie (do odsiewania duplikatów) i zdarzenia z SSE,
+  // które przyszły w trakcie pobierania stanu (null = stan pobrany)
+  const activityRef = useRef([]);
+  const pendingRef = useRef([]);
 
+  // Najpierw połączenie SSE, potem stan - zdarzenie zapisane w międzyczasie
+  // nie przepada, a to, które jest już w pobranych logach, nie pokaże się dwa razy
   useEffect(() => {
-    fetchDashboardData();
+    let started = false;
+    const start = () => {
+      if (!started) {
+        started = true;
+        fetchDashboardData();
+      }
+    };
+    return subscribeAccessEvents({
+      onOpen: start,
+      onError: start,
+      onAccess: (log) => {
+        if (pendingRef.current) pendingRef.current.push(log);
+        else applyAccess(log);
+      },
+      onStats: (delta) =>
+        setStats((current) => ({
+          ...current,
+          totalEmployees: current.totalEmployees + (delta.total_employees || 0),
+          activeEmployees: current.activeEmployees + (delta.active_employees || 0),
+        })),
+      onResync: () => fetchDashboardData(),
+    });
   }, []);
 
+  const applyAccess = (log) => {
+    if (activityRef.current.some((activity) => activity.id === log.id)) return;
+    activityRef.current = [toActivity(log), ...activityRef.current].slice(0, MAX_RECENT_ACTIVITY);
+    setRecentActivity(activityRef.current);
+    if (log.timestamp.slice(0, 10) === todayUtc()) {
+      setStats((current) => ({ ...current, todayAccess: current.todayAccess + 1 }));
+    }
+  };
+
   const fetchDashboardData = async () => {
+    pendingRef.current = pendingRef.current || [];
     try {
       const statsData = await getEmployeeStats();
 
@@ -44,22 +99,16 @@ const Dashboard = () => {
 
       setStats(newStats);
 
-      const logsData = await getAccessLogs(newStats.todayAccess);
+      const logsData = await getAccessLogs(Math.min(newStats.todayAccess, MAX_RECENT_ACTIVITY));
 
-      setRecentActivity(
-        logsData.map((log) => ({
-          id: log.id,
-          employee: log.employee_name || `Employee ${log.employee_id}`,
-          action: log.status === "granted" ? "Checked In" : "Denied",
-          method:
-            log.verification_method === "face" ? "Face Recognition" : "QR Code",
-          time: new Date(log.timestamp).toLocaleTimeString(),
-        }))
-      );
-
-      setLoading(false);
+      activityRef.current = logsData.map(toActivity);
+      setRecentActivity(activityRef.current);
     } catch (error) {
       console.error("Error fetching dashboard data:", error);
+    } finally {
+      const pending = pendingRef.current || [];
+      pendingRef.current = null;
+      pending.forEach(applyAccess);
       setLoading(false);
     }
   };
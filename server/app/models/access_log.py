@@ -3,15 +3,24 @@ from app.utils.db import db
 
 class AccessLog(db.Model):
     __tablename__ = 'access_log'
+    __table_args__ = (
+        # /stats (dzisiejsze wejścia i odmowy), /logs (najnowsze), /raport (zakres dat)
+        db.Index('ix_access_log_timestamp_status', 'timestamp', 'status'),
+        # /raport i /logs filtrowane po pracowniku, sortowane po czasie
+        db.Index('ix_access_log_employee_timestamp', 'employee_id', 'timestamp'),
+        # /raport z entry_type (granted / denied) w zakresie dat
+        db.Index('ix_access_log_status_timestamp', 'status', 'timestamp'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    employee_id = db.Column(db.Integer, db.ForeignKey('employee.id'), nullable=False)
+    employee_id = db.Column(db.Integer, db.ForeignKey('employee.id'), nullable=True)  # NULL = nieznana osoba
     status = db.Column(db.String(50), nullable=False)  # 'granted' lub 'denied'
     verification_method = db.Column(db.String(50), nullable=False)  # 'face' lub 'qr'
     timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     
-    # Relacja z Employee
-    employee = db.relationship('Employee', backref='access_logs')
+    # Relacja z Employee. Logi zostają po usunięciu pracownika (historia wejść,
+    # to_dict pokaże "Unknown") - ORM nie zeruje employee_id, ID zostaje w historii
+    employee = db.relationship('Employee', backref=db.backref('access_logs', passive_deletes='all'))
     
     def __repr__(self):
         return f'<AccessLog {self.id}: {self.employee_id} - {self.status}>'
@@ -20,8 +29,8 @@ class AccessLog(db.Model):
         return {
             'id': self.id,
             'employee_id': self.employee_id,
-            'employee_name': f"{self.employee.first_name} {self.employee.last_name}",
+            'employee_name': f"{self.employee.first_name} {self.employee.last_name}" if self.employee else "Unknown",
             'status': self.status,
             'verification_method': self.verification_method,
-            'timestamp': self.timestamp.isoformat()
+            'timestamp': self.timestamp.isoformat() if self.timestamp else None
         }
\ No newline at end of file
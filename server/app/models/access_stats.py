@@ -0,0 +1,40 @@
+from app.utils.db import db
+
+class AccessStatsRollup(db.Model):
+    """
+    Zagregowane liczniki zdarzeń z access_log (per godzina / dzień, status, metoda).
+    Aktualizowane przy zapisie logów, odbudowywalne z surowych danych.
+    """
+    __tablename__ = 'access_stats_rollup'
+    __table_args__ = (
+        db.UniqueConstraint('granularity', 'bucket_start', 'status', 'verification_method',
+                            name='uq_access_stats_bucket'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    granularity = db.Column(db.String(10), nullable=False)  # 'hour' lub 'day'
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    status = db.Column(db.String(50), nullable=False)
+    verification_method = db.Column(db.String(50), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'granularity': self.granularity,
+            'bucket_start': self.bucket_start.isoformat(),
+            'status': self.status,
+            'verification_method': self.verification_method,
+            'count': self.count
+        }
+
+
+class StatsCounter(db.Model):
+    """
+    Liczniki bieżącego stanu dla /api/admin/stats (np. name='employees'), żeby
+    dashboard nie liczył wierszy przy każdym odświeżeniu.
+    Aktualizowane przy zapisie (app/services/stats_rollup.py), odbudowywalne z tabel.
+    """
+    __tablename__ = 'stats_counter'
+
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
@@ -12,5 +12,6 @@ class Employee(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 
-    face_data = db.relationship('FaceCredential', backref='employee', uselist=False, cascade="all, delete-orphan")
+    face_templates = db.relationship('FaceCredential', backref='employee', cascade="all, delete-orphan",
+                                     order_by='FaceCredential.id')
     qr_code   = db.relationship('QRCredential', backref='employee', uselist=False, cascade="all, delete-orphan")
\ No newline at end of file
@@ -8,10 +8,15 @@ class FaceCredential(db.Model):
     # Musi być Primary Key!
     id = db.Column(db.Integer, primary_key=True)
     
-    # Klucz obcy do pracownika
-    employee_id = db.Column(db.Integer, db.ForeignKey('employee.id'), nullable=False, unique=True)
+    # Klucz obcy do pracownika - jeden pracownik może mieć kilka wzorców
+    employee_id = db.Column(db.Integer, db.ForeignKey('employee.id'), nullable=False, index=True)
     
     # Dane biometryczne
     face_encoding = db.Column(db.LargeBinary, nullable=False)
     face_image_path = db.Column(db.String(255))
-    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
\ No newline at end of file
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    # Skąd wzorzec: 'enroll' (rejestracja) albo 'verify' (udana weryfikacja, tryb opt-in)
+    source = db.Column(db.String(20), nullable=False, default='enroll', server_default='enroll')
+    # Odległość od pozostałych wzorców w chwili dodania (dla 'verify'); None dla rejestracji
+    quality = db.Column(db.Float, nullable=True)
@@ -0,0 +1,14 @@
+from app.utils.db import db
+
+class IdSequence(db.Model):
+    """Licznik kolejnych ID (jeden wiersz na tabelę, np. name='employee')."""
+    __tablename__ = 'id_sequence'
+
+    name = db.Column(db.String(50), primary_key=True)
+    next_value = db.Column(db.Integer, nullable=False)
+
+class FreeEmployeeId(db.Model):
+    """ID zwolnione przez usunięcie pracownika - do ponownego użycia (tryb reuse gaps)."""
+    __tablename__ = 'free_employee_id'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
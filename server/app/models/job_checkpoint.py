@@ -0,0 +1,34 @@
+from app.utils.db import db
+from datetime import datetime
+
+class JobCheckpoint(db.Model):
+    """
+    Postęp zadań wsadowych (np. rotacja wygasłych QR), zapisywany razem z każdą paczką.
+    status = 'running' po restarcie oznacza przerwany przebieg - wznawiamy od kursora.
+    """
+    __tablename__ = 'job_checkpoint'
+
+    name = db.Column(db.String(50), primary_key=True)
+    status = db.Column(db.String(20), nullable=False, default='idle')  # idle | running
+
+    # Kursor (expires_at, id) ostatniego przetworzonego wiersza
+    cursor_expires_at = db.Column(db.DateTime, nullable=True)
+    cursor_id = db.Column(db.Integer, nullable=True)
+
+    processed = db.Column(db.Integer, nullable=False, default=0)        # w bieżącym przebiegu
+    total_processed = db.Column(db.Integer, nullable=False, default=0)  # od początku
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "status": self.status,
+            "cursor_expires_at": self.cursor_expires_at.isoformat() if self.cursor_expires_at else None,
+            "cursor_id": self.cursor_id,
+            "processed": self.processed,
+            "total_processed": self.total_processed,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
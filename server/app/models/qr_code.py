@@ -3,10 +3,14 @@ from datetime import datetime
 import uuid
 class QRCredential(db.Model):
     __tablename__ = 'QRCredential'
+    __table_args__ = (
+        # refresh_expired_qr_codes: aktywne kody posortowane po dacie wygaśnięcia
+        db.Index('ix_qrcredential_active_expires', 'is_active', 'expires_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
-    employee_id = db.Column(db.Integer, db.ForeignKey('employee.id'), nullable=False)
+    employee_id = db.Column(db.Integer, db.ForeignKey('employee.id'), nullable=False, index=True)
     
     qr_code_data = db.Column(db.String, unique=True, nullable=False, default=lambda: str(uuid.uuid4()))
  
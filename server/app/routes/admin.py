@@ -1,61 +1,96 @@
-from datetime import datetime
-from flask import Blueprint, request, jsonify
+from datetime import datetime, timedelta
+from flask import Blueprint, request, jsonify, Response, stream_with_context, current_app
 from app.models.access_log import AccessLog
+from sqlalchemy import or_, and_
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import contains_eager
 import re
-from app.utils.db import db
 from app.models.employee import Employee
+from app.services.face_cache import face_encoding_cache
+from app.services.qr_cache import qr_cache
+from app.services.report_service import ReportService
+from app.services import stats_rollup
+from app.services.stats_rollup import bucket_start
+from app.services.event_bus import event_bus, EventBusFull
+from app.utils import metrics
 
 admin_bp = Blueprint('admin', __name__)
 
+# Maksymalny rozmiar strony raportu w trybie stronicowanym
+MAX_RAPORT_PAGE_SIZE = 5000
+# Maksymalna liczba logów na jedno wywołanie /logs
+MAX_LOGS_PAGE_SIZE = 500
+
 @admin_bp.route('/logs', methods=['GET'])
 def get_access_logs():
-    """Pobiera wszystkie logi dostępu"""
+    """
+    Pobiera logi dostępu (od najnowszych) jednym zapytaniem z JOIN-em na pracownika.
+    Parametry: limit (max MAX_LOGS_PAGE_SIZE), method, status, employee_id,
+    before_ts + before_id - kursor do kolejnej strony (z next_before_* z odpowiedzi).
+    """
     try:
         limit = request.args.get('limit', default=10, type=int)
-        
-        logs = AccessLog.query.order_by(AccessLog.timestamp.desc()).limit(limit).all()
-        
-        logs_data = []
-        for log in logs:
-            employee = Employee.query.get(log.employee_id) if log.employee_id else None
-            
-            logs_data.append({
-                "id": log.id,
-                "employee_id": log.employee_id,
-                "employee_name": f"{employee.first_name} {employee.last_name}" if employee else "Unknown",
-                "status": log.status,
-                "verification_method": log.verification_method,
-                "timestamp": log.timestamp.isoformat() if log.timestamp else None
-            })
-        
-        return jsonify({
+        limit = min(max(limit, 1), MAX_LOGS_PAGE_SIZE)
+        method = request.args.get('method')
+        status = request.args.get('status')
+        employee_id = request.args.get('employee_id', type=int)
+        before_id = request.args.get('before_id', type=int)
+        before_ts = request.args.get('before_ts')
+
+        query = AccessLog.query.outerjoin(Employee, AccessLog.employee_id == Employee.id)\
+            .options(contains_eager(AccessLog.employee))
+
+        if method:
+            query = query.filter(AccessLog.verification_method == method)
+        if status:
+            query = query.filter(AccessLog.status == status)
+        if employee_id is not None:
+            query = query.filter(AccessLog.employee_id == employee_id)
+
+        # Kursor (timestamp, id) zamiast OFFSET
+        if before_ts:
+            try:
+                before_ts = datetime.fromisoformat(before_ts)
+            except ValueError:
+                return jsonify({"error": "Nieprawidłowy before_ts (ISO 8601)"}), 400
+            if before_id is not None:
+                query = query.filter(or_(
+                    AccessLog.timestamp < before_ts,
+                    and_(AccessLog.timestamp == before_ts, AccessLog.id < before_id)
+                ))
+            else:
+                query = query.filter(AccessLog.timestamp < before_ts)
+        elif before_id is not None:
+            query = query.filter(AccessLog.id < before_id)
+
+        logs = query.order_by(AccessLog.timestamp.desc(), AccessLog.id.desc()).limit(limit).all()
+        logs_data = [log.to_dict() for log in logs]
+
+        response = {
             "success": True,
             "logs": logs_data
-        }), 200
+        }
+        if len(logs) == limit:
+            response["next_before_ts"] = logs[-1].timestamp.isoformat()
+            response["next_before_id"] = logs[-1].id
+
+        return jsonify(response), 200
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @admin_bp.route('/stats', methods=['GET'])
 def get_admin_stats():
-    """Zwraca statystyki dla dashboardu"""
+    """Zwraca statystyki dla dashboardu (z tabel rollup i liczników, bez skanowania tabel)"""
     try:
-        from datetime import datetime, timedelta
+        total_employees = stats_rollup.counter("employees")
         
-        total_employees = Employee.query.count()
-        
-        # Logi z dzisiaj
-        today = datetime.utcnow().date()
-        today_access = AccessLog.query.filter(
-            AccessLog.timestamp >= today
-        ).count()
+        # Logi z dzisiaj - kubełek dzienny
+        today = bucket_start(datetime.utcnow(), "day")
+        today_access = stats_rollup.totals("day", today)
         
         # Dzisiejsze odmowy dostępu
-        today_denied = AccessLog.query.filter(
-            AccessLog.timestamp >= today,
-            AccessLog.status == 'denied'
-        ).count()
+        today_denied = stats_rollup.totals("day", today, status='denied')
         
         return jsonify({
             "success": True,
@@ -68,73 +103,146 @@ def get_admin_stats():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@admin_bp.route('/raport', methods=['POST'])
+@admin_bp.route('/events', methods=['GET'])
+def stream_events():
+    """
+    Podgląd na żywo (Server-Sent Events) zamiast odpytywania /logs i /stats.
+    Zdarzenia: "access" (nowy log, pola jak w /logs), "stats" (przyrosty liczników z /stats),
+    "resync" (klient coś zgubił - niech pobierze /logs i /stats od nowa).
+    Wznowienie: nagłówek Last-Event-ID (EventSource wysyła go sam) albo ?last_event_id=.
+    Strumień nie dotyka bazy - koszt widza to jeden bufor w app/services/event_bus.py.
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        subscription = event_bus.subscribe(last_event_id)
+    except EventBusFull:
+        return jsonify({"error": "Za dużo otwartych podglądów, spróbuj później"}), 503, {"Retry-After": "10"}
+
+    keepalive = current_app.config.get("EVENT_STREAM_KEEPALIVE", 15)
+
+    def generate():
+        try:
+            yield "retry: 3000\n\n"
+            while not subscription.closed:
+                resync, events = subscription.get(timeout=keepalive)
+                if resync:
+                    yield "event: resync\ndata: {}\n\n"
+                if events:
+                    yield "".join(events)
+                elif not resync:
+                    yield ": keep-alive\n\n"
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    return Response(generate(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",  # nginx: bez buforowania strumienia
+    })
+
+@admin_bp.route('/stats/timeseries', methods=['GET'])
+def get_stats_timeseries():
+    """
+    Szereg czasowy zdarzeń z tabeli rollup.
+    Parametry: granularity (hour | day), from, to (ISO 8601).
+    Domyślnie: ostatnie 24 godziny (hour) albo 30 dni (day).
+    """
+    granularity = request.args.get('granularity', 'hour')
+    if granularity not in stats_rollup.GRANULARITIES:
+        return jsonify({"error": "granularity: hour lub day"}), 400
+
+    now = datetime.utcnow()
+    default_span = timedelta(hours=24) if granularity == 'hour' else timedelta(days=30)
+    try:
+        date_to = datetime.fromisoformat(request.args['to']) if request.args.get('to') else now
+        date_from = datetime.fromisoformat(request.args['from']) if request.args.get('from') else date_to - default_span
+    except ValueError:
+        return jsonify({"error": "Nieprawidłowy format daty (ISO 8601)"}), 400
+
+    return jsonify({
+        "success": True,
+        "granularity": granularity,
+        "from": date_from.isoformat(),
+        "to": date_to.isoformat(),
+        "buckets": stats_rollup.timeseries(
+            granularity,
+            bucket_start(date_from, granularity),
+            date_to
+        )
+    }), 200
+
+@admin_bp.route('/cache_stats', methods=['GET'])
+def get_cache_stats():
+    """Metryki cache'y (trafienia, chybienia, wysiedlenia)"""
+    return jsonify({
+        "success": True,
+        "face_encoding": face_encoding_cache.stats(),
+        "qr_credential": qr_cache.stats()
+    }), 200
+
+@admin_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Metryki w formacie tekstowym Prometheusa (scrape_configs: metrics_path: /api/admin/metrics)"""
+    return Response(metrics.registry.render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+@admin_bp.route('/raport', methods=['GET', 'POST'])
 def generate_raport():
     """
     Generuje raport zdarzeń z bazy access_logs.
-    Oczekuje JSON: { "date_from": "...", "date_to": "...", "entry_type": "...", "employee_id": ... }
+    Oczekuje JSON (POST) lub query stringa (GET):
+    { "date_from": "...", "date_to": "...", "entry_type": "...", "employee_id": ...,
+      "format": "json" | "csv" | "ndjson", "page_size": ..., "cursor": "..." }
+
+    - json bez page_size: cały raport jak dotychczas
+    - json z page_size: jedna strona + next_cursor do pobrania kolejnej
+    - csv / ndjson: odpowiedź strumieniowa, pamięć stała niezależnie od zakresu dat
     """
-    if not request.is_json:
-        return jsonify({"error": "Wymagany format JSON"}), 400
-    
-    data = request.get_json()
-    date_from_str = data.get('date_from')
-    date_to_str = data.get('date_to')
-    entry_type = data.get('entry_type', 'all')  # domyślnie 'all'
-    employee_id = data.get('employee_id')
-
-    # 1. Budujemy podstawowe zapytanie z Joinem, żeby mieć dane pracownika
-    # Używamy db.session.query, bo łączymy dwie tabele
-    query = db.session.query(AccessLog, Employee).join(Employee, AccessLog.employee_id == Employee.id)
-
-    # 2. Filtrowanie po dacie
+    if request.method == 'POST':
+        if not request.is_json:
+            return jsonify({"error": "Wymagany format JSON"}), 400
+        data = request.get_json()
+    else:
+        data = request.args
+
+    output_format = data.get('format', 'json')
+    if output_format not in ('json', 'csv', 'ndjson'):
+        return jsonify({"error": "Nieobsługiwany format. Użyj json, csv lub ndjson"}), 400
+
     try:
-        if date_from_str:
-            date_from = datetime.strptime(date_from_str, '%Y-%m-%d')
-            query = query.filter(AccessLog.timestamp >= date_from)
-        
-        if date_to_str:
-            # Ustawiamy koniec dnia na 23:59:59
-            date_to = datetime.strptime(date_to_str, '%Y-%m-%d').replace(hour=23, minute=59, second=59)
-            query = query.filter(AccessLog.timestamp <= date_to)
+        filters = ReportService.parse_filters(data)
     except ValueError:
         return jsonify({"error": "Nieprawidłowy format daty. Użyj RRRR-MM-DD"}), 400
 
-    # 3. Filtrowanie po pracowniku
-    if employee_id:
-        query = query.filter(AccessLog.employee_id == employee_id)
-
-    # 4. Filtrowanie po typie wejścia
-    
-    if entry_type == 'access':
-        query = query.filter(AccessLog.status == 'granted')
-    elif entry_type == 'denied':
-        query = query.filter(AccessLog.status == 'denied')
-
-    # 5. Wykonanie zapytania i sortowanie od najnowszych
-    results = query.order_by(AccessLog.timestamp.desc()).all()
-
-    # 6. Mapowanie wyników do czytelnego formatu
-    raport_list = []
-    for log, emp in results:
-        raport_list.append({
-            "timestamp": log.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-            "employee_id": log.employee_id,
-            "full_name": f"{emp.first_name} {emp.last_name}",
-            "email": emp.email,
-            "status": log.status,
-            "reason": getattr(log, 'reason', 'N/A') # Pobiera powód, jeśli kolumna istnieje
-        })
+    query = ReportService.build_query(filters)
 
-    return jsonify({
+    # Eksport strumieniowy
+    if output_format == 'csv':
+        return Response(
+            stream_with_context(ReportService.stream_csv(query)),
+            mimetype='text/csv',
+            headers={"Content-Disposition": "attachment; filename=raport.csv"}
+        )
+    if output_format == 'ndjson':
+        return Response(
+            stream_with_context(ReportService.stream_ndjson(query)),
+            mimetype='application/x-ndjson'
+        )
+
+    response = {
         "status": "success",
-        "count": len(raport_list),
-        "filters": {
-            "date_from": date_from_str,
-            "date_to": date_to_str,
-            "entry_type": entry_type,
-            "employee_id": employee_id
-        },
-        "data": raport_list
-    }), 200
-    
\ No newline at end of file
+        "filters": filters,
+    }
+
+    page_size = data.get('page_size')
+    if page_size is not None:
+        try:
+            page_size = min(max(int(page_size), 1), MAX_RAPORT_PAGE_SIZE)
+            raport_list, next_cursor = ReportService.page(query, page_size, data.get('cursor'))
+        except ValueError:
+            return jsonify({"error": "Nieprawidłowy page_size lub cursor"}), 400
+        response["next_cursor"] = next_cursor
+    else:
+        raport_list = [ReportService.row_to_dict(log, emp) for log, emp in query.all()]
+
+    response["count"] = len(raport_list)
+    response["data"] = raport_list
+    return jsonify(response), 200
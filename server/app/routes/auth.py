@@ -1,17 +1,45 @@
 from datetime import datetime
-from flask import Blueprint, request, jsonify
-from app.models.access_log import AccessLog
+from flask import Blueprint, request, jsonify, current_app
 from sqlalchemy.exc import IntegrityError
 import re
-from app.utils.db import db
 from app.models.employee import Employee
-from app.models.employee_face import FaceCredential
-from app.models.qr_code import QRCredential
 from app.services.face_service import FaceServices
 from app.services.qr_service import QRService
+from app.services.face_index import face_index
+from app.services.face_templates import FaceTemplateService
+from app.services.face_cache import get_face_encoding
+from app.services.face_pool import face_pool, FacePoolBusy, FacePoolTimeout
+from app.services.face_tracking import session_key, get_hint, update_session
+from app.services.access_log_writer import access_log_writer
+from app.services.qr_cache import qr_cache
+from app.services.frame_quality import FrameQualityService
+from app.utils.uploads import read_face_upload, UploadError
+from app.utils import metrics
 
 auth_bp= Blueprint('auth', __name__)
 
+def _select_frame(images):
+    """
+    Seria klatek -> najlepsza do encodingu (app/services/frame_quality.py).
+    Zwraca (bajty klatki, None) albo (None, odpowiedź), gdy żadna klatka nie ma szans.
+    """
+    if not current_app.config.get("FRAME_QUALITY_ENABLED", True):
+        return images[0], None
+
+    settings = FrameQualityService.get_settings()
+    if len(images) > settings["max_burst"]:
+        return None, (jsonify({"error": f"Za dużo klatek (max {settings['max_burst']})"}), 400)
+
+    with metrics.FACE_STAGE.time(stage="quality"):
+        best, reports = FrameQualityService.select_best(images, settings)
+    if best is None:
+        return None, (jsonify({
+            "status": "denied",
+            "message": "Zdjęcie nie nadaje się do weryfikacji (ostrość, oświetlenie lub twarz). Spróbuj ponownie.",
+            "frames": [FrameQualityService.report_to_dict(report) for report in reports]
+        }), 400)
+    return images[best], None
+
 @auth_bp.route('/qr', methods=['POST'])
 def verify_qr_only():
     if not request.is_json:
@@ -23,75 +51,78 @@ def verify_qr_only():
     if not qr_code_data:
         return jsonify({'error': 'Brak kodu QR'}), 400
     
-    # 1. Sprawdź, czy kod QR istnieje i jest aktywny
-    qr_record = QRCredential.query.filter_by(qr_code_data=qr_code_data).first()
-    
-    if not qr_record or not QRService.validate_qr_code(qr_code_data):
+    # 1. Sprawdź, czy kod QR istnieje i jest aktywny (cache w pamięci, baza tylko przy chybieniu)
+    qr_entry = qr_cache.lookup(qr_code_data)
+
+    if not QRService.is_entry_valid(qr_code_data, qr_entry):
         
-        try:
-            log = AccessLog(
-                employee_id = "unknown", 
-                status="denied",
-                verification_method="qr"
-            )
-            db.session.add(log)
-            db.session.commit()
-        except Exception as log_error:
-            print(f"[WARNING] Failed to log access: {log_error}")
+        access_log_writer.record(
+            employee_id=None,
+            status="denied",
+            verification_method="qr"
+        )
 
         return jsonify({
             "status": "denied",
             "message": "Nieprawidłowy lub wygasły kod QR."
         }), 401
 
-    # Pobieramy dane pracownika
-    employee = Employee.query.get(qr_record.employee_id)
-    
-    if not employee:
+    # Dane pracownika są już we wpisie cache
+    if qr_entry.first_name is None:
         return jsonify({"error": "Błąd spójności danych: brak pracownika dla tego kodu"}), 500
 
     # Zwracamy sukces i ID pracownika, żeby frontend wiedział, kogo weryfikować twarzą
-    try:
-        log = AccessLog(
-            employee_id=employee.id,
-            status="granted",
-            verification_method="qr"
-        )
-        db.session.add(log)
-        db.session.commit()
-    except Exception as log_error:
-        print(f"[WARNING] Failed to log access: {log_error}")
+    access_log_writer.record(
+        employee_id=qr_entry.employee_id,
+        status="granted",
+        verification_method="qr"
+    )
 
     return jsonify({
         "status": "valid",
         "message": "Kod QR poprawny. Przejdź do weryfikacji twarzy.",
-        "employee_id": employee.id,
-        "first_name": employee.first_name 
+        "employee_id": qr_entry.employee_id,
+        "first_name": qr_entry.first_name
     }), 200
 
 @auth_bp.route('/face', methods=['POST'])
 def verify_face_only():
-    if not request.is_json:
-        return jsonify({"error": "Wymagany format JSON"}), 400
-    
-    data = request.get_json()
-    image_input_base64 = data.get('image')
+    """Zdjęcie jako base64 w JSON, plik multipart albo surowe body image/jpeg (?employee_id=...)."""
+    try:
+        data, images = read_face_upload(request)
+    except UploadError as e:
+        return jsonify({"error": str(e)}), e.status
+
     employee_id = data.get('employee_id') # To musimy dostać z frontendu (wynik poprzedniego requestu)
 
-    if not image_input_base64 or not employee_id:
+    if not images or not employee_id:
         return jsonify({'error': 'Brak zdjęcia lub ID pracownika'}), 400
 
-    # 1. Pobierz wzorzec twarzy dla podanego ID pracownika
-    face_record = FaceCredential.query.filter_by(employee_id=employee_id).first()
-    
-    if not face_record:
+    try:
+        employee_id = int(employee_id)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Nieprawidłowe ID pracownika'}), 400
+
+    # 0. Ocena klatek - tylko najlepsza idzie do encodingu
+    frame, rejection = _select_frame(images)
+    if rejection:
+        return rejection
+
+    # 1. Pobierz wzorzec twarzy dla podanego ID pracownika (cache -> baza)
+    try:
+        known_encoding = get_face_encoding(employee_id)
+    except ValueError as e:
+        return jsonify({"error": f"Uszkodzony wzorzec twarzy: {str(e)}"}), 500
+
+    if known_encoding is None:
         # Można tu zwrócić 404 lub 400, zależy od logiki (np. pracownik ma QR, ale nie ma skanu twarzy)
         return jsonify({"error": "Brak wzorca twarzy dla tego pracownika"}), 404
 
     # 2. Przetworzenie przesłanego zdjęcia
     try:
-        image_stream = FaceServices.handle_base64_image(image_input_base64)
-        uploaded_encoding = FaceServices.get_encoding_from_image(image_stream)
+        # Kolejne klatki z tego samego kiosku: detekcja tylko wokół poprzedniej ramki
+        session = session_key(request, data, employee_id)
+        uploaded_encoding = face_pool.encode_tracked(frame, "verify", session)
 
         if uploaded_encoding is None:
             return jsonify({
@@ -99,25 +130,28 @@ def verify_face_only():
                 "message": "Nie wykryto twarzy na przesłanym zdjęciu"
             }), 400
             
+    except FacePoolBusy:
+        return jsonify({"error": "Serwer zajęty, spróbuj ponownie"}), 503, {"Retry-After": "1"}
+    except FacePoolTimeout:
+        return jsonify({"error": "Przekroczono czas przetwarzania obrazu"}), 504
     except Exception as e:
         return jsonify({"error": f"Błąd przetwarzania obrazu: {str(e)}"}), 500
 
     
-    is_match = FaceServices.compare_faces(face_record.face_encoding, uploaded_encoding)
+    with metrics.FACE_STAGE.time(stage="compare"):
+        is_match = FaceServices.compare_faces(known_encoding, uploaded_encoding)
     
     if is_match:
         employee = Employee.query.get(employee_id)
 
-        try:
-            log = AccessLog(
-                employee_id=employee_id,
-                status="granted",
-                verification_method="face"
-            )
-            db.session.add(log)
-            db.session.commit()
-        except Exception as log_error:
-            print(f"[WARNING] Failed to log access: {log_error}")
+        access_log_writer.record(
+            employee_id=employee_id,
+            status="granted",
+            verification_method="face"
+        )
+
+        # Opt-in: pewne dopasowanie staje się kolejnym wzorcem pracownika
+        FaceTemplateService.maybe_add_verification_template(employee_id, known_encoding, uploaded_encoding)
 
         return jsonify({
             "status": "granted",
@@ -126,18 +160,181 @@ def verify_face_only():
         }), 200
     else:
 
-        try:
-            log = AccessLog(
-                employee_id=employee_id,
-                status="denied",
-                verification_method="face"
-            )
-            db.session.add(log)
-            db.session.commit()
-        except Exception as log_error:
-            print(f"[WARNING] Failed to log access denial: {log_error}")
+        access_log_writer.record(
+            employee_id=employee_id,
+            status="denied",
+            verification_method="face"
+        )
 
         return jsonify({
             "status": "denied",
             "message": "Weryfikacja biometryczna nieudana. Twarz nie pasuje."
-        }), 401
\ No newline at end of file
+        }), 401
+
+@auth_bp.route('/verify', methods=['POST'])
+def verify_qr_and_face():
+    """
+    QR + twarz w jednym requeście (zamiast /qr, a potem /face).
+    Body: {"qr_code": "...", "image": "data:image/jpeg;base64,..."},
+    multipart (pole qr_code + plik image) albo image/jpeg z ?qr_code=...
+
+    Nieważny kod QR (nieznany, wyłączony, wygasły) kończy request przed
+    jakąkolwiek pracą na obrazie - ważne kody są w cache, więc to zwykle
+    odczyt ze słownika. Dopiero potem encoding twarzy rusza w puli procesów,
+    a w tym czasie czytamy wzorce. Jeden wpis w access_log ("qr+face").
+    """
+    try:
+        data, images = read_face_upload(request)
+    except UploadError as e:
+        return jsonify({"error": str(e)}), e.status
+
+    qr_code_data = data.get('qr_code')
+
+    if not qr_code_data or not images:
+        return jsonify({'error': 'Brak kodu QR lub zdjęcia'}), 400
+
+    def deny_qr():
+        access_log_writer.record(
+            employee_id=None,
+            status="denied",
+            verification_method="qr+face"
+        )
+        return jsonify({
+            "status": "denied",
+            "message": "Nieprawidłowy lub wygasły kod QR."
+        }), 401
+
+    # 1. QR (cache, przy chybieniu baza) - nieważny kod nie zajmuje puli
+    qr_entry = qr_cache.lookup(qr_code_data)
+    if not QRService.is_entry_valid(qr_code_data, qr_entry):
+        return deny_qr()
+
+    if qr_entry.first_name is None:
+        return jsonify({"error": "Błąd spójności danych: brak pracownika dla tego kodu"}), 500
+
+    # 2. Ocena klatek i start encodingu najlepszej
+    frame, rejection = _select_frame(images)
+    if rejection:
+        return rejection
+    session = session_key(request, data, qr_code_data)
+    try:
+        face_future = face_pool.submit(frame, profile="verify", hint=get_hint(session))
+    except FacePoolBusy:
+        return jsonify({"error": "Serwer zajęty, spróbuj ponownie"}), 503, {"Retry-After": "1"}
+
+    # 3. Wzorce twarzy, póki pula liczy
+    employee_id = qr_entry.employee_id
+    try:
+        known_encoding = get_face_encoding(employee_id)
+    except ValueError as e:
+        face_future.cancel()
+        return jsonify({"error": f"Uszkodzony wzorzec twarzy: {str(e)}"}), 500
+
+    if known_encoding is None:
+        face_future.cancel()
+        return jsonify({"error": "Brak wzorca twarzy dla tego pracownika"}), 404
+
+    # 4. Wynik encodingu
+    try:
+        uploaded_encoding = face_pool.result(face_future)
+        update_session(session, face_future.location)
+    except FacePoolTimeout:
+        return jsonify({"error": "Przekroczono czas przetwarzania obrazu"}), 504
+    except Exception as e:
+        return jsonify({"error": f"Błąd przetwarzania obrazu: {str(e)}"}), 500
+
+    if uploaded_encoding is None:
+        return jsonify({
+            "status": "denied",
+            "message": "Nie wykryto twarzy na przesłanym zdjęciu"
+        }), 400
+
+    # 5. Porównanie i jeden wpis w logu
+    with metrics.FACE_STAGE.time(stage="compare"):
+        is_match = FaceServices.compare_faces(known_encoding, uploaded_encoding)
+
+    access_log_writer.record(
+        employee_id=employee_id,
+        status="granted" if is_match else "denied",
+        verification_method="qr+face"
+    )
+
+    if not is_match:
+        return jsonify({
+            "status": "denied",
+            "message": "Weryfikacja biometryczna nieudana. Twarz nie pasuje."
+        }), 401
+
+    FaceTemplateService.maybe_add_verification_template(employee_id, known_encoding, uploaded_encoding)
+
+    return jsonify({
+        "status": "granted",
+        "message": f"Dostęp przyznany. Witaj, {qr_entry.first_name}!",
+        "employee_id": employee_id
+    }), 200
+
+@auth_bp.route('/face/identify', methods=['POST'])
+def identify_face():
+    """
+    Identyfikacja 1:N - sama twarz, bez QR i bez ID pracownika.
+    Szuka najbliższego wzorca w indeksie trzymanym w pamięci.
+    Zdjęcie jako base64 w JSON, plik multipart albo surowe body image/jpeg.
+    """
+    try:
+        data, images = read_face_upload(request)
+    except UploadError as e:
+        return jsonify({"error": str(e)}), e.status
+
+    if not images:
+        return jsonify({'error': 'Brak zdjęcia'}), 400
+
+    frame, rejection = _select_frame(images)
+    if rejection:
+        return rejection
+
+    try:
+        session = session_key(request, data, "identify")
+        uploaded_encoding = face_pool.encode_tracked(frame, "identify", session)
+
+        if uploaded_encoding is None:
+            return jsonify({
+                "status": "denied",
+                "message": "Nie wykryto twarzy na przesłanym zdjęciu"
+            }), 400
+
+    except FacePoolBusy:
+        return jsonify({"error": "Serwer zajęty, spróbuj ponownie"}), 503, {"Retry-After": "1"}
+    except FacePoolTimeout:
+        return jsonify({"error": "Przekroczono czas przetwarzania obrazu"}), 504
+    except Exception as e:
+        return jsonify({"error": f"Błąd przetwarzania obrazu: {str(e)}"}), 500
+
+    with metrics.FACE_STAGE.time(stage="compare"):
+        employee_id, distance = face_index.identify(uploaded_encoding)
+    employee = Employee.query.get(employee_id) if employee_id is not None else None
+
+    if employee:
+        access_log_writer.record(
+            employee_id=employee.id,
+            status="granted",
+            verification_method="face"
+        )
+
+        return jsonify({
+            "status": "granted",
+            "message": f"Dostęp przyznany. Witaj, {employee.first_name}!",
+            "employee_id": employee.id,
+            "distance": distance
+        }), 200
+
+    access_log_writer.record(
+        employee_id=None,
+        status="denied",
+        verification_method="face"
+    )
+
+    return jsonify({
+        "status": "denied",
+        "message": "Nie rozpoznano twarzy.",
+        "distance": distance
+    }), 401
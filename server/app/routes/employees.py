@@ -1,14 +1,18 @@
 from datetime import datetime
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from sqlalchemy.exc import IntegrityError
 import re
 from app.utils.db import db
 from app.models.employee import Employee
-from app.models.employee_face import FaceCredential
 from app.models.qr_code import QRCredential
-from app.services.face_service import FaceServices
 from app.services.qr_service import QRService
-from app.utils.helpers import  get_next_available_id
+from app.services.face_index import face_index
+from app.services.face_cache import face_encoding_cache
+from app.services.face_pool import face_pool, FacePoolBusy, FacePoolTimeout
+from app.services.enrollment_service import EnrollmentService
+from app.services.face_templates import FaceTemplateService
+from app.utils.helpers import  get_next_available_id, release_employee_id
+from app.utils.uploads import read_face_upload, UploadError
 
 # Stałe walidacyjne
 MIN_NAME_LEN = 3
@@ -21,18 +25,24 @@ def register_employee():
     """
     Rejestracja pracownika (BEZ QR).
     Tylko Dane Osobowe + Twarz.
+    Zamiast jednego 'image' można podać 'images' (seria zdjęć) - każde zdjęcie
+    z wykrytą twarzą to osobny wzorzec (maks. FACE_MAX_TEMPLATES).
+    JSON z base64 albo multipart/form-data (pola + pliki 'image' / 'images').
     """
-    if not request.is_json:
-        return jsonify({"error": "Wymagany format JSON"}), 400
-    
-    data = request.get_json()
+    try:
+        data, images_bytes = read_face_upload(request)
+    except UploadError as e:
+        return jsonify({"error": str(e)}), e.status
+
     first_name = data.get('first_name')
     last_name = data.get('last_name')
     email = data.get('email')
-    image_base64 = data.get('image')
 
-    if not first_name or not last_name or not email or not image_base64:
+    if not first_name or not last_name or not email or not images_bytes:
         return jsonify({'error': 'Missing required fields'}), 400
+
+    if len(images_bytes) > FaceTemplateService.max_templates():
+        return jsonify({'error': f'Too many images (max {FaceTemplateService.max_templates()})'}), 400
     
     # Walidacja Regex
     # email_pattern = r"^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$"
@@ -48,18 +58,23 @@ def register_employee():
     # ):
     #     return jsonify({"message": "Invalid data format"}), 400
 
-    # Przetwarzanie zdjęcia
+    # Przetwarzanie zdjęć (w puli procesów, nie w wątku requestu)
     try:
-        image_stream = FaceServices.handle_base64_image(image_base64)
-        if image_stream is None:
-             return jsonify({"error": "Invalid Base64 image"}), 400
-
-        face_encoding_np = FaceServices.get_encoding_from_image(image_stream)
-        if face_encoding_np is None:
+        if len(images_bytes) == 1:
+            encodings = [face_pool.encode(images_bytes[0], profile="enroll")]
+        else:
+            encodings = face_pool.encode_many(images_bytes, profile="enroll")
+            errors = [e for e in encodings if isinstance(e, Exception)]
+            if errors and len(errors) == len(encodings):
+                raise errors[0]
+        encodings = [e for e in encodings if e is not None and not isinstance(e, Exception)]
+        if not encodings:
             return jsonify({"error": "No face detected"}), 400
-        
-        face_bytes = FaceServices.encoding_to_bytes(face_encoding_np)
 
+    except FacePoolBusy:
+        return jsonify({"error": "Server busy, try again"}), 503, {"Retry-After": "1"}
+    except FacePoolTimeout:
+        return jsonify({"error": "Face processing timed out"}), 504
     except Exception as e:
         return jsonify({"error": f"Image error: {str(e)}"}), 500
 
@@ -77,12 +92,8 @@ def register_employee():
         db.session.add(new_employee)
         db.session.flush()
 
-        new_face = FaceCredential(
-            employee_id=new_employee.id, 
-            face_encoding=face_bytes,
-            face_image_path="memory"
-        )
-        db.session.add(new_face)
+        templates = [FaceTemplateService.new_template(new_employee.id, encoding) for encoding in encodings]
+        db.session.add_all(templates)
         db.session.flush()
 
         new_qr = QRCredential(
@@ -94,10 +105,13 @@ def register_employee():
         db.session.add(new_qr)
         db.session.commit()
 
+        FaceTemplateService.publish(new_employee.id, templates, encodings)
+
         return jsonify({
             "message": "Employee registered successfully",
             "employee_id": new_employee.id,
             "qr_code": new_qr.qr_code_data,
+            "templates": len(templates),
         }), 201
 
     except IntegrityError:
@@ -107,6 +121,42 @@ def register_employee():
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
+@employees_bp.route('/register/batch', methods=['POST'])
+def register_employees_batch():
+    """
+    Rejestracja wsadowa wielu pracowników.
+    Body: tablica JSON [{first_name, last_name, email, image}, ...]
+    albo strumień NDJSON (Content-Type: application/x-ndjson), jedna osoba na linię.
+    Zwraca raport per pozycja; każda paczka (chunk) to osobna transakcja.
+    """
+    if request.is_json:
+        items = request.get_json(silent=True)
+        if not isinstance(items, list):
+            return jsonify({"error": "Wymagana tablica JSON"}), 400
+    elif request.mimetype == 'application/x-ndjson':
+        items = EnrollmentService.iter_ndjson(request.stream)
+    else:
+        return jsonify({"error": "Wymagany format JSON lub NDJSON"}), 400
+
+    chunk_size = current_app.config.get("BATCH_ENROLL_CHUNK_SIZE", 100)
+    seen_emails = set()
+    results = []
+
+    try:
+        for chunk in EnrollmentService.iter_chunks(items, chunk_size):
+            results.extend(EnrollmentService.enroll_chunk(chunk, len(results), seen_emails))
+    except FacePoolBusy:
+        return jsonify({"error": "Server busy, try again", "results": results}), 503, {"Retry-After": "1"}
+
+    created = sum(1 for r in results if r["status"] == "created")
+    return jsonify({
+        "message": "Batch processed",
+        "total": len(results),
+        "created": created,
+        "failed": len(results) - created,
+        "results": results
+    }), 200
+
 @employees_bp.route('/all', methods=['GET'])
 def get_all_employees():
     """Pobiera listę wszystkich pracowników"""
@@ -132,7 +182,10 @@ def delete_employee(employee_id):
         return jsonify({"error": "Employee not found"}), 404
     
     db.session.delete(employee)
+    release_employee_id(employee_id)
     db.session.commit()
+    face_index.remove(employee_id)
+    face_encoding_cache.invalidate(employee_id)
     return jsonify({"message": "Employee deleted"}), 200
 
 @employees_bp.route('/<int:employee_id>/generate_new_qr_code', methods=['POST'])
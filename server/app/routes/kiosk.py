@@ -0,0 +1,31 @@
+import socket
+from flask import Blueprint, request, jsonify
+from app.services.kiosk_stream import KioskStream
+
+try:
+    from flask_sock import Sock
+except ImportError:  # opcjonalne - bez flask-sock kiosk zostaje przy /api/auth/verify
+    Sock = None
+
+kiosk_bp = Blueprint('kiosk', __name__)
+
+if Sock is not None:
+    sock = Sock()
+
+    @sock.route('/stream', bp=kiosk_bp)
+    def kiosk_stream(ws):
+        """
+        Stały kanał WebSocket kiosku: klatki binarnie, kody QR i wyniki jako JSON
+        (protokół w app/services/kiosk_stream.py). ?kiosk_id=... - przeglądarka
+        nie ustawi nagłówka X-Kiosk-Id w WebSockecie.
+        """
+        # Krótkie wiadomości ("qr", potem "result") bez czekania Nagle'a na ACK poprzedniej
+        try:
+            ws.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except (AttributeError, OSError):
+            pass
+        KioskStream(ws, kiosk_id=request.args.get('kiosk_id')).run()
+else:
+    @kiosk_bp.route('/stream', methods=['GET'])
+    def kiosk_stream():
+        return jsonify({"error": "Kanał WebSocket niedostępny (brak pakietu flask-sock)"}), 501
@@ -0,0 +1,83 @@
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from app.models.access_log import AccessLog
+from app.models.employee import Employee
+from app.services.event_bus import event_bus
+
+_PENDING_KEY = "access_events_pending"
+
+
+def _employee_names(connection, employee_ids):
+    ids = {employee_id for employee_id in employee_ids if isinstance(employee_id, int)}
+    if not ids:
+        return {}
+    rows = connection.execute(
+        select(Employee.id, Employee.first_name, Employee.last_name).where(Employee.id.in_(ids))
+    )
+    return {employee_id: f"{first_name} {last_name}" for employee_id, first_name, last_name in rows}
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_access_events(session, flush_context):
+    """
+    Nowe logi dostępu (i zmiany liczby pracowników) z tego flusha - publikowane
+    dopiero po commit, więc podgląd nie pokaże zdarzenia, które się wycofało.
+    """
+    logs = [obj for obj in session.new if isinstance(obj, AccessLog)]
+    employees_delta = sum(isinstance(obj, Employee) for obj in session.new) \
+        - sum(isinstance(obj, Employee) for obj in session.deleted)
+    if not logs and not employees_delta:
+        return
+
+    # Imiona dociągamy tylko, gdy ktoś ogląda - bez widzów zapis logu (także w wątku
+    # requestu przy ACCESS_LOG_ASYNC = False) nie dostaje dodatkowego zapytania
+    names = _employee_names(session.connection(), [log.employee_id for log in logs]) \
+        if logs and event_bus.subscriber_count else {}
+    pending = session.info.setdefault(_PENDING_KEY, {"logs": [], "employees": 0})
+    pending["employees"] += employees_delta
+    for log in logs:
+        timestamp = log.timestamp or datetime.utcnow()
+        pending["logs"].append({
+            "id": log.id,
+            "employee_id": log.employee_id,
+            "employee_name": names.get(log.employee_id),
+            "status": log.status,
+            "verification_method": log.verification_method,
+            "timestamp": timestamp.isoformat(),
+        })
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_access_events(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        publish(pending["logs"], pending["employees"])
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_access_events(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def publish(logs, employees_delta=0):
+    """
+    Zdarzenia "access" (jedno na log, pola jak AccessLog.to_dict; employee_name = None,
+    gdy nikt nie słuchał) i "stats" - przyrosty liczników z /api/admin/stats,
+    po jednym na dzień z paczki.
+    """
+    for log in logs:
+        event_bus.publish("access", log)
+
+    days = Counter()
+    denied = Counter()
+    for log in logs:
+        day = log["timestamp"][:10]
+        days[day] += 1
+        if log["status"] == "denied":
+            denied[day] += 1
+    for day in sorted(days):
+        event_bus.publish("stats", {"day": day, "today_access": days[day], "today_denied": denied[day]})
+    if employees_delta:
+        event_bus.publish("stats", {"total_employees": employees_delta, "active_employees": employees_delta})
@@ -0,0 +1,247 @@
+import atexit
+import queue
+import threading
+import time
+from datetime import datetime
+from flask import current_app
+from app.utils.db import db
+from app.models.access_log import AccessLog
+from app.utils import metrics
+
+OVERFLOW_POLICIES = ("drop_newest", "drop_oldest", "block")
+
+# Budzi wątek czekający na kolejkę przy shutdown (nie jest zapisywany)
+_WAKE = object()
+
+
+class AccessLogWriter:
+    """
+    Zapis logów dostępu poza ścieżką odpowiedzi bramki.
+
+    record() wrzuca zdarzenie do ograniczonej kolejki w pamięci, a wątek
+    w tle zapisuje je paczkami: gdy uzbiera się batch_size zdarzeń albo
+    minie flush_interval sekund. Przy pełnej kolejce działa overflow_policy:
+      - drop_newest: nowe zdarzenie jest odrzucane
+      - drop_oldest: najstarsze czekające zdarzenie ustępuje miejsca
+      - block: record() czeka do block_timeout sekund, potem odrzuca
+    Przy zamknięciu procesu kolejka jest dopisywana do bazy.
+
+    Gdy ACCESS_LOG_ASYNC = False albo TESTING - zapis synchroniczny jak wcześniej.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._count_lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._app = None
+        self.batch_size = 100
+        self.flush_interval = 1.0
+        self.overflow_policy = "drop_oldest"
+        self.block_timeout = 0.05
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, app, batch_size=100, flush_interval=1.0, max_queue=10000,
+              overflow_policy="drop_oldest", block_timeout=0.05):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        with self._lock:
+            if self.running:
+                return
+            self._app = app
+            self.batch_size = batch_size
+            self.flush_interval = flush_interval
+            self.overflow_policy = overflow_policy
+            self.block_timeout = block_timeout
+            self._queue = queue.Queue(maxsize=max_queue)
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="access-log-writer", daemon=True)
+            self._thread.start()
+            print(f"[AccessLog] Async writer started (batch: {batch_size}, interval: {flush_interval}s, "
+                  f"queue: {max_queue}, overflow: {overflow_policy})")
+
+    def _ensure_started(self):
+        if self.running:
+            return True
+        config = current_app.config
+        if config.get("TESTING") or not config.get("ACCESS_LOG_ASYNC", False):
+            return False
+        self.start(
+            current_app._get_current_object(),
+            batch_size=config.get("ACCESS_LOG_BATCH_SIZE", 100),
+            flush_interval=config.get("ACCESS_LOG_FLUSH_INTERVAL", 1.0),
+            max_queue=config.get("ACCESS_LOG_MAX_QUEUE", 10000),
+            overflow_policy=config.get("ACCESS_LOG_OVERFLOW_POLICY", "drop_oldest")
+        )
+        return True
+
+    # ------------------------------
+    # API dla endpointów
+    # ------------------------------
+    def record(self, employee_id, status, verification_method):
+        """
+        Rejestruje zdarzenie dostępu. Nigdy nie rzuca wyjątku do endpointu.
+        employee_id = None (albo cokolwiek poza int) - nieznana osoba, zapis z NULL.
+        """
+        if not isinstance(employee_id, int):
+            employee_id = None
+        event = {
+            "employee_id": employee_id,
+            "status": status,
+            "verification_method": verification_method,
+            "timestamp": datetime.utcnow(),
+        }
+
+        if not self._ensure_started():
+            try:
+                self._write([event], db.session)
+            except Exception as log_error:
+                print(f"[WARNING] Failed to log access: {log_error}")
+            return True
+
+        return self._enqueue(event)
+
+    def _count(self, name, n=1):
+        with self._count_lock:
+            setattr(self, name, getattr(self, name) + n)
+
+    def _enqueue(self, event):
+        try:
+            if self.overflow_policy == "block":
+                self._queue.put(event, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(event)
+        except queue.Full:
+            if self.overflow_policy != "drop_oldest":
+                self._count("dropped")
+                return False
+            try:
+                self._queue.get_nowait()
+                self._count("dropped")
+            except queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait(event)
+            except queue.Full:
+                self._count("dropped")
+                return False
+        self._count("enqueued")
+        return True
+
+    # ------------------------------
+    # Wątek zapisujący
+    # ------------------------------
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect_batch()
+            if batch:
+                self._flush_batch(batch)
+        # Dopisz to, co zostało w kolejce
+        self.flush()
+
+    def _collect_batch(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._stop.is_set():
+                break
+            try:
+                event = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if event is _WAKE:
+                break
+            batch.append(event)
+        return batch
+
+    def _drain(self):
+        batch = []
+        while True:
+            try:
+                event = self._queue.get_nowait()
+            except queue.Empty:
+                return batch
+            if event is not _WAKE:
+                batch.append(event)
+
+    def _flush_batch(self, batch):
+        with self._app.app_context():
+            try:
+                with metrics.ACCESS_LOG_FLUSH.time():
+                    self._write(batch, db.session)
+                metrics.ACCESS_LOG_BATCH.observe(len(batch))
+                self._count("flushes")
+            except Exception as e:
+                print(f"[WARNING] Failed to write {len(batch)} access logs, retrying one by one: {e}")
+                self._write_rows(batch, db.session)
+            finally:
+                db.session.remove()
+
+    def _write_rows(self, events, session):
+        """Zapis pojedynczo - jeden błędny wiersz nie zabiera reszty paczki."""
+        for event in events:
+            try:
+                self._write([event], session)
+            except Exception as e:
+                self._count("failed")
+                print(f"[WARNING] Failed to write access log {event}: {e}")
+
+    def _write(self, events, session):
+        try:
+            session.add_all([AccessLog(**event) for event in events])
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        self._count("written", len(events))
+
+    def flush(self):
+        """Zapisuje wszystko, co czeka w kolejce (synchronicznie)."""
+        if self._queue is None:
+            return
+        while True:
+            batch = self._drain()
+            if not batch:
+                return
+            for start in range(0, len(batch), self.batch_size):
+                self._flush_batch(batch[start:start + self.batch_size])
+
+    def shutdown(self, timeout=5.0):
+        """Zatrzymuje wątek i dopisuje kolejkę do bazy."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        try:
+            self._queue.put_nowait(_WAKE)
+        except queue.Full:
+            pass  # pełna kolejka - wątek i tak nie czeka
+        thread.join(timeout)
+        self._thread = None
+
+    def stats(self):
+        return {
+            "running": self.running,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "overflow_policy": self.overflow_policy,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "flushes": self.flushes,
+        }
+
+
+# Jeden writer na proces serwera (startuje leniwie przy pierwszym zdarzeniu)
+access_log_writer = AccessLogWriter()
+atexit.register(access_log_writer.shutdown)
@@ -0,0 +1,85 @@
+import struct
+import numpy as np
+
+# Format bloba face_credential.face_encoding (wersja 1):
+#
+#   magic "FE" | wersja (u8) | typ danych (u8) | wymiar (u16) | wersja modelu (u16) | dane
+#
+# Dla int8 po nagłówku jest jeszcze skala (float32): wektor ~= int8 * skala.
+# Blob bez nagłówka to stary format - surowe float64.tobytes() (1024 B dla 128-d).
+MAGIC = b"FE"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<2sBBHH")
+SCALE = struct.Struct("<f")
+
+# Model dlib_face_recognition_resnet_model_v1 (face_recognition_models)
+MODEL_VERSION = 1
+
+DTYPE_CODES = {"float64": 1, "float32": 2, "int8": 3}
+CODE_DTYPES = {code: name for name, code in DTYPE_CODES.items()}
+DEFAULT_DTYPE = "float32"
+
+
+def quantize_int8(vector):
+    """Symetryczna kwantyzacja do int8: zwraca (wartości int8, skala float32)."""
+    vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+    peak = float(np.max(np.abs(vector))) if vector.size else 0.0
+    scale = np.float32(peak / 127.0 if peak > 0 else 1.0)
+    values = np.clip(np.rint(vector / scale), -127, 127).astype(np.int8)
+    return values, scale
+
+
+def dequantize_int8(values, scale):
+    return values.astype(np.float32) * np.float32(scale)
+
+
+def pack(encoding, dtype=DEFAULT_DTYPE, model_version=MODEL_VERSION):
+    """Wektor -> blob z nagłówkiem (float32 domyślnie, float64 albo int8)."""
+    if dtype not in DTYPE_CODES:
+        raise ValueError(f"Unsupported encoding dtype: {dtype}")
+    vector = np.asarray(encoding).reshape(-1)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, DTYPE_CODES[dtype], vector.shape[0], model_version)
+    if dtype == "int8":
+        values, scale = quantize_int8(vector)
+        return header + SCALE.pack(scale) + values.tobytes()
+    return header + vector.astype(dtype).tobytes()
+
+
+def parse_header(blob):
+    """
+    Zwraca (typ danych, wymiar, wersja modelu, offset danych)
+    albo None, gdy blob jest w starym formacie bez nagłówka.
+    """
+    if len(blob) < HEADER.size or bytes(blob[:2]) != MAGIC:
+        return None
+    magic, version, code, dim, model_version = HEADER.unpack_from(blob)
+    if version != FORMAT_VERSION or code not in CODE_DTYPES:
+        return None
+    dtype = CODE_DTYPES[code]
+    offset = HEADER.size + (SCALE.size if dtype == "int8" else 0)
+    # Nagłówek musi zgadzać się z długością - inaczej to przypadkowe "FE" w starym blobie
+    if len(blob) != offset + dim * np.dtype(dtype).itemsize:
+        return None
+    return dtype, dim, model_version, offset
+
+
+def unpack(blob):
+    """
+    Blob -> wektor numpy (float32 dla nowego formatu, float64 dla starego).
+    Rzuca ValueError przy uszkodzonym blobie.
+    """
+    header = parse_header(blob)
+    if header is None:
+        if len(blob) % np.dtype(np.float64).itemsize != 0:
+            raise ValueError(f"Invalid encoding blob size: {len(blob)} bytes")
+        return np.frombuffer(blob, dtype=np.float64)
+
+    dtype, dim, _, offset = header
+    if dtype == "int8":
+        (scale,) = SCALE.unpack_from(blob, HEADER.size)
+        return dequantize_int8(np.frombuffer(blob, dtype=np.int8, offset=offset), scale)
+    return np.frombuffer(blob, dtype=dtype, offset=offset)
+
+
+def is_legacy(blob):
+    return parse_header(blob) is None
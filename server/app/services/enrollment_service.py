@@ -0,0 +1,155 @@
+import json
+import numpy as np
+from sqlalchemy import insert
+from app.utils.db import db
+from app.models.employee import Employee
+from app.models.employee_face import FaceCredential
+from app.models.qr_code import QRCredential
+from app.services.face_service import FaceServices
+from app.services.qr_service import QRService
+from app.services.face_pool import face_pool
+from app.services.face_index import face_index
+from app.services.face_cache import face_encoding_cache
+from app.services import access_events, stats_rollup
+from app.utils.helpers import allocate_employee_ids
+
+REQUIRED_FIELDS = ("first_name", "last_name", "email", "image")
+
+
+class EnrollmentService:
+    """Rejestracja wsadowa: wiele osób na request, zapis paczkami (chunk)."""
+
+    @staticmethod
+    def iter_ndjson(stream):
+        """Czyta strumień NDJSON linia po linii (bez wczytywania całego body)."""
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+
+    @staticmethod
+    def iter_chunks(items, chunk_size):
+        chunk = []
+        for item in items:
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    @staticmethod
+    def enroll_chunk(items, start_index, seen_emails):
+        """
+        Rejestruje jedną paczkę osób w jednej transakcji.
+        Zwraca listę wyników per pozycja: {"index", "status", ...}.
+        """
+        report = {}
+        valid = []  # (index, item, image_bytes)
+
+        # 1. Walidacja pól i dekodowanie obrazów
+        for offset, item in enumerate(items):
+            index = start_index + offset
+            if not isinstance(item, dict):
+                report[index] = {"index": index, "status": "error", "error": "Invalid item"}
+                continue
+            if any(not item.get(field) for field in REQUIRED_FIELDS):
+                report[index] = {"index": index, "status": "error", "error": "Missing required fields"}
+                continue
+            if item["email"] in seen_emails:
+                report[index] = {"index": index, "status": "error", "error": "Email already exists"}
+                continue
+            image_bytes = FaceServices.base64_to_bytes(item["image"])
+            if image_bytes is None:
+                report[index] = {"index": index, "status": "error", "error": "Invalid Base64 image"}
+                continue
+            valid.append((index, item, image_bytes))
+
+        # 2. E-maile już zajęte w bazie - jedno zapytanie na paczkę
+        emails = [item["email"] for _, item, _ in valid]
+        taken = {
+            email for (email,) in
+            db.session.query(Employee.email).filter(Employee.email.in_(emails)).all()
+        } if emails else set()
+
+        candidates = []
+        for index, item, image_bytes in valid:
+            if item["email"] in taken:
+                report[index] = {"index": index, "status": "error", "error": "Email already exists"}
+            else:
+                candidates.append((index, item, image_bytes))
+
+        # 3. Encoding twarzy równolegle w puli procesów
+        encodings = face_pool.encode_many([image for _, _, image in candidates], profile="enroll")
+
+        # E-mail jest zajęty dopiero przez przyjętą pozycję - poprawiona linia z tym samym
+        # adresem po nieudanym zdjęciu nie jest duplikatem
+        ready = []
+        accepted = set()
+        for (index, item, _), encoding in zip(candidates, encodings):
+            if isinstance(encoding, Exception):
+                report[index] = {"index": index, "status": "error", "error": f"Image error: {encoding}"}
+            elif encoding is None:
+                report[index] = {"index": index, "status": "error", "error": "No face detected"}
+            elif item["email"] in accepted:
+                report[index] = {"index": index, "status": "error", "error": "Email already exists"}
+            else:
+                accepted.add(item["email"])
+                ready.append((index, item, encoding))
+
+        # 4. Bulk insert trzech tabel w jednej transakcji
+        if ready:
+            ids = allocate_employee_ids(len(ready))
+            employees, faces, qrs = [], [], []
+            for employee_id, (index, item, encoding) in zip(ids, ready):
+                qr_code_data, expires_at = QRService.generate_credential()
+                employees.append({
+                    "id": employee_id,
+                    "first_name": item["first_name"],
+                    "last_name": item["last_name"],
+                    "email": item["email"],
+                })
+                faces.append({
+                    "employee_id": employee_id,
+                    "face_encoding": FaceServices.encoding_to_bytes(encoding),
+                    "face_image_path": "memory",
+                })
+                qrs.append({
+                    "employee_id": employee_id,
+                    "qr_code_data": qr_code_data,
+                    "expires_at": expires_at,
+                    "is_active": True,
+                })
+                report[index] = {
+                    "index": index,
+                    "status": "created",
+                    "employee_id": employee_id,
+                    "qr_code": qr_code_data,
+                }
+
+            try:
+                db.session.execute(insert(Employee), employees)
+                template_ids = db.session.execute(
+                    insert(FaceCredential).returning(FaceCredential.id, sort_by_parameter_order=True), faces
+                ).scalars().all()
+                db.session.execute(insert(QRCredential), qrs)
+                # Insert przez Core omija after_flush - licznik pracowników w tej samej transakcji
+                stats_rollup.adjust_counter(db.session.connection(), "employees", len(employees))
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                for index, _, _ in ready:
+                    report[index] = {"index": index, "status": "error", "error": str(e)}
+            else:
+                seen_emails.update(accepted)
+                for employee_id, template_id, (_, _, encoding) in zip(ids, template_ids, ready):
+                    face_index.add(employee_id, encoding, template_id=template_id)
+                    face_encoding_cache.put(employee_id, np.atleast_2d(encoding))
+                # Insert przez Core omija zdarzenia ORM - przyrost liczby pracowników ręcznie
+                access_events.publish([], employees_delta=len(employees))
+
+        return [report[index] for index in sorted(report)]
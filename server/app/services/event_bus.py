@@ -0,0 +1,157 @@
+import json
+import threading
+import time
+from collections import deque
+
+
+class EventBusFull(Exception):
+    """Limit subskrybentów osiągnięty - endpoint odpowiada 503."""
+
+
+class Subscription:
+    """
+    Bufor zdarzeń jednego klienta (ograniczony - wolny klient nie zatrzymuje publikacji).
+    Gdy bufor się przepełni, najstarsze zdarzenia wypadają, a klient dostaje
+    "resync" - sygnał, żeby pobrał stan od nowa (/logs, /stats).
+    """
+
+    def __init__(self, maxsize):
+        self._events = deque()
+        self._maxsize = maxsize
+        self._cond = threading.Condition()
+        self.resync = False
+        self.dropped = 0
+        self.closed = False
+
+    def push(self, encoded):
+        with self._cond:
+            if len(self._events) >= self._maxsize:
+                self._events.popleft()
+                self.dropped += 1
+                self.resync = True
+            self._events.append(encoded)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """
+        Czeka na zdarzenia; zwraca (resync, lista zakodowanych zdarzeń).
+        Pusta lista = timeout (czas na keep-alive).
+        """
+        with self._cond:
+            if not self._events and not self.resync and not self.closed:
+                self._cond.wait(timeout)
+            events = list(self._events)
+            self._events.clear()
+            resync, self.resync = self.resync, False
+            return resync, events
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify()
+
+
+class EventBus:
+    """
+    Szyna zdarzeń w pamięci procesu dla podglądu na żywo (/api/admin/events, SSE).
+
+    publish() koduje zdarzenie do formatu SSE raz i dokłada je do bufora każdego
+    subskrybenta oraz do bufora historii (ring buffer). Klient, który wraca po
+    zerwaniu połączenia z Last-Event-ID, dostaje brakujące zdarzenia z historii;
+    gdy są starsze niż historia albo pochodzą z poprzedniego procesu - "resync".
+
+    Identyfikator zdarzenia to "<epoka procesu>-<numer>", więc ID sprzed restartu
+    nie pomyli się z nowymi. Zdarzenia z innych procesów serwera (np. kilku workerów
+    gunicorna) tu nie trafiają.
+    """
+
+    def __init__(self, history_size=1000, client_buffer=256, max_subscribers=100):
+        self._lock = threading.Lock()
+        self._history = deque(maxlen=history_size)
+        self._subscribers = set()
+        self._epoch = format(int(time.time() * 1000), "x")
+        self._seq = 0
+        self.client_buffer = client_buffer
+        self.max_subscribers = max_subscribers
+        self.published = 0
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def configure(self, history_size=1000, client_buffer=256, max_subscribers=100):
+        with self._lock:
+            self._history = deque(self._history, maxlen=history_size)
+            self.client_buffer = client_buffer
+            self.max_subscribers = max_subscribers
+
+    @staticmethod
+    def encode(event_id, event_type, data):
+        payload = json.dumps(data, separators=(",", ":"), default=str)
+        return f"id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n"
+
+    def publish(self, event_type, data):
+        """Wysyła zdarzenie do wszystkich subskrybentów; zwraca jego ID."""
+        with self._lock:
+            self._seq += 1
+            event_id = f"{self._epoch}-{self._seq}"
+            encoded = self.encode(event_id, event_type, data)
+            self._history.append((self._seq, encoded))
+            subscribers = list(self._subscribers)
+            self.published += 1
+        for subscription in subscribers:
+            subscription.push(encoded)
+        return event_id
+
+    def subscribe(self, last_event_id=None):
+        """
+        Nowy subskrybent. last_event_id: ostatnie zdarzenie, które klient widział -
+        zaległe zdarzenia z historii trafiają od razu do jego bufora.
+        Rzuca EventBusFull przy max_subscribers.
+        """
+        subscription = Subscription(self.client_buffer)
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                raise EventBusFull("Too many event stream subscribers")
+            if last_event_id:
+                self._replay(subscription, last_event_id)
+            self._subscribers.add(subscription)
+        return subscription
+
+    def _replay(self, subscription, last_event_id):
+        epoch, _, seq = str(last_event_id).partition("-")
+        oldest = self._history[0][0] if self._history else self._seq + 1
+        if epoch != self._epoch or not seq.isdigit() or int(seq) + 1 < oldest:
+            subscription.resync = True
+            return
+        for event_seq, encoded in self._history:
+            if event_seq > int(seq):
+                subscription.push(encoded)
+
+    def unsubscribe(self, subscription):
+        subscription.close()
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def clear(self):
+        """Odłącza subskrybentów i czyści historię (testy, restart aplikacji)."""
+        with self._lock:
+            subscribers, self._subscribers = self._subscribers, set()
+            self._history.clear()
+        for subscription in subscribers:
+            subscription.close()
+
+    def stats(self):
+        with self._lock:
+            subscribers = list(self._subscribers)
+            history = len(self._history)
+        return {
+            "subscribers": len(subscribers),
+            "published": self.published,
+            "history": history,
+            "dropped": sum(subscription.dropped for subscription in subscribers),
+        }
+
+
+# Jedna szyna na proces serwera; rozmiary nadpisywane w create_app() z konfiguracji
+event_bus = EventBus()
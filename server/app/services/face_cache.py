@@ -0,0 +1,24 @@
+import numpy as np
+from app.utils.db import db
+from app.utils.cache import LRUCache
+from app.models.employee_face import FaceCredential
+from app.services.face_service import FaceServices
+
+
+# Zdekodowane wzorce twarzy (employee_id -> macierz k x 128, jeden wiersz na wzorzec).
+# Rozmiar i TTL nadpisywane w create_app() z konfiguracji.
+face_encoding_cache = LRUCache(maxsize=10000, ttl=3600)
+
+
+def load_face_encoding(employee_id):
+    """Czyta wszystkie wzorce pracownika z bazy i składa je w macierz; None gdy nie ma żadnego."""
+    blobs = db.session.query(FaceCredential.face_encoding).filter_by(
+        employee_id=employee_id).order_by(FaceCredential.id).all()
+    if not blobs:
+        return None
+    return np.vstack([FaceServices.bytes_to_encoding(blob) for (blob,) in blobs])
+
+
+def get_face_encoding(employee_id):
+    """Wzorce twarzy z cache (przy chybieniu - z bazy)."""
+    return face_encoding_cache.get_or_load(employee_id, load_face_encoding)
@@ -0,0 +1,165 @@
+import os
+import threading
+import numpy as np
+
+# Kaskady OpenCV dla detektorów "haar" / "lbp". Pakiet opencv-python (4.x) ma
+# kaskady Haara w cv2.data.haarcascades; kaskady LBP trzeba dograć (FACE_CASCADE_DIR).
+CASCADE_FILES = {
+    "haar": "haarcascade_frontalface_default.xml",
+    "lbp": "lbpcascade_frontalface_improved.xml",
+}
+DEFAULT_DETECTOR = "dlib"
+DETECTORS = (DEFAULT_DETECTOR,) + tuple(CASCADE_FILES)
+
+
+class DetectorUnavailable(Exception):
+    """Backend detekcji niedostępny (brak cv2, CascadeClassifier albo pliku kaskady)."""
+
+
+class FaceDetector:
+    """
+    Wspólny interfejs detektorów twarzy.
+
+    detect(image, profile) zwraca ramki (top, right, bottom, left) we współrzędnych
+    przekazanego obrazu - w formacie face_recognition, więc trafiają prosto do
+    face_recognition.face_encodings.
+    """
+
+    name = None
+
+    def detect(self, image, profile):
+        raise NotImplementedError
+
+
+class DlibHogDetector(FaceDetector):
+    """Dotychczasowa detekcja: face_recognition.face_locations (HOG albo CNN wg profile["model"])."""
+
+    name = "dlib"
+
+    def detect(self, image, profile):
+        import face_recognition
+        return face_recognition.face_locations(
+            image,
+            number_of_times_to_upsample=profile.get("upsample", 1),
+            model=profile.get("model", "hog")
+        )
+
+
+class OpenCVCascadeDetector(FaceDetector):
+    """
+    Kaskada Haara / LBP z OpenCV - bez pobierania modeli, wielokrotnie szybsza niż HOG,
+    ale gubi twarze mocno obrócone. CascadeClassifier nie jest bezpieczny wątkowo,
+    więc wywołania idą pod lockiem (pula procesów i tak ma jeden detektor na proces).
+    """
+
+    def __init__(self, name, cascade_dir=None, scale_factor=1.1, min_neighbors=5, min_size=40):
+        try:
+            import cv2
+        except ImportError:
+            raise DetectorUnavailable("opencv-python is not installed")
+        if not hasattr(cv2, "CascadeClassifier"):
+            # OpenCV 5 przeniósł kaskady do opencv-contrib
+            raise DetectorUnavailable(f"cv2 {cv2.__version__} has no CascadeClassifier (use opencv-python<5)")
+
+        path = self._find_cascade(cv2, CASCADE_FILES[name], cascade_dir)
+        cascade = cv2.CascadeClassifier(path)
+        if cascade.empty():
+            raise DetectorUnavailable(f"Cannot load cascade {path}")
+
+        self.name = name
+        self.path = path
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = min_size
+        self._cv2 = cv2
+        self._cascade = cascade
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _find_cascade(cv2, filename, cascade_dir):
+        bundled = getattr(getattr(cv2, "data", None), "haarcascades", "")
+        candidates = [cascade_dir, bundled, os.path.join(bundled, os.pardir, "lbpcascades")]
+        for directory in candidates:
+            if directory and os.path.exists(os.path.join(directory, filename)):
+                return os.path.join(directory, filename)
+        raise DetectorUnavailable(f"Cascade file {filename} not found (set FACE_CASCADE_DIR)")
+
+    def detect(self, image, profile):
+        gray = image if image.ndim == 2 else self._cv2.cvtColor(image, self._cv2.COLOR_RGB2GRAY)
+        if gray.dtype != np.uint8:
+            gray = gray.astype(np.uint8)
+        min_size = profile.get("min_face_size", self.min_size)
+        with self._lock:
+            boxes = self._cascade.detectMultiScale(
+                gray, scaleFactor=self.scale_factor, minNeighbors=self.min_neighbors,
+                minSize=(min_size, min_size)
+            )
+        # Największa twarz pierwsza - dlib zwraca kolejność bez gwarancji, encoding bierze [0]
+        boxes = sorted((tuple(int(v) for v in box) for box in boxes), key=lambda box: -box[2] * box[3])
+        return [(y, x + w, y + h, x) for x, y, w, h in boxes]
+
+
+_detectors = {}
+_detectors_lock = threading.Lock()
+
+
+def get_detector(name=None, cascade_dir=None):
+    """
+    Detektor o danej nazwie ("dlib", "haar", "lbp"), tworzony raz na proces.
+    Rzuca DetectorUnavailable / ValueError.
+    """
+    name = name or DEFAULT_DETECTOR
+    key = (name, cascade_dir)
+    detector = _detectors.get(key)
+    if detector is not None:
+        return detector
+    with _detectors_lock:
+        if key not in _detectors:
+            if name == "dlib":
+                _detectors[key] = DlibHogDetector()
+            elif name in CASCADE_FILES:
+                _detectors[key] = OpenCVCascadeDetector(name, cascade_dir=cascade_dir)
+            else:
+                raise ValueError(f"Unknown face detector: {name}")
+        return _detectors[key]
+
+
+def resolve_detector(name=None, cascade_dir=None):
+    """Jak get_detector, ale niedostępny backend OpenCV zastępuje dlib (z ostrzeżeniem, raz)."""
+    fallback_key = ("fallback", name, cascade_dir)
+    fallback = _detectors.get(fallback_key)
+    if fallback is not None:
+        return fallback
+    try:
+        return get_detector(name, cascade_dir)
+    except DetectorUnavailable as e:
+        print(f"[FaceDetector] '{name}' unavailable ({e}), using dlib")
+        fallback = _detectors[fallback_key] = get_detector("dlib")
+        return fallback
+
+
+def validate_config(config):
+    """
+    Sprawdza nazwy detektorów z konfiguracji (FACE_DETECTOR i "detector" w FACE_PROFILES).
+    Rzuca ValueError przy nieznanej nazwie - literówka zatrzymuje start aplikacji,
+    zamiast kończyć każdy request z twarzą błędem 500.
+    """
+    configured = [("FACE_DETECTOR", config.get("FACE_DETECTOR"))]
+    for profile, overrides in (config.get("FACE_PROFILES") or {}).items():
+        if "detector" in overrides:
+            configured.append((f'FACE_PROFILES["{profile}"]["detector"]', overrides["detector"]))
+    for key, name in configured:
+        if (name or DEFAULT_DETECTOR) not in DETECTORS:
+            raise ValueError(f"Unknown face detector in {key}: {name!r} (expected one of {', '.join(DETECTORS)})")
+
+
+def available_detectors(cascade_dir=None):
+    """Nazwa -> None (działa) albo opis, czemu backend jest niedostępny."""
+    status = {}
+    for name in DETECTORS:
+        try:
+            get_detector(name, cascade_dir)
+            status[name] = None
+        except DetectorUnavailable as e:
+            status[name] = str(e)
+    return status
@@ -0,0 +1,250 @@
+import threading
+import numpy as np
+from app.utils.db import db
+from app.models.employee_face import FaceCredential
+from app.services.face_service import FaceServices
+from app.services.encoding_format import quantize_int8, dequantize_int8
+
+
+class FaceIndex:
+    """
+    Indeks wszystkich wzorców twarzy trzymany w pamięci procesu (1:N).
+
+    Wzorce leżą w jednej ciągłej macierzy (N x 128), więc identyfikacja
+    to jedno mnożenie macierz-wektor zamiast skanu tabeli face_credential:
+        ||x - q||^2 = ||x||^2 - 2 * x.q + ||q||^2
+    Normy wierszy liczymy raz przy dodaniu wzorca.
+
+    Pracownik może mieć kilka wzorców (wiersz = jeden rekord face_credential,
+    klucz (employee_id, template_id)); najbliższy wiersz wyznacza osobę,
+    więc min po wzorcach danej osoby wychodzi z tego samego mnożenia.
+
+    Domyślnie float32 (połowa pamięci float64, wynik identyczny w granicach
+    tolerancji). quantize=True trzyma wiersze jako int8 + skala na wiersz
+    (~1/8 pamięci float64); mnożenie idzie blokami po BLOCK_ROWS wierszy.
+    """
+
+    BLOCK_ROWS = 65536
+
+    def __init__(self, dim=128, dtype=np.float32, initial_capacity=1024, quantize=False):
+        self._lock = threading.RLock()
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.quantize = quantize
+        self._initial_capacity = initial_capacity
+        self._reset()
+
+    def configure(self, dtype=None, quantize=None):
+        """Zmienia reprezentację wierszy (czyści indeks - wywołaj przed load)."""
+        with self._lock:
+            if dtype is not None:
+                self.dtype = np.dtype(dtype)
+            if quantize is not None:
+                self.quantize = quantize
+            self._reset()
+
+    def _reset(self, capacity=None):
+        capacity = max(capacity or self._initial_capacity, 1)
+        if self.quantize:
+            self._matrix = np.empty((capacity, self.dim), dtype=np.int8)
+            self._scales = np.empty(capacity, dtype=np.float32)
+            self._sq_norms = np.empty(capacity, dtype=np.float32)
+        else:
+            self._matrix = np.empty((capacity, self.dim), dtype=self.dtype)
+            self._scales = None
+            self._sq_norms = np.empty(capacity, dtype=self.dtype)
+        self._ids = np.empty(capacity, dtype=np.int64)  # employee_id każdego wiersza
+        self._keys = [None] * capacity                   # (employee_id, template_id) każdego wiersza
+        self._rows = {}                                  # (employee_id, template_id) -> numer wiersza
+        self._by_employee = {}                           # employee_id -> set(kluczy)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, employee_id):
+        return employee_id in self._by_employee
+
+    def template_count(self, employee_id):
+        return len(self._by_employee.get(employee_id, ()))
+
+    def memory_bytes(self):
+        """Pamięć zajęta przez wypełnione wiersze (macierz, normy, skale, ID)."""
+        arrays = [self._matrix, self._sq_norms, self._ids]
+        if self._scales is not None:
+            arrays.append(self._scales)
+        return sum(array[:self._size].nbytes for array in arrays)
+
+    # ------------------------------
+    # Ładowanie i synchronizacja
+    # ------------------------------
+    def load(self, items):
+        """
+        Przebudowuje indeks z iterowalnej kolekcji
+        (employee_id, encoding) albo (employee_id, encoding, template_id).
+        """
+        items = list(items)
+        with self._lock:
+            self._reset(len(items))
+            for item in items:
+                self._put(*item)
+        return self._size
+
+    def load_from_db(self, batch_size=1000):
+        """Wczytuje wszystkie wzorce z tabeli face_credential (raz, przy starcie)."""
+        query = db.session.query(
+            FaceCredential.employee_id, FaceCredential.face_encoding, FaceCredential.id
+        ).order_by(FaceCredential.id)
+
+        items = []
+        for employee_id, blob, template_id in query.yield_per(batch_size):
+            try:
+                items.append((employee_id, FaceServices.bytes_to_encoding(blob), template_id))
+            except ValueError as e:
+                print(f"[FaceIndex] Skipping template {template_id} of employee {employee_id}: {e}")
+        return self.load(items)
+
+    def add(self, employee_id, encoding, template_id=None):
+        """Dodaje lub podmienia wzorzec (template_id=None - jedyny wzorzec pracownika)."""
+        with self._lock:
+            self._put(employee_id, encoding, template_id)
+
+    def remove(self, employee_id):
+        """Usuwa wszystkie wzorce pracownika."""
+        with self._lock:
+            keys = self._by_employee.pop(employee_id, None)
+            if not keys:
+                return False
+            for key in keys:
+                self._remove_row(self._rows.pop(key))
+            return True
+
+    def remove_template(self, employee_id, template_id):
+        """Usuwa jeden wzorzec pracownika."""
+        with self._lock:
+            key = (employee_id, template_id)
+            row = self._rows.pop(key, None)
+            if row is None:
+                return False
+            keys = self._by_employee[employee_id]
+            keys.discard(key)
+            if not keys:
+                del self._by_employee[employee_id]
+            self._remove_row(row)
+            return True
+
+    def _remove_row(self, row):
+        """Ostatni wiersz wskakuje na miejsce usuniętego."""
+        last = self._size - 1
+        if row != last:
+            self._matrix[row] = self._matrix[last]
+            self._sq_norms[row] = self._sq_norms[last]
+            if self._scales is not None:
+                self._scales[row] = self._scales[last]
+            self._ids[row] = self._ids[last]
+            self._keys[row] = self._keys[last]
+            self._rows[self._keys[row]] = row
+        self._keys[last] = None
+        self._size = last
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    def _put(self, employee_id, encoding, template_id=None):
+        vector = np.asarray(encoding, dtype=np.float32 if self.quantize else self.dtype).reshape(-1)
+        if vector.shape[0] != self.dim:
+            raise ValueError(f"Expected {self.dim}-d encoding, got {vector.shape[0]}")
+
+        key = (employee_id, template_id)
+        row = self._rows.get(key)
+        if row is None:
+            if self._size == self._matrix.shape[0]:
+                self._grow()
+            row = self._size
+            self._size += 1
+            self._rows[key] = row
+            self._keys[row] = key
+            self._ids[row] = employee_id
+            self._by_employee.setdefault(employee_id, set()).add(key)
+
+        if self.quantize:
+            values, scale = quantize_int8(vector)
+            self._matrix[row] = values
+            self._scales[row] = scale
+            # Norma z wartości po kwantyzacji - spójna z iloczynem w distances()
+            vector = dequantize_int8(values, scale)
+        else:
+            self._matrix[row] = vector
+        self._sq_norms[row] = vector @ vector
+
+    def _grow(self):
+        capacity = self._matrix.shape[0] * 2
+        for name in ("_matrix", "_sq_norms", "_ids", "_scales"):
+            old = getattr(self, name)
+            if old is None:
+                continue
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+        self._keys.extend([None] * (capacity - len(self._keys)))
+
+    # ------------------------------
+    # Wyszukiwanie
+    # ------------------------------
+    def distances(self, encoding):
+        """Zwraca (employee_id każdego wiersza, odległości euklidesowe) dla wszystkich wzorców."""
+        query = np.asarray(encoding, dtype=np.float32 if self.quantize else self.dtype).reshape(-1)
+        with self._lock:
+            n = self._size
+            sq = self._sq_norms[:n] - 2.0 * self._dots(query, n) + query @ query
+            ids = self._ids[:n].copy()
+        # Błędy zaokrągleń potrafią dać minimalnie ujemne wartości
+        return ids, np.sqrt(np.maximum(sq, 0.0))
+
+    def _dots(self, query, n):
+        """Iloczyny skalarne wszystkich wierszy z zapytaniem."""
+        if not self.quantize:
+            return self._matrix[:n] @ query
+        # int8 -> float32 blokami, żeby nie rozpakowywać całej macierzy naraz
+        dots = np.empty(n, dtype=np.float32)
+        for start in range(0, n, self.BLOCK_ROWS):
+            end = min(start + self.BLOCK_ROWS, n)
+            dots[start:end] = (self._matrix[start:end].astype(np.float32) @ query) * self._scales[start:end]
+        return dots
+
+    def _row(self, row):
+        """Wiersz macierzy jako float64 (po dekwantyzacji)."""
+        if self.quantize:
+            return dequantize_int8(self._matrix[row], self._scales[row]).astype(np.float64)
+        return self._matrix[row].astype(np.float64)
+
+    def identify(self, encoding, tolerance=0.6, rerank=8):
+        """
+        Znajduje najbliższy wzorzec.
+        Zwraca (employee_id, distance); employee_id = None gdy brak dopasowania.
+
+        Wzór z normami w float32/int8 traci precyzję przy małych odległościach,
+        więc `rerank` najlepszych kandydatów liczymy jeszcze raz wprost w float64.
+        """
+        query = np.asarray(encoding, dtype=np.float64).reshape(-1)
+        with self._lock:
+            n = self._size
+            if n == 0:
+                return None, None
+            stored_query = query.astype(np.float32 if self.quantize else self.dtype)
+            approx = self._sq_norms[:n] - 2.0 * self._dots(stored_query, n) + stored_query @ stored_query
+
+            k = min(rerank, n)
+            candidates = np.argpartition(approx, k - 1)[:k] if k < n else np.arange(n)
+            exact = [np.linalg.norm(self._row(row) - query) for row in candidates]
+            best = int(np.argmin(exact))
+            employee_id, distance = int(self._ids[candidates[best]]), float(exact[best])
+
+        if distance > tolerance:
+            return None, distance
+        return employee_id, distance
+
+
+# Jedna instancja na proces - ładowana w create_app()
+face_index = FaceIndex()
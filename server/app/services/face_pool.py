@@ -0,0 +1,228 @@
+import io
+import time
+import atexit
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from flask import current_app
+from app.services.face_service import FaceServices
+from app.services.face_tracking import get_hint, update_session
+from app.utils import metrics
+
+
+class FacePoolBusy(Exception):
+    """Kolejka zadań pełna - endpoint odpowiada 503."""
+
+
+class FacePoolTimeout(Exception):
+    """Zadanie nie skończyło się w limicie czasu."""
+
+
+def _init_worker():
+    # Import ładuje modele dlib raz na proces, a nie przy pierwszym zadaniu
+    import face_recognition  # noqa: F401
+
+
+def _encode_job(image_bytes, profile, hint=None):
+    # Czasy etapów i ramka twarzy wracają razem z wynikiem - proces roboczy
+    # nie eksportuje metryk ani nie widzi sesji śledzenia
+    timings = {}
+    track = {"box": hint}
+    encoding = FaceServices.get_encoding_from_image(
+        io.BytesIO(image_bytes), profile=profile, timings=timings, track=track)
+    return encoding, timings, track["box"]
+
+
+class FaceWorkerPool:
+    """
+    Pula procesów liczących encoding twarzy poza wątkami Flaska.
+
+    - workers: liczba procesów z załadowanym face_recognition
+    - queue_size: ile zadań może czekać poza tymi w trakcie liczenia;
+      po przekroczeniu encode() rzuca FacePoolBusy (backpressure)
+    - timeout: limit oczekiwania na wynik jednego zadania (sekundy)
+
+    Pula startuje leniwie przy pierwszym zadaniu. Gdy FACE_POOL_WORKERS = 0
+    albo aplikacja jest w trybie TESTING, encoding liczony jest w wątku
+    requestu (jak wcześniej).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+        self.workers = 0
+        self.queue_size = 0
+        self.timeout = None
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self._in_flight = 0
+
+    @property
+    def running(self):
+        return self._executor is not None
+
+    def start(self, workers, queue_size=8, timeout=10.0):
+        with self._lock:
+            if self._executor is not None:
+                return
+            self.workers = workers
+            self.queue_size = queue_size
+            self.timeout = timeout
+            self._slots = threading.BoundedSemaphore(workers + queue_size)
+            # spawn: bez dziedziczenia wątków schedulera i stanu dlib po fork()
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker
+            )
+            print(f"[FacePool] Started {workers} workers (queue: {queue_size}, timeout: {timeout}s)")
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _ensure_started(self):
+        if self._executor is not None:
+            return True
+        config = current_app.config
+        workers = config.get("FACE_POOL_WORKERS", 0)
+        if config.get("TESTING") or workers <= 0:
+            return False
+        self.start(
+            workers,
+            queue_size=config.get("FACE_POOL_QUEUE_SIZE", 8),
+            timeout=config.get("FACE_POOL_TIMEOUT", 10.0)
+        )
+        return True
+
+    def submit(self, image_bytes, profile="verify", hint=None):
+        """
+        Wrzuca zadanie do puli i zwraca Future z encodingiem (albo None).
+        hint: ramka twarzy z poprzedniej klatki (app/services/face_tracking.py) -
+        detekcja najpierw w jej otoczeniu. Rzuca FacePoolBusy, gdy wszystkie
+        miejsca w kolejce są zajęte.
+        """
+        if isinstance(profile, str):
+            profile = FaceServices.get_profile(profile)
+
+        submitted_at = time.perf_counter()
+        if not self._ensure_started():
+            future = Future()
+            try:
+                future.set_result(_encode_job(image_bytes, profile, hint))
+            except Exception as e:
+                future.set_exception(e)
+            future.submitted_at = submitted_at
+            return future
+
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self.rejected += 1
+            raise FacePoolBusy("Face encoding queue is full")
+
+        try:
+            future = self._executor.submit(_encode_job, image_bytes, profile, hint)
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._stats_lock:
+            self.submitted += 1
+            self._in_flight += 1
+        future.submitted_at = submitted_at
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future):
+        # Miejsce zwalniamy dopiero gdy proces faktycznie skończy (także po timeoucie)
+        with self._stats_lock:
+            self._in_flight -= 1
+            self.completed += 1
+        self._slots.release()
+
+    def result(self, future):
+        """
+        Czeka na wynik zadania z limitem czasu puli (encoding albo None).
+        Ramka znalezionej twarzy ląduje w future.location (None = brak twarzy).
+        """
+        try:
+            encoding, timings, future.location = future.result(timeout=self.timeout)
+        except FutureTimeout:
+            future.cancel()
+            with self._stats_lock:
+                self.timeouts += 1
+            raise FacePoolTimeout("Face encoding timed out")
+
+        metrics.observe_stages(timings)
+        # Reszta czasu od submit to kolejka i przesłanie obrazu do procesu
+        waited = time.perf_counter() - future.submitted_at
+        metrics.FACE_STAGE.observe(max(waited - sum(timings.values()), 0.0), stage="queue")
+        return encoding
+
+    def encode(self, image_bytes, profile="verify"):
+        """Liczy encoding w puli i czeka na wynik (None = brak twarzy)."""
+        return self.result(self.submit(image_bytes, profile))
+
+    def encode_many(self, images, profile="enroll"):
+        """
+        Wrzuca wszystkie zdjęcia do puli naraz i zbiera wyniki w kolejności wejścia:
+        encoding, None (brak twarzy) albo wyjątek z danego zadania.
+        Gdy kolejka jest pełna, czeka na najstarsze zadanie i próbuje dalej.
+        """
+        results = [None] * len(images)
+        pending = deque()
+
+        for position, image_bytes in enumerate(images):
+            while True:
+                try:
+                    pending.append((position, self.submit(image_bytes, profile=profile)))
+                    break
+                except FacePoolBusy:
+                    if not pending:
+                        raise
+                    oldest_position, oldest = pending.popleft()
+                    results[oldest_position] = self._collect(oldest)
+
+        for position, future in pending:
+            results[position] = self._collect(future)
+        return results
+
+    def _collect(self, future):
+        try:
+            return self.result(future)
+        except Exception as e:
+            return e
+
+    def encode_tracked(self, image_bytes, profile, session):
+        """
+        Jak encode, ale z sesją śledzenia kiosku (klucz z face_tracking.session_key):
+        ramka z poprzedniej klatki zawęża detekcję, ramka z tej klatki zostaje w sesji.
+        """
+        future = self.submit(image_bytes, profile, hint=get_hint(session))
+        encoding = self.result(future)
+        update_session(session, future.location)
+        return encoding
+
+    def stats(self):
+        return {
+            "running": self.running,
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "in_flight": self._in_flight,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+        }
+
+
+# Jedna pula na proces serwera (startuje leniwie przy pierwszym zadaniu)
+face_pool = FaceWorkerPool()
+atexit.register(face_pool.shutdown)
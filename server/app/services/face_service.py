@@ -1,29 +1,158 @@
 import face_recognition
 import numpy as np
 import base64  # <--- WAŻNE
-import io      # <--- WAŻNE
+import time
+from flask import current_app, has_app_context
+from PIL import Image
+from app.services import encoding_format
+from app.services.face_detectors import resolve_detector, DEFAULT_DETECTOR
+
+# Profile detekcji per endpoint. Weryfikacja ma być szybka (mały obraz),
+# rejestracja dokładniejsza (większy obraz). num_jitters mnoży czas encodingu
+# (także rejestracji wsadowej) bez zysku na zdjęciach z kamery - zob.
+# benchmarks/bench_enroll_jitters.py; można podnieść przez FACE_PROFILES.
+# Nadpisywane przez app.config["FACE_PROFILES"] = {"verify": {...}, ...}
+DEFAULT_FACE_PROFILES = {
+    "enroll":   {"max_dimension": 1024, "upsample": 1, "model": "hog", "num_jitters": 1},
+    "verify":   {"max_dimension": 480,  "upsample": 1, "model": "hog", "num_jitters": 1},
+    "identify": {"max_dimension": 480,  "upsample": 1, "model": "hog", "num_jitters": 1},
+}
 
 class FaceServices:
-    
+
     @staticmethod
-    def get_encoding_from_image(file_storage):
-        """Pobiera plik, znajduje twarz i zwraca encoding."""
-        # Wczytujemy obrazek
-        image = face_recognition.load_image_file(file_storage)
-        face_locations = face_recognition.face_locations(image)
-        
-        if len(face_locations) == 0:
-            return None 
-        
-        # Zwracamy encoding pierwszej twarzy
-        return face_recognition.face_encodings(image, face_locations)[0]
+    def get_profile(name):
+        """Zwraca profil detekcji (domyślny + nadpisania z konfiguracji aplikacji)."""
+        profile = dict(DEFAULT_FACE_PROFILES.get(name, DEFAULT_FACE_PROFILES["verify"]))
+        profile["detector"] = DEFAULT_DETECTOR
+        profile["cascade_dir"] = None
+        if has_app_context():
+            # Detektor z konfiguracji trafia do profilu - profil jedzie do procesów puli
+            profile["detector"] = current_app.config.get("FACE_DETECTOR", DEFAULT_DETECTOR)
+            profile["cascade_dir"] = current_app.config.get("FACE_CASCADE_DIR")
+            profile["roi_margin"] = current_app.config.get("FACE_TRACKING_ROI_MARGIN", 0.5)
+            profile.update(current_app.config.get("FACE_PROFILES", {}).get(name, {}))
+        return profile
+
+    @staticmethod
+    def load_image(file_storage):
+        """Dekoduje obraz do tablicy RGB (uint8)."""
+        with Image.open(file_storage) as img:
+            return np.asarray(img.convert("RGB"))
+
+    @staticmethod
+    def downscale(image, max_dimension):
+        """
+        Zmniejsza obraz tak, by dłuższy bok miał max_dimension pikseli.
+        Zwraca (obraz, skala); skala = 1.0 gdy obraz jest już mały.
+        """
+        height, width = image.shape[:2]
+        longest = max(height, width)
+        if not max_dimension or longest <= max_dimension:
+            return image, 1.0
+
+        scale = max_dimension / longest
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        small = Image.fromarray(image).resize(size, Image.BILINEAR)
+        return np.asarray(small), scale
+
+    @staticmethod
+    def scale_locations(locations, scale, shape):
+        """Przelicza ramki (top, right, bottom, left) z małego obrazu na oryginał."""
+        if scale == 1.0:
+            return list(locations)
+
+        height, width = shape[:2]
+        return [(
+            max(0, int(top / scale)),
+            min(width, int(round(right / scale))),
+            min(height, int(round(bottom / scale))),
+            max(0, int(left / scale)),
+        ) for top, right, bottom, left in locations]
+
+    @staticmethod
+    def expand_box(box, margin, shape):
+        """Ramka (top, right, bottom, left) powiększona o margin * bok z każdej strony, przycięta do obrazu."""
+        top, right, bottom, left = box
+        dy, dx = int((bottom - top) * margin), int((right - left) * margin)
+        height, width = shape[:2]
+        return max(0, top - dy), min(width, right + dx), min(height, bottom + dy), max(0, left - dx)
+
+    @staticmethod
+    def detect_in_roi(image, box, profile, detector):
+        """
+        Detekcja tylko w otoczeniu ramki z poprzedniej klatki.
+        ROI skalujemy tak, by twarz miała ~roi_face_size px, i szukamy bez upsamplingu -
+        to ułamek kosztu pełnej klatki. Zwraca ramkę na oryginale albo None (twarz zgubiona).
+        """
+        top, right, bottom, left = FaceServices.expand_box(box, profile.get("roi_margin", 0.5), image.shape)
+        face_size = max(box[2] - box[0], box[1] - box[3])
+        if bottom - top < 20 or right - left < 20 or face_size <= 0:
+            return None
+
+        roi = image[top:bottom, left:right]
+        target = profile.get("roi_face_size", 120) / face_size
+        small, scale = FaceServices.downscale(roi, int(max(roi.shape[:2]) * target) if target < 1 else None)
+        found = detector.detect(np.ascontiguousarray(small), dict(profile, upsample=0, min_face_size=40))
+        if not found:
+            return None
+        r_top, r_right, r_bottom, r_left = FaceServices.scale_locations(found[:1], scale, roi.shape)[0]
+        return r_top + top, r_right + left, r_bottom + top, r_left + left
 
     @staticmethod
-    def handle_base64_image(base64_string):
+    def get_encoding_from_image(file_storage, profile=None, timings=None, track=None):
         """
-        Zamienia string Base64 na obiekt plikopodobny.
-        To jest ta metoda, której prawdopodobnie brakuje!
+        Pobiera plik, znajduje twarz i zwraca encoding.
+
+        Detekcja idzie na pomniejszonej kopii (koszt HOG rośnie z liczbą
+        pikseli), encoding na oryginale z ramką przeliczoną z powrotem.
+        Detektor wg profile["detector"] (app/services/face_detectors.py).
+        profile: nazwa profilu ("verify", "enroll", ...) albo słownik.
+        timings: opcjonalny słownik - dostaje czasy etapów decode/detect/encode (sekundy).
+        track: opcjonalny słownik sesji śledzenia (app/services/face_tracking.py) -
+            track["box"] z poprzedniej klatki zawęża detekcję do ROI (detect_roi),
+            pełna klatka tylko gdy twarz zniknęła z ROI; po wyjściu track["box"]
+            to ramka z tej klatki (None = brak twarzy).
         """
+        if profile is None or isinstance(profile, str):
+            profile = FaceServices.get_profile(profile or "verify")
+        if timings is None:
+            timings = {}
+
+        # Wczytujemy obrazek
+        start = time.perf_counter()
+        image = FaceServices.load_image(file_storage)
+        timings["decode"] = time.perf_counter() - start
+
+        detector = resolve_detector(profile.get("detector"), profile.get("cascade_dir"))
+        location = None
+        if track and track.get("box"):
+            start = time.perf_counter()
+            location = FaceServices.detect_in_roi(image, track["box"], profile, detector)
+            timings["detect_roi"] = time.perf_counter() - start
+
+        if location is None:
+            start = time.perf_counter()
+            small, scale = FaceServices.downscale(image, profile["max_dimension"])
+            face_locations = detector.detect(small, profile)
+            if face_locations:
+                location = FaceServices.scale_locations(face_locations[:1], scale, image.shape)[0]
+            timings["detect"] = time.perf_counter() - start
+
+        if track is not None:
+            track["box"] = location
+        if location is None:
+            return None
+
+        # Zwracamy encoding pierwszej twarzy
+        start = time.perf_counter()
+        encoding = face_recognition.face_encodings(image, [location], num_jitters=profile["num_jitters"])[0]
+        timings["encode"] = time.perf_counter() - start
+        return encoding
+
+    @staticmethod
+    def base64_to_bytes(base64_string):
+        """Zamienia string Base64 (także data URL) na surowe bajty obrazu; None gdy błędny."""
         # Usuwamy nagłówek "data:image/jpeg;base64," jeśli istnieje
         if "," in base64_string:
             header, encoded = base64_string.split(",", 1)
@@ -32,18 +161,43 @@ class FaceServices:
 
         try:
             # Dekodujemy tekst na bajty
-            image_data = base64.b64decode(encoded)
-            # Zwracamy jako "plik w pamięci"
-            return io.BytesIO(image_data)
+            return base64.b64decode(encoded)
         except Exception:
             return None
 
     @staticmethod
     def encoding_to_bytes(encoding_np):
-        return encoding_np.tobytes()
+        """Wektor -> blob z nagłówkiem formatu (app/services/encoding_format.py), domyślnie float32."""
+        dtype = encoding_format.DEFAULT_DTYPE
+        if has_app_context():
+            dtype = current_app.config.get("FACE_ENCODING_DTYPE", dtype)
+        return encoding_format.pack(encoding_np, dtype=dtype)
+
+    @staticmethod
+    def bytes_to_encoding(encoding_bytes):
+        """Odwrotność encoding_to_bytes: blob z bazy -> wektor numpy (czyta też stary format float64)."""
+        return encoding_format.unpack(encoding_bytes)
+
+    @staticmethod
+    def as_templates(known_encoding):
+        """Blob / wektor / macierz wzorców -> macierz (k x 128)."""
+        if not isinstance(known_encoding, np.ndarray):
+            known_encoding = FaceServices.bytes_to_encoding(known_encoding)
+        return np.atleast_2d(known_encoding)
+
+    @staticmethod
+    def face_distance(known_encoding, unknown_encoding_np):
+        """Najmniejsza odległość do wzorców pracownika - jedna operacja na całej macierzy."""
+        templates = FaceServices.as_templates(known_encoding)
+        unknown = np.asarray(unknown_encoding_np, dtype=np.float64).reshape(-1)
+        return float(np.min(np.linalg.norm(templates - unknown, axis=1)))
 
     @staticmethod
-    def compare_faces(known_encoding_bytes, unknown_encoding_np, tolerance=0.6):
-        known_encoding = np.frombuffer(known_encoding_bytes, dtype=np.float64)
-        results = face_recognition.compare_faces([known_encoding], unknown_encoding_np, tolerance=tolerance)
-        return results[0]
\ No newline at end of file
+    def compare_faces(known_encoding, unknown_encoding_np, tolerance=0.6):
+        """
+        known_encoding: blob z bazy albo już zdekodowany wektor / macierz wzorców (np. z cache).
+        Dopasowanie, gdy którykolwiek wzorzec jest bliżej niż tolerance.
+        """
+        templates = FaceServices.as_templates(known_encoding)
+        results = face_recognition.compare_faces(list(templates), unknown_encoding_np, tolerance=tolerance)
+        return any(results)
@@ -0,0 +1,105 @@
+import numpy as np
+from flask import current_app
+from sqlalchemy import func
+from app.utils.db import db
+from app.models.employee_face import FaceCredential
+from app.services.face_service import FaceServices
+from app.services.face_index import face_index
+from app.services.face_cache import face_encoding_cache
+
+
+class FaceTemplateService:
+    """
+    Wiele wzorców twarzy na pracownika.
+
+    - rejestracja: kilka zdjęć (seria) = kilka wzorców 'enroll'
+    - opt-in (FACE_AUTO_ADD_TEMPLATES): udana weryfikacja z wysoką pewnością
+      dodaje wzorzec 'verify', o ile wnosi coś nowego (nie jest kopią istniejącego)
+    - limit FACE_MAX_TEMPLATES: nadmiar usuwamy zaczynając od najstarszych
+      wzorców 'verify'; wzorców z rejestracji nie ruszamy
+    """
+
+    @staticmethod
+    def max_templates():
+        return current_app.config.get("FACE_MAX_TEMPLATES", 5)
+
+    @staticmethod
+    def new_template(employee_id, encoding, source="enroll", quality=None):
+        return FaceCredential(
+            employee_id=employee_id,
+            face_encoding=FaceServices.encoding_to_bytes(encoding),
+            face_image_path="memory",
+            source=source,
+            quality=quality
+        )
+
+    @staticmethod
+    def publish(employee_id, templates, encodings):
+        """Po commicie rejestracji: wzorce do indeksu 1:N i do cache (jako macierz wzorców)."""
+        for template, encoding in zip(templates, encodings):
+            face_index.add(employee_id, encoding, template_id=template.id)
+        face_encoding_cache.put(employee_id, np.vstack([np.atleast_2d(e) for e in encodings]))
+
+    @staticmethod
+    def prune(employee_id, limit=None):
+        """
+        Usuwa najstarsze wzorce 'verify' ponad limit (bez commita).
+        Zwraca listę usuniętych template_id.
+        """
+        limit = FaceTemplateService.max_templates() if limit is None else limit
+        total = db.session.query(func.count(FaceCredential.id)).filter_by(employee_id=employee_id).scalar()
+        excess = total - limit
+        if excess <= 0:
+            return []
+
+        oldest = [template_id for (template_id,) in db.session.query(FaceCredential.id)
+                  .filter_by(employee_id=employee_id, source="verify")
+                  .order_by(FaceCredential.created_at, FaceCredential.id)
+                  .limit(excess).all()]
+        if oldest:
+            FaceCredential.query.filter(FaceCredential.id.in_(oldest)).delete(synchronize_session=False)
+        return oldest
+
+    @staticmethod
+    def maybe_add_verification_template(employee_id, known_templates, encoding):
+        """
+        Opt-in: dodaje wzorzec z udanej weryfikacji, gdy dopasowanie jest pewne
+        (odległość <= FACE_AUTO_ADD_MAX_DISTANCE), ale nie jest duplikatem
+        (odległość >= FACE_AUTO_ADD_MIN_DISTANCE). Zwraca True, gdy dodano.
+        Błąd zapisu nie psuje odpowiedzi bramki.
+        """
+        config = current_app.config
+        if not config.get("FACE_AUTO_ADD_TEMPLATES", False):
+            return False
+
+        try:
+            distance = FaceServices.face_distance(known_templates, encoding)
+        except (TypeError, ValueError):
+            return False
+        if not (config.get("FACE_AUTO_ADD_MIN_DISTANCE", 0.1) <= distance
+                <= config.get("FACE_AUTO_ADD_MAX_DISTANCE", 0.35)):
+            return False
+
+        limit = FaceTemplateService.max_templates()
+        enrolled = db.session.query(func.count(FaceCredential.id)).filter_by(
+            employee_id=employee_id, source="enroll").scalar()
+        if enrolled >= limit:
+            return False  # całą pulę zajmują wzorce z rejestracji
+
+        try:
+            template = FaceTemplateService.new_template(employee_id, encoding, source="verify", quality=distance)
+            db.session.add(template)
+            db.session.flush()
+            pruned = FaceTemplateService.prune(employee_id, limit)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"[FaceTemplates] Failed to add template for employee {employee_id}: {e}")
+            return False
+
+        face_index.add(employee_id, encoding, template_id=template.id)
+        for template_id in pruned:
+            face_index.remove_template(employee_id, template_id)
+        # Macierz wzorców w cache zbuduje się od nowa z bazy
+        face_encoding_cache.invalidate(employee_id)
+        return True
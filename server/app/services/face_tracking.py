@@ -0,0 +1,39 @@
+from flask import current_app
+from app.utils.cache import LRUCache
+
+
+# Sesje śledzenia twarzy na kioskach: (kiosk_id, osoba) -> ramka twarzy z ostatniej klatki
+# (top, right, bottom, left) na oryginalnym obrazie. Kolejna klatka z tego samego kiosku
+# szuka twarzy tylko w otoczeniu tej ramki (FaceServices.detect_in_roi).
+# Rozmiar i TTL nadpisywane w create_app() z konfiguracji.
+face_tracking_sessions = LRUCache(maxsize=256, ttl=30)
+
+
+def session_key(req, data, subject):
+    """
+    Klucz sesji dla requestu: kiosk z nagłówka X-Kiosk-Id (albo pola kiosk_id
+    z danych uploadu) i osoba (ID pracownika, kod QR, "identify"). None = bez śledzenia.
+    """
+    if not current_app.config.get("FACE_TRACKING_ENABLED", True):
+        return None
+    kiosk_id = req.headers.get("X-Kiosk-Id") or data.get("kiosk_id")
+    if not kiosk_id or subject is None:
+        return None
+    return str(kiosk_id)[:64], str(subject)
+
+
+def get_hint(key):
+    """Ramka z poprzedniej klatki tej sesji albo None (brak sesji / wygasła)."""
+    if key is None:
+        return None
+    return face_tracking_sessions.get(key)
+
+
+def update_session(key, box):
+    """Zapisuje ramkę z bieżącej klatki; None (twarz zgubiona) kończy sesję."""
+    if key is None:
+        return
+    if box is None:
+        face_tracking_sessions.invalidate(key)
+    else:
+        face_tracking_sessions.put(key, tuple(int(v) for v in box))
@@ -0,0 +1,148 @@
+import io
+from collections import namedtuple
+import numpy as np
+from flask import current_app, has_app_context
+from PIL import Image
+from app.services.face_detectors import get_detector, DetectorUnavailable
+
+# Progi oceny klatki (na szarej kopii o dłuższym boku analysis_size px).
+# Nadpisywane przez app.config["FRAME_QUALITY"] = {"min_sharpness": 5.0, ...}
+DEFAULT_FRAME_QUALITY = {
+    "analysis_size": 320,     # rozmiar kopii do oceny (JPEG dekodowany od razu w zmniejszonej skali)
+    "min_sharpness": 3.0,     # wariancja laplasjanu; mocno rozmyta / zasłonięta kamera < 3
+    "min_brightness": 25,     # średnia jasność 0-255
+    "max_brightness": 230,
+    "max_clipped": 0.5,       # udział pikseli prześwietlonych / niedoświetlonych
+    "min_face_ratio": 0.12,   # szerokość twarzy / szerokość kadru (wymaga pre-detektora)
+    "require_face": False,    # True = brak / za mała twarz w kaskadzie Haara odrzuca klatkę;
+                              # False = tylko niższa pozycja w serii, twarz i tak szuka detektor dlib
+    "max_burst": 5,           # ile klatek można przysłać w jednym requeście
+}
+
+FrameReport = namedtuple("FrameReport", [
+    "index", "sharpness", "brightness", "clipped", "face_ratio", "score", "reasons"
+])
+
+class FrameQualityService:
+    """
+    Tania ocena klatek przed detekcją HOG i encodingiem dlib.
+
+    Ostrość (wariancja laplasjanu), ekspozycja i rozmiar twarzy z szybkiego
+    pre-detektora (kaskada Haara z OpenCV, jeśli jest dostępna) liczone są
+    na małej szarej kopii - kilka ms na klatkę. Z serii klatek encoding
+    dostaje tylko najlepsza, a klatki bez szans są odrzucane od razu.
+    Kaskada Haara gubi twarze obrócone, ciemne i częściowo zasłonięte, które
+    HOG z dlib znajduje, więc domyślnie tylko układa kolejność klatek
+    (require_face włącza odrzucanie).
+    Klatki, których nie da się zdekodować, przechodzą dalej bez oceny
+    (błąd zgłosi dekodowanie w FaceServices, jak wcześniej).
+    """
+
+    @staticmethod
+    def get_settings():
+        settings = dict(DEFAULT_FRAME_QUALITY)
+        if has_app_context():
+            settings.update(current_app.config.get("FRAME_QUALITY", {}))
+        return settings
+
+    @staticmethod
+    def load_gray(image_bytes, size):
+        """Bajty obrazu -> szara tablica float32 (dłuższy bok <= size); None gdy nie da się zdekodować."""
+        try:
+            with Image.open(io.BytesIO(image_bytes)) as img:
+                img.draft("L", (size, size))  # JPEG: skalowanie już w dekoderze (1/2, 1/4, 1/8)
+                gray = img.convert("L")
+                gray.thumbnail((size, size))
+                return np.asarray(gray, dtype=np.float32)
+        except Exception:
+            return None
+
+    @staticmethod
+    def sharpness(gray):
+        """Wariancja laplasjanu (jądro 4-sąsiedztwa) - im mniejsza, tym bardziej rozmyty obraz."""
+        if gray.shape[0] < 3 or gray.shape[1] < 3:
+            return 0.0
+        center = gray[1:-1, 1:-1]
+        laplacian = gray[:-2, 1:-1] + gray[2:, 1:-1] + gray[1:-1, :-2] + gray[1:-1, 2:] - 4.0 * center
+        return float(laplacian.var())
+
+    @staticmethod
+    def detect_faces(gray):
+        """
+        Szybki pre-detektor (kaskada Haara, app/services/face_detectors.py):
+        lista ramek (top, right, bottom, left) na szarej kopii, albo None gdy
+        OpenCV nie ma kaskad (rozmiaru twarzy wtedy nie oceniamy).
+        """
+        cascade_dir = current_app.config.get("FACE_CASCADE_DIR") if has_app_context() else None
+        try:
+            detector = get_detector("haar", cascade_dir)
+        except DetectorUnavailable:
+            return None
+        return detector.detect(gray, {"min_face_size": 20})
+
+    @staticmethod
+    def analyze(image_bytes, index=0, settings=None):
+        """Ocena jednej klatki. reasons = powody odrzucenia (pusta lista = klatka przechodzi)."""
+        settings = settings or FrameQualityService.get_settings()
+        gray = FrameQualityService.load_gray(image_bytes, settings["analysis_size"])
+        if gray is None:
+            return FrameReport(index, None, None, None, None, None, [])
+
+        reasons = []
+        sharpness = FrameQualityService.sharpness(gray)
+        brightness = float(gray.mean())
+        clipped = float(np.count_nonzero((gray < 10) | (gray > 245))) / gray.size
+
+        if sharpness < settings["min_sharpness"]:
+            reasons.append("blurry")
+        if brightness < settings["min_brightness"]:
+            reasons.append("too_dark")
+        elif brightness > settings["max_brightness"]:
+            reasons.append("too_bright")
+        if clipped > settings["max_clipped"]:
+            reasons.append("clipped_exposure")
+
+        face_ratio = None
+        # Pre-detektor tylko dla klatek, które przeszły tanie testy
+        if not reasons:
+            faces = FrameQualityService.detect_faces(gray)
+            if faces is not None:
+                face_ratio = max((right - left for _, right, _, left in faces), default=0) / gray.shape[1]
+                if settings["require_face"]:
+                    if not faces:
+                        reasons.append("no_face")
+                    elif face_ratio < settings["min_face_ratio"]:
+                        reasons.append("face_too_small")
+
+        score = sharpness * (1.0 - clipped) * (face_ratio if face_ratio else 1.0)
+        return FrameReport(index, sharpness, brightness, clipped, face_ratio, score, reasons)
+
+    @staticmethod
+    def select_best(images, settings=None):
+        """
+        Wybiera klatkę do encodingu z serii.
+        Zwraca (indeks najlepszej klatki albo None gdy wszystkie odrzucone, lista FrameReport).
+        Klatki bez oceny (nie dało się zdekodować) mają niższy priorytet niż ocenione,
+        a klatki, w których pre-detektor nie widzi twarzy (dość dużej) - niższy niż te z twarzą.
+        """
+        settings = settings or FrameQualityService.get_settings()
+        reports = [FrameQualityService.analyze(image, index, settings) for index, image in enumerate(images)]
+        candidates = [report for report in reports if not report.reasons]
+        if not candidates:
+            return None, reports
+
+        def rank(report):
+            face_found = report.face_ratio is None or report.face_ratio >= settings["min_face_ratio"]
+            return report.score is not None, face_found, report.score or 0.0
+
+        return max(candidates, key=rank).index, reports
+
+    @staticmethod
+    def report_to_dict(report):
+        return {
+            "index": report.index,
+            "sharpness": None if report.sharpness is None else round(report.sharpness, 2),
+            "brightness": None if report.brightness is None else round(report.brightness, 1),
+            "face_ratio": None if report.face_ratio is None else round(report.face_ratio, 3),
+            "reasons": report.reasons,
+        }
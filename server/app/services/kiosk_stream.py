@@ -0,0 +1,249 @@
+import json
+import threading
+from collections import deque
+from flask import current_app, request
+from app.utils.db import db
+from app.models.employee import Employee
+from app.services.face_service import FaceServices
+from app.services.face_index import face_index
+from app.services.face_templates import FaceTemplateService
+from app.services.face_cache import get_face_encoding
+from app.services.face_pool import face_pool, FacePoolBusy, FacePoolTimeout
+from app.services.face_tracking import session_key
+from app.services.access_log_writer import access_log_writer
+from app.services.qr_cache import qr_cache
+from app.services.qr_service import QRService
+from app.services.frame_quality import FrameQualityService
+from app.utils import metrics
+
+
+class KioskStream:
+    """
+    Jedno połączenie WebSocket kiosku (/api/kiosk/stream).
+
+    Kiosk wysyła:
+      - tekst {"type": "qr", "qr_code": "...", "attempt": n} - próba 1:1 (jak /api/auth/verify),
+      - tekst {"type": "identify", "attempt": n} - próba 1:N (jak /api/auth/face/identify),
+      - tekst {"type": "reset"} - porzuca bieżącą próbę,
+      - binarnie - klatki z kamery (JPEG/PNG) dla bieżącej próby.
+    Serwer odpowiada JSON-em (z "attempt" próby, której dotyczy): "ready", "qr" (kod ważny),
+    "retry" (klatka do powtórzenia: quality / no_face / busy / timeout), "result" (granted /
+    denied - wpis w access_log, koniec próby), "error". Klatki spoza próby są odrzucane.
+
+    Backpressure: zanim zacznie się encoding, bufor połączenia jest opróżniany
+    bez blokowania. Z klatek bieżącej próby zostaje najnowsze max_burst (seria
+    wysłana naraz, jak w /api/auth/verify), starsze są odrzucane - kiosk, który
+    wysyła szybciej niż liczy pula, nie buduje kolejki i dostaje wynik dla
+    aktualnego kadru. Z serii encoding dostaje najlepsza klatka
+    (FrameQualityService.select_best). Pełna pula (FacePoolBusy) też kończy
+    się odrzuceniem klatki zamiast czekania.
+
+    ws: obiekt z send(str) i receive(timeout=None) (simple_websocket.Server z flask-sock).
+    """
+
+    active = 0
+    _active_lock = threading.Lock()
+
+    def __init__(self, ws, kiosk_id=None):
+        self.ws = ws
+        self.kiosk_id = kiosk_id
+        self.qr_code = None
+        self.qr_entry = None
+        self.mode = None  # "verify" / "identify" w trakcie próby, None = brak próby
+        self.attempt = None
+        self.frames = 0
+        self.dropped = 0
+
+    def send(self, **message):
+        if self.attempt is not None:
+            message["attempt"] = self.attempt
+        self.ws.send(json.dumps(message))
+
+    def reset(self):
+        self.qr_code = None
+        self.qr_entry = None
+        self.mode = None
+        self.attempt = None
+
+    def finish(self, **message):
+        """Wynik końcowy próby - kolejne klatki czekają na nową próbę."""
+        self.send(type="result", **message)
+        self.reset()
+
+    def run(self):
+        """Pętla połączenia - kończy się wyjątkiem zamknięcia z ws.receive()."""
+        with KioskStream._active_lock:
+            KioskStream.active += 1
+        try:
+            self.send(type="ready", kiosk_id=self.kiosk_id)
+            while True:
+                try:
+                    frames = self.receive_burst()
+                    if frames:
+                        self.verify(frames)
+                finally:
+                    # Połączenie żyje długo - bez otwartej transakcji między klatkami
+                    db.session.remove()
+        finally:
+            with KioskStream._active_lock:
+                KioskStream.active -= 1
+
+    def _drop(self, result="dropped"):
+        self.dropped += 1
+        metrics.KIOSK_STREAM_FRAMES.inc(result=result)
+
+    def _burst_size(self):
+        if not current_app.config.get("FRAME_QUALITY_ENABLED", True):
+            return 1
+        return FrameQualityService.get_settings()["max_burst"]
+
+    def receive_burst(self):
+        """
+        Czeka na wiadomość, potem zbiera bez blokowania resztę bufora.
+        Wiadomości tekstowe obsługuje od razu; zwraca listę (numer, klatka)
+        - najnowsze klatki bieżącej próby, najwyżej max_burst.
+        """
+        frames = deque(maxlen=self._burst_size())
+        message = self.ws.receive()
+        while message is not None:
+            if isinstance(message, (bytes, bytearray)):
+                self.frames += 1
+                if self.mode is None or len(frames) == frames.maxlen:
+                    self._drop()
+                if self.mode is not None:
+                    frames.append((self.frames, bytes(message)))
+            elif self.handle_text(message):
+                # Nowy kod QR / reset - klatki sprzed niego należą do poprzedniej próby
+                for _ in frames:
+                    self._drop()
+                frames.clear()
+            message = self.ws.receive(timeout=0)
+        return list(frames)
+
+    def handle_text(self, text):
+        """Wiadomość sterująca; True gdy zmienia próbę weryfikacji (nowa próba / reset)."""
+        try:
+            message = json.loads(text)
+            kind = message.get("type")
+        except (ValueError, AttributeError):
+            self.send(type="error", message="Nieprawidłowa wiadomość (oczekiwany JSON)")
+            return False
+
+        if kind == "qr":
+            self.handle_qr(message.get("qr_code"), message.get("attempt"))
+            return True
+        if kind == "identify":
+            self.reset()
+            self.mode, self.attempt = "identify", message.get("attempt")
+            return True
+        if kind == "reset":
+            self.reset()
+            return True
+        self.send(type="error", message=f"Nieznany typ wiadomości: {kind}")
+        return False
+
+    def handle_qr(self, qr_code_data, attempt=None):
+        self.reset()
+        self.attempt = attempt
+        if not qr_code_data:
+            self.send(type="error", message="Brak kodu QR")
+            return
+
+        qr_entry = qr_cache.lookup(qr_code_data)
+        if not QRService.is_entry_valid(qr_code_data, qr_entry):
+            access_log_writer.record(employee_id=None, status="denied", verification_method="qr+face")
+            self.finish(status="denied", message="Nieprawidłowy lub wygasły kod QR.")
+            return
+        if qr_entry.first_name is None:
+            self.send(type="error", message="Błąd spójności danych: brak pracownika dla tego kodu")
+            self.reset()
+            return
+
+        self.qr_code, self.qr_entry, self.mode = qr_code_data, qr_entry, "verify"
+        self.send(type="qr", status="valid", employee_id=qr_entry.employee_id, first_name=qr_entry.first_name)
+
+    def verify(self, frames):
+        """
+        Klatki próby (z receive_burst): wybór najlepszej, encoding w puli,
+        porównanie (1:1 z kodem QR albo 1:N).
+        """
+        seq, frame = frames[-1]
+        if current_app.config.get("FRAME_QUALITY_ENABLED", True):
+            with metrics.FACE_STAGE.time(stage="quality"):
+                best, reports = FrameQualityService.select_best([image for _, image in frames])
+            rejected = sum(1 for report in reports if report.reasons)
+            if rejected:
+                metrics.KIOSK_STREAM_FRAMES.inc(rejected, result="rejected")
+            if best is None:
+                self.send(type="retry", reason="quality", frame=seq,
+                          frames=[FrameQualityService.report_to_dict(report) for report in reports])
+                return
+            seq, frame = frames[best]
+
+        subject = self.qr_code if self.mode == "verify" else "identify"
+        session = session_key(request, {"kiosk_id": self.kiosk_id}, subject)
+        try:
+            encoding = face_pool.encode_tracked(frame, self.mode, session)
+        except FacePoolBusy:
+            self._drop("busy")
+            self.send(type="retry", reason="busy", frame=seq)
+            return
+        except FacePoolTimeout:
+            self.send(type="retry", reason="timeout", frame=seq)
+            return
+        except Exception as e:
+            self.send(type="error", message=f"Błąd przetwarzania obrazu: {str(e)}", frame=seq)
+            return
+
+        metrics.KIOSK_STREAM_FRAMES.inc(result="processed")
+        if encoding is None:
+            self.send(type="retry", reason="no_face", frame=seq)
+            return
+
+        if self.mode == "verify":
+            self._verify_employee(encoding, seq)
+        else:
+            self._identify(encoding, seq)
+
+    def _verify_employee(self, encoding, seq):
+        employee_id = self.qr_entry.employee_id
+        try:
+            known_encoding = get_face_encoding(employee_id)
+        except ValueError as e:
+            self.send(type="error", message=f"Uszkodzony wzorzec twarzy: {str(e)}", frame=seq)
+            self.reset()
+            return
+        if known_encoding is None:
+            self.send(type="error", message="Brak wzorca twarzy dla tego pracownika", frame=seq)
+            self.reset()
+            return
+
+        with metrics.FACE_STAGE.time(stage="compare"):
+            is_match = FaceServices.compare_faces(known_encoding, encoding)
+
+        access_log_writer.record(
+            employee_id=employee_id,
+            status="granted" if is_match else "denied",
+            verification_method="qr+face"
+        )
+        if not is_match:
+            self.finish(status="denied", frame=seq, message="Weryfikacja biometryczna nieudana. Twarz nie pasuje.")
+            return
+
+        FaceTemplateService.maybe_add_verification_template(employee_id, known_encoding, encoding)
+        self.finish(status="granted", frame=seq, employee_id=employee_id,
+                    message=f"Dostęp przyznany. Witaj, {self.qr_entry.first_name}!")
+
+    def _identify(self, encoding, seq):
+        with metrics.FACE_STAGE.time(stage="compare"):
+            employee_id, distance = face_index.identify(encoding)
+        employee = Employee.query.get(employee_id) if employee_id is not None else None
+
+        if employee:
+            access_log_writer.record(employee_id=employee.id, status="granted", verification_method="face")
+            self.finish(status="granted", frame=seq, employee_id=employee.id, distance=distance,
+                        message=f"Dostęp przyznany. Witaj, {employee.first_name}!")
+            return
+
+        access_log_writer.record(employee_id=None, status="denied", verification_method="face")
+        self.finish(status="denied", frame=seq, distance=distance, message="Nie rozpoznano twarzy.")
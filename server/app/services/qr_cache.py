@@ -0,0 +1,189 @@
+import threading
+import time
+from collections import namedtuple
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.utils.db import db
+from app.models.employee import Employee
+from app.models.qr_code import QRCredential
+from app.utils import metrics
+
+QRCacheEntry = namedtuple("QRCacheEntry", ["employee_id", "first_name", "expires_at", "is_active"])
+
+
+class QRCredentialCache:
+    """
+    Mapa kod QR -> (employee_id, first_name, expires_at, is_active) w pamięci procesu.
+
+    Ważny skan QR jest obsługiwany bez zapytania do bazy. Wpisy są usuwane
+    przez zdarzenia ORM przy każdej zmianie QRCredential / Employee
+    (generate_new_qr_code, switch_qr_state, delete_employee,
+    refresh_expired_qr_codes, ...) - raz przy flush i drugi raz po commit,
+    żeby równoległy odczyt nie zostawił w cache starej wersji.
+    Nieistniejących kodów nie zapamiętujemy (zgadywanie nie zapcha pamięci).
+
+    Każda invalidacja podbija licznik generacji. Odczyt z bazy, w trakcie
+    którego był commit zmieniający kody, nie trafia do cache (mógł przeczytać
+    stan sprzed commitu). Zmiany z innych procesów (kilka workerów) do tego
+    procesu nie docierają - wpis żyje najwyżej ttl sekund, potem jest czytany
+    z bazy od nowa (None = bez wygasania, tylko dla jednego procesu).
+    """
+
+    def __init__(self, ttl=60, clock=time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._by_code = {}  # kod -> (QRCacheEntry, expires_at)
+        self._by_employee = {}  # employee_id -> set(kodów)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._by_code)
+
+    @staticmethod
+    def _query():
+        return db.session.query(
+            QRCredential.qr_code_data,
+            QRCredential.employee_id,
+            Employee.first_name,
+            QRCredential.expires_at,
+            QRCredential.is_active
+        ).outerjoin(Employee, QRCredential.employee_id == Employee.id)
+
+    def _store(self, generation, code, employee_id, first_name, expires_at, is_active):
+        """Zapisuje wiersz z bazy, o ile od początku odczytu (generation) nie było invalidacji."""
+        entry = QRCacheEntry(employee_id, first_name, expires_at, bool(is_active))
+        expires = self._clock() + self.ttl if self.ttl else None
+        with self._lock:
+            if generation == self._generation:
+                self._by_code[code] = (entry, expires)
+                self._by_employee.setdefault(employee_id, set()).add(code)
+        return entry
+
+    def warm(self, batch_size=10000):
+        """Ładuje wszystkie kody QR (przy starcie aplikacji)."""
+        self.clear()
+        generation = self._generation
+        for row in self._query().yield_per(batch_size):
+            self._store(generation, *row)
+        return len(self._by_code)
+
+    def _get(self, code):
+        cached = self._by_code.get(code)
+        if cached is None:
+            return None
+        entry, expires = cached
+        if expires is not None and expires <= self._clock():
+            return None
+        return entry
+
+    def lookup(self, code):
+        """Wpis dla kodu (z cache albo z bazy); None gdy kod nie istnieje."""
+        start = time.perf_counter()
+        entry = self._get(code)
+        if entry is not None:
+            self.hits += 1
+            metrics.QR_LOOKUP.observe(time.perf_counter() - start, source="cache")
+            return entry
+
+        self.misses += 1
+        generation = self._generation
+        row = self._query().filter(QRCredential.qr_code_data == code).first()
+        metrics.QR_LOOKUP.observe(time.perf_counter() - start, source="db")
+        if row is None:
+            return None
+        return self._store(generation, *row)
+
+    def invalidate_code(self, code):
+        with self._lock:
+            self._generation += 1
+            cached = self._by_code.pop(code, None)
+            if cached is not None:
+                entry, _ = cached
+                self.invalidations += 1
+                codes = self._by_employee.get(entry.employee_id)
+                if codes is not None:
+                    codes.discard(code)
+                    if not codes:
+                        del self._by_employee[entry.employee_id]
+
+    def invalidate_employee(self, employee_id):
+        with self._lock:
+            self._generation += 1
+            codes = self._by_employee.pop(employee_id, set())
+            for code in codes:
+                if self._by_code.pop(code, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._by_code.clear()
+            self._by_employee.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._by_code),
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+# Jedna instancja na proces - rozgrzewana w create_app()
+qr_cache = QRCredentialCache()
+
+
+# ------------------------------
+# Invalidacja przez zdarzenia ORM
+# ------------------------------
+def _pending(session):
+    return session.info.setdefault("qr_cache_pending", (set(), set()))
+
+
+def _mark(target, codes=(), employee_ids=()):
+    session = inspect(target).session
+    for code in codes:
+        qr_cache.invalidate_code(code)
+    for employee_id in employee_ids:
+        qr_cache.invalidate_employee(employee_id)
+    if session is not None:
+        pending_codes, pending_employees = _pending(session)
+        pending_codes.update(codes)
+        pending_employees.update(employee_ids)
+
+
+@event.listens_for(QRCredential, "after_update")
+@event.listens_for(QRCredential, "after_delete")
+def _qr_changed(mapper, connection, target):
+    history = inspect(target).attrs.qr_code_data.history
+    codes = {target.qr_code_data, *history.deleted}
+    _mark(target, codes=[c for c in codes if c], employee_ids=[target.employee_id])
+
+
+@event.listens_for(Employee, "after_update")
+@event.listens_for(Employee, "after_delete")
+def _employee_changed(mapper, connection, target):
+    _mark(target, employee_ids=[target.id])
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    pending = session.info.pop("qr_cache_pending", None)
+    if pending:
+        codes, employee_ids = pending
+        for code in codes:
+            qr_cache.invalidate_code(code)
+        for employee_id in employee_ids:
+            qr_cache.invalidate_employee(employee_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop("qr_cache_pending", None)
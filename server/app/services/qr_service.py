@@ -15,6 +15,16 @@ class QRService:
         expiration = datetime.utcnow() + timedelta(weeks=valid_weeks)
         return qr_code_data, expiration
     
+    @staticmethod
+    def is_entry_valid(qr_code_data, qr_entry):
+        """Wpis z qr_cache -> czy kod jest ważny teraz."""
+        is_valid = qr_entry is not None and qr_entry.is_active
+
+        if is_valid and qr_entry.expires_at and qr_entry.expires_at < datetime.utcnow():
+            # Wygasły - validate_qr_code dezaktywuje go w bazie (a to czyści wpis w cache)
+            is_valid = QRService.validate_qr_code(qr_code_data)
+        return is_valid
+
     @staticmethod
     def validate_qr_code(qr_code_data: str):
 
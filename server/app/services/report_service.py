@@ -0,0 +1,140 @@
+import csv
+import io
+import json
+import base64
+from datetime import datetime
+from sqlalchemy import or_, and_
+from app.utils.db import db
+from app.models.access_log import AccessLog
+from app.models.employee import Employee
+
+REPORT_COLUMNS = ["timestamp", "employee_id", "full_name", "email", "status", "reason"]
+
+
+class ReportService:
+    """Raport zdarzeń z access_log: filtry, stronicowanie kursorem i eksport strumieniowy."""
+
+    @staticmethod
+    def parse_filters(data):
+        """
+        Czyta filtry z JSON-a / query stringa.
+        Rzuca ValueError przy złym formacie daty.
+        """
+        filters = {
+            "date_from": data.get('date_from'),
+            "date_to": data.get('date_to'),
+            "entry_type": data.get('entry_type', 'all'),  # domyślnie 'all'
+            "employee_id": data.get('employee_id'),
+        }
+        if filters["date_from"]:
+            datetime.strptime(filters["date_from"], '%Y-%m-%d')
+        if filters["date_to"]:
+            datetime.strptime(filters["date_to"], '%Y-%m-%d')
+        return filters
+
+    @staticmethod
+    def build_query(filters):
+        """Zapytanie AccessLog x Employee z filtrami, od najnowszych (timestamp, id)."""
+        # Używamy db.session.query, bo łączymy dwie tabele
+        query = db.session.query(AccessLog, Employee).join(Employee, AccessLog.employee_id == Employee.id)
+
+        # Filtrowanie po dacie
+        if filters["date_from"]:
+            date_from = datetime.strptime(filters["date_from"], '%Y-%m-%d')
+            query = query.filter(AccessLog.timestamp >= date_from)
+
+        if filters["date_to"]:
+            # Ustawiamy koniec dnia na 23:59:59
+            date_to = datetime.strptime(filters["date_to"], '%Y-%m-%d').replace(hour=23, minute=59, second=59)
+            query = query.filter(AccessLog.timestamp <= date_to)
+
+        # Filtrowanie po pracowniku
+        if filters["employee_id"]:
+            query = query.filter(AccessLog.employee_id == filters["employee_id"])
+
+        # Filtrowanie po typie wejścia
+        if filters["entry_type"] == 'access':
+            query = query.filter(AccessLog.status == 'granted')
+        elif filters["entry_type"] == 'denied':
+            query = query.filter(AccessLog.status == 'denied')
+
+        return query.order_by(AccessLog.timestamp.desc(), AccessLog.id.desc())
+
+    @staticmethod
+    def row_to_dict(log, emp):
+        return {
+            "timestamp": log.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+            "employee_id": log.employee_id,
+            "full_name": f"{emp.first_name} {emp.last_name}",
+            "email": emp.email,
+            "status": log.status,
+            "reason": getattr(log, 'reason', 'N/A')  # Pobiera powód, jeśli kolumna istnieje
+        }
+
+    # ------------------------------
+    # Stronicowanie kursorem (keyset)
+    # ------------------------------
+    @staticmethod
+    def encode_cursor(log):
+        raw = f"{log.timestamp.isoformat()}|{log.id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Kursor -> (timestamp, id). Rzuca ValueError przy uszkodzonym kursorze."""
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            timestamp, log_id = raw.rsplit("|", 1)
+            return datetime.fromisoformat(timestamp), int(log_id)
+        except Exception:
+            raise ValueError("Invalid cursor")
+
+    @staticmethod
+    def page(query, page_size, cursor=None):
+        """
+        Jedna strona wyników po kursorze (timestamp, id) - bez OFFSET,
+        więc koszt kolejnych stron nie rośnie z numerem strony.
+        Zwraca (wiersze, next_cursor albo None).
+        """
+        if cursor:
+            ts, log_id = ReportService.decode_cursor(cursor)
+            query = query.filter(or_(
+                AccessLog.timestamp < ts,
+                and_(AccessLog.timestamp == ts, AccessLog.id < log_id)
+            ))
+
+        rows = query.limit(page_size + 1).all()
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = ReportService.encode_cursor(rows[-1][0])
+        return [ReportService.row_to_dict(log, emp) for log, emp in rows], next_cursor
+
+    # ------------------------------
+    # Eksport strumieniowy
+    # ------------------------------
+    @staticmethod
+    def stream_csv(query, batch_size=1000):
+        """Generator linii CSV; yield_per trzyma w pamięci tylko jedną paczkę wierszy."""
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=REPORT_COLUMNS)
+        writer.writeheader()
+        for log, emp in query.yield_per(batch_size):
+            writer.writerow(ReportService.row_to_dict(log, emp))
+            if buffer.tell() >= 64 * 1024:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    @staticmethod
+    def stream_ndjson(query, batch_size=1000):
+        """Generator linii NDJSON (jeden obiekt JSON na linię)."""
+        chunk = []
+        for log, emp in query.yield_per(batch_size):
+            chunk.append(json.dumps(ReportService.row_to_dict(log, emp), ensure_ascii=False))
+            if len(chunk) >= batch_size:
+                yield "\n".join(chunk) + "\n"
+                chunk = []
+        if chunk:
+            yield "\n".join(chunk) + "\n"
@@ -0,0 +1,190 @@
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import event, update, insert, delete, func
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import sqlite, postgresql
+from app.utils.db import db
+from app.models.access_log import AccessLog
+from app.models.access_stats import AccessStatsRollup, StatsCounter
+from app.models.employee import Employee
+
+GRANULARITIES = ("hour", "day")
+
+
+def bucket_start(timestamp, granularity):
+    if granularity == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def aggregate(events):
+    """(timestamp, status, method) -> Counter{(granularity, bucket, status, method): n}"""
+    counts = Counter()
+    for timestamp, status, method in events:
+        for granularity in GRANULARITIES:
+            counts[(granularity, bucket_start(timestamp, granularity), status, method)] += 1
+    return counts
+
+
+def apply_counts(connection, counts):
+    """Dodaje liczniki do tabeli rollup (upsert) w bieżącej transakcji."""
+    if not counts:
+        return
+
+    table = AccessStatsRollup.__table__
+    rows = [{
+        "granularity": granularity,
+        "bucket_start": bucket,
+        "status": status,
+        "verification_method": method,
+        "count": n,
+    } for (granularity, bucket, status, method), n in counts.items()]
+
+    dialect = connection.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        dialect_insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        for row in rows:
+            stmt = dialect_insert(table).values(**row)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["granularity", "bucket_start", "status", "verification_method"],
+                set_={"count": table.c.count + stmt.excluded.count}
+            )
+            connection.execute(stmt)
+        return
+
+    for row in rows:
+        updated = connection.execute(
+            update(table)
+            .where(table.c.granularity == row["granularity"],
+                   table.c.bucket_start == row["bucket_start"],
+                   table.c.status == row["status"],
+                   table.c.verification_method == row["verification_method"])
+            .values(count=table.c.count + row["count"])
+        ).rowcount
+        if updated == 0:
+            connection.execute(insert(table).values(**row))
+
+
+@event.listens_for(Session, "after_flush")
+def _rollup_new_access_logs(session, flush_context):
+    """Każdy AccessLog wstawiony przez ORM podbija liczniki w tej samej transakcji."""
+    events = [
+        (obj.timestamp or datetime.utcnow(), obj.status, obj.verification_method)
+        for obj in session.new if isinstance(obj, AccessLog)
+    ]
+    if events:
+        apply_counts(session.connection(), aggregate(events))
+
+
+def adjust_counter(connection, name, delta):
+    """Dodaje delta do licznika StatsCounter (upsert) w bieżącej transakcji."""
+    if not delta:
+        return
+
+    table = StatsCounter.__table__
+    dialect = connection.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        dialect_insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = dialect_insert(table).values(name=name, value=delta)
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=["name"],
+            set_={"value": table.c.value + stmt.excluded.value}
+        ))
+        return
+
+    updated = connection.execute(
+        update(table).where(table.c.name == name).values(value=table.c.value + delta)
+    ).rowcount
+    if updated == 0:
+        connection.execute(insert(table).values(name=name, value=delta))
+
+
+@event.listens_for(Session, "after_flush")
+def _count_employees(session, flush_context):
+    """Dodanie / usunięcie pracownika przez ORM zmienia licznik w tej samej transakcji."""
+    delta = sum(isinstance(obj, Employee) for obj in session.new) \
+        - sum(isinstance(obj, Employee) for obj in session.deleted)
+    if delta:
+        adjust_counter(session.connection(), "employees", delta)
+
+
+@event.listens_for(Session, "after_bulk_delete")
+def _count_bulk_deleted_employees(delete_context):
+    """query(Employee).delete() omija after_flush - odejmujemy usunięte wiersze."""
+    if delete_context.mapper.class_ is Employee and delete_context.result.rowcount:
+        adjust_counter(delete_context.session.connection(), "employees", -delete_context.result.rowcount)
+
+
+def rebuild_counters():
+    """Przelicza StatsCounter z tabel (pierwszy start po aktualizacji albo rebuild-stats)."""
+    employees = db.session.query(func.count(Employee.id)).scalar()
+    db.session.execute(delete(StatsCounter).where(StatsCounter.name == "employees"))
+    db.session.add(StatsCounter(name="employees", value=employees))
+    db.session.commit()
+    return employees
+
+
+def counter(name):
+    """Wartość licznika StatsCounter (0 gdy jeszcze go nie ma)."""
+    return db.session.query(StatsCounter.value).filter(StatsCounter.name == name).scalar() or 0
+
+
+def rebuild_rollups(since=None, batch_size=10000):
+    """
+    Przelicza tabelę rollup od zera (albo od `since`) z surowych logów.
+    Zwraca liczbę przetworzonych zdarzeń.
+    """
+    query = db.session.query(AccessLog.timestamp, AccessLog.status, AccessLog.verification_method)
+    purge = delete(AccessStatsRollup)
+    if since is not None:
+        since = bucket_start(since, "day")
+        query = query.filter(AccessLog.timestamp >= since)
+        purge = purge.where(AccessStatsRollup.bucket_start >= since)
+
+    counts = Counter()
+    processed = 0
+    for timestamp, status, method in query.yield_per(batch_size):
+        for granularity in GRANULARITIES:
+            counts[(granularity, bucket_start(timestamp, granularity), status, method)] += 1
+        processed += 1
+
+    db.session.execute(purge)
+    apply_counts(db.session.connection(), counts)
+    db.session.commit()
+    return processed
+
+
+def totals(granularity, start, end=None, status=None):
+    """Suma liczników w przedziale [start, end) - czyta tylko tabelę rollup."""
+    query = db.session.query(func.coalesce(func.sum(AccessStatsRollup.count), 0)).filter(
+        AccessStatsRollup.granularity == granularity,
+        AccessStatsRollup.bucket_start >= start
+    )
+    if end is not None:
+        query = query.filter(AccessStatsRollup.bucket_start < end)
+    if status is not None:
+        query = query.filter(AccessStatsRollup.status == status)
+    return query.scalar()
+
+
+def timeseries(granularity, start, end):
+    """Lista kubełków [{bucket_start, granted, denied, by_method: {...}}] w przedziale [start, end)."""
+    rows = AccessStatsRollup.query.filter(
+        AccessStatsRollup.granularity == granularity,
+        AccessStatsRollup.bucket_start >= start,
+        AccessStatsRollup.bucket_start < end
+    ).order_by(AccessStatsRollup.bucket_start).all()
+
+    buckets = {}
+    for row in rows:
+        bucket = buckets.setdefault(row.bucket_start, {
+            "bucket_start": row.bucket_start.isoformat(),
+            "total": 0,
+            "by_status": {},
+            "by_method": {},
+        })
+        bucket["total"] += row.count
+        bucket["by_status"][row.status] = bucket["by_status"].get(row.status, 0) + row.count
+        bucket["by_method"][row.verification_method] = bucket["by_method"].get(row.verification_method, 0) + row.count
+    return [buckets[key] for key in sorted(buckets)]
+
@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Prosty, wątkowo-bezpieczny cache LRU z opcjonalnym TTL.
+
+    - maxsize: maksymalna liczba wpisów (najdawniej używany wylatuje pierwszy)
+    - ttl: czas życia wpisu w sekundach (None = bez wygasania)
+    Zlicza trafienia/chybienia/wysiedlenia, żeby było widać, czy cache pomaga.
+    invalidate()/clear() podbijają licznik generacji - wartość wczytana przez
+    get_or_load() przed invalidacją nie jest już zapisywana.
+    """
+
+    def __init__(self, maxsize=4096, ttl=None, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self.get(key, _count=False) is not None
+
+    def get(self, key, default=None, _count=True):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > self._clock():
+                    self._data.move_to_end(key)
+                    if _count:
+                        self.hits += 1
+                    return value
+                del self._data[key]
+                self.expirations += 1
+            if _count:
+                self.misses += 1
+            return default
+
+    def put(self, key, value, generation=None):
+        """Zapisuje wartość; z generation - tylko gdy od tamtej chwili nie było invalidacji."""
+        expires_at = self._clock() + self.ttl if self.ttl else None
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key, loader):
+        """Zwraca wartość z cache albo woła loader(key); None nie jest cache'owane."""
+        value = self.get(key)
+        if value is None:
+            generation = self._generation
+            value = loader(key)
+            if value is not None:
+                self.put(key, value, generation)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._generation += 1
+            if self._data.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
@@ -1,5 +1,32 @@
 # app/utils/db.py
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 
 # Tworzymy obiekt i nazywamy go 'db'
-db = SQLAlchemy()
\ No newline at end of file
+db = SQLAlchemy()
+
+
+def install_sqlite_pragmas(engine, pragmas):
+    """Ustawia PRAGMA (WAL, synchronous, busy_timeout, ...) na każdym nowym połączeniu SQLite."""
+    if engine.dialect.name != "sqlite" or not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def sqlite_settings(engine):
+    """Aktualne wartości PRAGMA (do logów przy starcie i benchmarków)."""
+    if engine.dialect.name != "sqlite":
+        return {}
+    with engine.connect() as conn:
+        return {
+            name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+            for name in ("journal_mode", "synchronous", "busy_timeout", "mmap_size", "cache_size")
+        }
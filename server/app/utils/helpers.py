@@ -1,68 +1,237 @@
-from sqlalchemy import func
-from sqlalchemy.orm import aliased
+from sqlalchemy import func, insert, update, delete, or_, and_
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
+from flask import current_app
 from app.utils.db import db
 from app.models.employee import Employee
+from app.models.access_log import AccessLog
+from app.models.id_pool import IdSequence, FreeEmployeeId
 from app.models.qr_code import QRCredential
+from app.models.job_checkpoint import JobCheckpoint
 from app.services.qr_service import QRService
 
+EMPLOYEE_SEQUENCE = "employee"
+
+def _reuse_gaps():
+    return current_app.config.get("EMPLOYEE_ID_REUSE_GAPS", True)
+
+def _has_access_history(employee_id):
+    """
+    Logi dostępu zostają po usunięciu pracownika - ID z historią nie wraca do puli,
+    inaczej nowa osoba przejęłaby cudze wejścia. Jeden krok po ix_access_log_employee_timestamp.
+    """
+    return db.session.query(AccessLog.id).filter(AccessLog.employee_id == employee_id).first() is not None
+
+def _seed_employee_sequence():
+    """
+    Jednorazowa inicjalizacja licznika (gdy tabela id_sequence jest pusta):
+    next_value = max(id) + 1, a istniejące luki w ID (bez logów dostępu) trafiają na free-listę.
+    Jedyny przebieg O(n) - kolejne alokacje go nie powtarzają.
+    """
+    next_value = 1
+    free_ids = []
+    for (employee_id,) in db.session.query(Employee.id).order_by(Employee.id).yield_per(10000):
+        free_ids.extend(range(next_value, employee_id))
+        next_value = employee_id + 1
+
+    db.session.add(IdSequence(name=EMPLOYEE_SEQUENCE, next_value=next_value))
+    if free_ids and _reuse_gaps():
+        with_history = {
+            employee_id for (employee_id,) in
+            db.session.query(AccessLog.employee_id).filter(AccessLog.employee_id < next_value).distinct()
+        }
+        free_ids = [i for i in free_ids if i not in with_history]
+        if free_ids:
+            db.session.execute(insert(FreeEmployeeId), [{"id": i} for i in free_ids])
+    db.session.flush()
+
+def _ensure_employee_sequence():
+    if db.session.get(IdSequence, EMPLOYEE_SEQUENCE) is not None:
+        return
+    try:
+        _seed_employee_sequence()
+    except IntegrityError:
+        # Inny proces zainicjował licznik w tym samym momencie
+        db.session.rollback()
+
+def _claim_free_ids(count):
+    """
+    Zdejmuje z free-listy do `count` najmniejszych ID, które nadal są wolne.
+    ID, do którego w międzyczasie dopisano log (np. spóźniony zapis z kolejki), wypada z listy.
+    """
+    claimed = []
+    candidates = db.session.query(FreeEmployeeId.id).order_by(FreeEmployeeId.id).limit(count).all()
+    for (free_id,) in candidates:
+        # DELETE z kontrolą rowcount = atomowe "zajęcie" ID przy współbieżnych zapisach
+        deleted = db.session.execute(delete(FreeEmployeeId).where(FreeEmployeeId.id == free_id)).rowcount
+        if deleted == 1 and db.session.get(Employee, free_id) is None and not _has_access_history(free_id):
+            claimed.append(free_id)
+    return claimed
+
+def _take_from_sequence(count):
+    """Rezerwuje `count` kolejnych ID z licznika."""
+    # Najpierw UPDATE - bierze blokadę zapisu, więc odczyt poniżej jest spójny
+    updated = db.session.execute(
+        update(IdSequence)
+        .where(IdSequence.name == EMPLOYEE_SEQUENCE)
+        .values(next_value=IdSequence.next_value + count)
+    ).rowcount
+
+    if updated == 0:
+        raise RuntimeError("Employee id sequence is not initialized")
+
+    end = db.session.query(IdSequence.next_value).filter_by(name=EMPLOYEE_SEQUENCE).scalar()
+    start = end - count
+
+    # Ochrona przed wierszami wstawionymi z jawnym ID z pominięciem licznika.
+    # max() po kluczu głównym to jeden krok po indeksie, nie skan.
+    max_id = db.session.query(func.max(Employee.id)).scalar() or 0
+    if start <= max_id:
+        start = max_id + 1
+        db.session.execute(
+            update(IdSequence)
+            .where(IdSequence.name == EMPLOYEE_SEQUENCE)
+            .values(next_value=start + count)
+        )
+    return list(range(start, start + count))
+
+def allocate_employee_ids(count):
+    """
+    Rezerwuje `count` ID dla nowych pracowników w bieżącej transakcji.
+
+    Koszt stały (bez skanowania tabeli employee): najpierw ID z free-listy
+    (gdy EMPLOYEE_ID_REUSE_GAPS), reszta z licznika id_sequence.
+    Rezerwacja cofa się razem z rollbackiem transakcji, więc wołaj ją
+    przed innymi zapisami, a commit rób razem z insertem pracowników.
+    """
+    if count <= 0:
+        return []
+
+    _ensure_employee_sequence()
+    ids = _claim_free_ids(count) if _reuse_gaps() else []
+    if len(ids) < count:
+        ids.extend(_take_from_sequence(count - len(ids)))
+    return ids
+
 def get_next_available_id():
-    min_id = db.session.query(func.min(Employee.id)).scalar()
-
-    # jeśli pusta
-    if min_id is None or min_id >1:
-        return 1
-    
-    # dziura-> alisay
-
-    e1 = db.aliased(Employee)
-    e2 = db.aliased(Employee)
-    gap_id = db.session.query(func.min(e1.id + 1)).\
-        outerjoin(e2, e2.id == e1.id + 1).\
-        filter(e2.id == None).\
-        scalar()
-    
-    if gap_id:
-        return gap_id
-    else: # max id
-        max_id = db.session.query(func.max(Employee.id)).scalar()
-        return max_id + 1
-
-def refresh_expired_qr_codes(valid_weeks: int = 4):
+    """ID dla pojedynczej rejestracji (patrz allocate_employee_ids)."""
+    return allocate_employee_ids(1)[0]
+
+def release_employee_id(employee_id):
+    """
+    Oddaje ID usuniętego pracownika na free-listę (tylko w trybie reuse gaps
+    i tylko gdy nie ma logów dostępu - patrz _has_access_history).
+    """
+    if not _reuse_gaps() or _has_access_history(employee_id):
+        return
+    if db.session.get(FreeEmployeeId, employee_id) is None:
+        db.session.add(FreeEmployeeId(id=employee_id))
+
+QR_REFRESH_JOB = "qr_expiry_refresh"
+
+def _qr_refresh_checkpoint():
+    checkpoint = db.session.get(JobCheckpoint, QR_REFRESH_JOB)
+    if checkpoint is None:
+        checkpoint = JobCheckpoint(name=QR_REFRESH_JOB, status="idle", processed=0, total_processed=0)
+        db.session.add(checkpoint)
+    return checkpoint
+
+def refresh_expired_qr_codes(valid_weeks: int = 4, chunk_size: int = 500, max_chunks=None, progress=None):
     """
     Odświerza tylko wygasłe wpisy QR dla wszystkich pracowników.
     Nadpisuje stary kod nowym.
-    
+
+    Kody są przetwarzane paczkami po chunk_size w kolejności (expires_at, id)
+    - po indeksie ix_qrcredential_active_expires, z kursorem zamiast OFFSET.
+    Każda paczka to osobny, krótki commit razem z zapisem postępu w job_checkpoint,
+    więc przerwany przebieg (crash, restart) jest wznawiany od ostatniej paczki.
+
     Args:
         valid_weeks: Liczba tygodni ważności nowego QR
-    
+        chunk_size: Ile kodów na jedną transakcję
+        max_chunks: Limit paczek na jedno wywołanie (None = do końca);
+                    niedokończony przebieg zostaje w stanie 'running'
+        progress: Opcjonalny callback(checkpoint_dict) po każdej paczce
+
     Zwraca listę wygenerowanych pozycji: [{"employee_id","new_qr","expires_at"}, ...]
     """
     now = datetime.utcnow()
     results = []
     try:
-        # Znajdź pracowników z wygasłymi kodami
-        expired = QRCredential.query.filter(
-            QRCredential.expires_at != None,
-            QRCredential.expires_at < now,
-            QRCredential.is_active == True
-        ).all()
-
-        for qr in expired:
-            # Nadpisz stary kod nowym
-            new_code, new_exp = QRService.generate_credential(valid_weeks)
-            qr.qr_code_data = new_code
-            qr.expires_at = new_exp
-            db.session.add(qr)
-            results.append({
-                "employee_id": qr.employee_id, 
-                "new_qr": new_code, 
-                "expires_at": new_exp.isoformat()
-            })
+        checkpoint = _qr_refresh_checkpoint()
+        if checkpoint.status != "running":
+            # Nowy przebieg
+            checkpoint.status = "running"
+            checkpoint.cursor_expires_at = None
+            checkpoint.cursor_id = None
+            checkpoint.processed = 0
+            checkpoint.started_at = now
+            checkpoint.finished_at = None
+        elif checkpoint.cursor_id is not None:
+            print(f"[QR Refresh] Resuming after id={checkpoint.cursor_id} "
+                  f"({checkpoint.processed} already processed)")
+        db.session.commit()
+
+        chunks = 0
+        while max_chunks is None or chunks < max_chunks:
+            # Znajdź pracowników z wygasłymi kodami (następna paczka za kursorem)
+            query = QRCredential.query.filter(
+                QRCredential.is_active == True,
+                QRCredential.expires_at != None,
+                QRCredential.expires_at < now
+            )
+            if checkpoint.cursor_id is not None:
+                query = query.filter(or_(
+                    QRCredential.expires_at > checkpoint.cursor_expires_at,
+                    and_(QRCredential.expires_at == checkpoint.cursor_expires_at,
+                         QRCredential.id > checkpoint.cursor_id)
+                ))
+            expired = query.order_by(QRCredential.expires_at, QRCredential.id).limit(chunk_size).all()
+            if not expired:
+                break
 
+            # Kursor = stara data wygaśnięcia ostatniego wiersza (przed nadpisaniem)
+            cursor_expires_at, cursor_id = expired[-1].expires_at, expired[-1].id
+
+            for qr in expired:
+                # Nadpisz stary kod nowym
+                new_code, new_exp = QRService.generate_credential(valid_weeks)
+                qr.qr_code_data = new_code
+                qr.expires_at = new_exp
+                results.append({
+                    "employee_id": qr.employee_id,
+                    "new_qr": new_code,
+                    "expires_at": new_exp.isoformat()
+                })
+
+            checkpoint.cursor_expires_at = cursor_expires_at
+            checkpoint.cursor_id = cursor_id
+            checkpoint.processed += len(expired)
+            checkpoint.total_processed += len(expired)
+            # Paczka i postęp w jednej transakcji
+            db.session.commit()
+            chunks += 1
+
+            if progress is not None:
+                progress(checkpoint.to_dict())
+            if len(expired) < chunk_size:
+                break
+        else:
+            # Wyczerpany limit paczek - dokończy następne wywołanie
+            return results
+
+        checkpoint.status = "idle"
+        checkpoint.finished_at = datetime.utcnow()
         db.session.commit()
     except Exception:
         db.session.rollback()
         raise
 
-    return results
\ No newline at end of file
+    return results
+
+def next_qr_expiry():
+    """Najbliższa data wygaśnięcia aktywnego kodu QR (None gdy brak) - min po indeksie."""
+    return db.session.query(func.min(QRCredential.expires_at)).filter(
+        QRCredential.is_active == True,
+        QRCredential.expires_at != None
+    ).scalar()
@@ -0,0 +1,338 @@
+"""
+Metryki w pamięci procesu, eksportowane w formacie tekstowym Prometheusa (/api/admin/metrics).
+
+Histogramy mają stałe kubełki; observe() to bisect + kilka dodawań pod lockiem,
+więc instrumentację można zostawić włączoną na produkcji. Głębokości kolejek
+i stan cache'y czytane są dopiero przy scrapie (collectory).
+
+    from app.utils import metrics
+    with metrics.FACE_STAGE.time(stage="detect"):
+        ...
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Kubełki w sekundach: od 0.5 ms (zapytania, cache) do 10 s (encoding na słabym CPU)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)  # kubełek "le" - pierwsza granica >= value
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [liczniki kubełków (+Inf na końcu), suma, liczba]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self, **labels):
+        """(liczba obserwacji, suma) dla danych etykiet."""
+        state = self._values.get(self._key(labels))
+        return (state[2], state[1]) if state else (0, 0.0)
+
+    def _render_sample(self, key, state):
+        counts, total, count = state
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            labels = _format_labels(self.labelnames, key, ("le", _format_value(float(bound))))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    """Zbiór metryk + collectory wołane przy scrapie (gauge'e kolejek i cache'y)."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector):
+        """
+        collector() zwraca listę (nazwa, typ, opis, [(słownik etykiet, wartość), ...]).
+        Wyjątek w collectorze pomija tylko jego metryki.
+        """
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                families = collector()
+            except Exception as e:
+                lines.append(f"# collector {getattr(collector, '__name__', collector)} failed: {e}")
+                continue
+            for name, kind, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    label_text = _format_labels(tuple(labels), tuple(labels.values()))
+                    lines.append(f"{name}{label_text} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        for metric in self._metrics:
+            metric.clear()
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.histogram(
+    "http_request_duration_seconds", "Czas obsługi requestu HTTP",
+    ("endpoint", "method", "status"))
+FACE_STAGE = registry.histogram(
+    "face_stage_duration_seconds",
+    "Etapy rozpoznawania twarzy: upload, quality, queue, decode, detect_roi, detect, encode, compare",
+    ("stage",))
+QR_LOOKUP = registry.histogram(
+    "qr_lookup_duration_seconds", "Wyszukanie kodu QR (cache albo baza)", ("source",))
+DB_QUERY = registry.histogram(
+    "db_query_duration_seconds", "Czas pojedynczego zapytania SQL (także zakończonego błędem)", ("operation",))
+DB_QUERY_ERRORS = registry.counter(
+    "db_query_errors_total", "Zapytania SQL zakończone błędem", ("operation",))
+DB_REQUEST_QUERIES = registry.histogram(
+    "db_queries_per_request", "Liczba zapytań SQL w jednym requeście", ("endpoint",),
+    buckets=COUNT_BUCKETS)
+DB_REQUEST_TIME = registry.histogram(
+    "db_request_duration_seconds", "Łączny czas zapytań SQL w jednym requeście", ("endpoint",))
+JOB_DURATION = registry.histogram(
+    "scheduler_job_duration_seconds", "Czas przebiegu jobów w tle", ("job", "result"),
+    buckets=DEFAULT_BUCKETS + (30.0, 60.0, 300.0))
+KIOSK_STREAM_FRAMES = registry.counter(
+    "kiosk_stream_frames_total",
+    "Klatki z kanału WebSocket kiosku: processed, rejected (jakość), dropped (spoza próby / ponad serię), busy (pełna pula)",
+    ("result",))
+ACCESS_LOG_FLUSH = registry.histogram(
+    "access_log_flush_duration_seconds", "Zapis jednej paczki logów dostępu (insert + commit)")
+ACCESS_LOG_BATCH = registry.histogram(
+    "access_log_flush_batch_size", "Liczba logów w jednej paczce", buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000))
+
+
+def observe_stages(timings):
+    """Słownik etap -> sekundy (np. z FaceServices.get_encoding_from_image) do FACE_STAGE."""
+    for stage, seconds in timings.items():
+        FACE_STAGE.observe(seconds, stage=stage)
+
+
+# ------------------------------
+# Zapytania SQL (zdarzenia silnika)
+# ------------------------------
+# Start zapytania trzymamy na kontekście wykonania (jeden na zapytanie), nie na
+# połączeniu - zapytanie, które rzuci wyjątek, nie zostawia nic na połączeniu z puli
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_start = time.perf_counter()
+
+
+def _observe_query(context, statement, failed=False):
+    start = getattr(context, "_metrics_start", None)
+    if start is None:
+        return
+    context._metrics_start = None
+    elapsed = time.perf_counter() - start
+    operation = (statement or "").lstrip()[:6].upper().rstrip() or "OTHER"
+    DB_QUERY.observe(elapsed, operation=operation)
+    if failed:
+        DB_QUERY_ERRORS.inc(operation=operation)
+    if has_request_context():
+        g.metrics_db_queries = g.get("metrics_db_queries", 0) + 1
+        g.metrics_db_time = g.get("metrics_db_time", 0.0) + elapsed
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _observe_query(context, statement)
+
+
+def _handle_error(exception_context):
+    _observe_query(exception_context.execution_context, exception_context.statement, failed=True)
+
+
+def _install_sql_hooks():
+    # Na klasie Engine - obejmuje też silniki tworzone później (testy, benchmarki)
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+
+
+# ------------------------------
+# Requesty HTTP
+# ------------------------------
+def _endpoint():
+    # Nazwa endpointu zamiast ścieżki - /api/employees/123 nie tworzy osobnej serii na każde ID
+    return request.endpoint or "unmatched"
+
+
+def _start_request():
+    g.metrics_start = time.perf_counter()
+
+
+def _finish_request(response):
+    start = g.get("metrics_start")
+    if start is None:
+        return response
+    endpoint = _endpoint()
+    HTTP_REQUESTS.observe(time.perf_counter() - start, endpoint=endpoint,
+                          method=request.method, status=response.status_code)
+    DB_REQUEST_QUERIES.observe(g.get("metrics_db_queries", 0), endpoint=endpoint)
+    DB_REQUEST_TIME.observe(g.get("metrics_db_time", 0.0), endpoint=endpoint)
+    return response
+
+
+def _runtime_collector():
+    """Głębokości kolejek i stan cache'y - czytane w chwili scrapu."""
+    from app.services.face_pool import face_pool
+    from app.services.access_log_writer import access_log_writer
+    from app.services.face_cache import face_encoding_cache
+    from app.services.qr_cache import qr_cache
+    from app.services.face_index import face_index
+    from app.services.face_tracking import face_tracking_sessions
+    from app.services.kiosk_stream import KioskStream
+    from app.services.event_bus import event_bus
+
+    pool = face_pool.stats()
+    writer = access_log_writer.stats()
+    face_cache = face_encoding_cache.stats()
+    qr = qr_cache.stats()
+    tracking = face_tracking_sessions.stats()
+    events = event_bus.stats()
+    return [
+        ("face_pool_in_flight", "gauge", "Zadania encodingu w puli (liczone + czekające)",
+         [({}, pool["in_flight"])]),
+        ("face_pool_capacity", "gauge", "Miejsca w puli (procesy + kolejka)",
+         [({}, pool["workers"] + pool["queue_size"])]),
+        ("face_pool_jobs_total", "counter", "Zadania puli encodingu wg wyniku",
+         [({"result": name}, pool[name]) for name in ("submitted", "completed", "rejected", "timeouts")]),
+        ("access_log_queue_depth", "gauge", "Logi dostępu czekające na zapis", [({}, writer["queue_depth"])]),
+        ("access_log_events_total", "counter", "Logi dostępu wg wyniku",
+         [({"result": name}, writer[name]) for name in ("enqueued", "written", "dropped", "failed")]),
+        ("cache_entries", "gauge", "Liczba wpisów w cache",
+         [({"cache": "face_encoding"}, face_cache["size"]), ({"cache": "qr_credential"}, qr["size"])]),
+        ("cache_requests_total", "counter", "Odczyty cache wg wyniku",
+         [({"cache": "face_encoding", "result": "hit"}, face_cache["hits"]),
+          ({"cache": "face_encoding", "result": "miss"}, face_cache["misses"]),
+          ({"cache": "qr_credential", "result": "hit"}, qr["hits"]),
+          ({"cache": "qr_credential", "result": "miss"}, qr["misses"])]),
+        ("face_tracking_sessions", "gauge", "Aktywne sesje śledzenia twarzy na kioskach",
+         [({}, tracking["size"])]),
+        ("kiosk_stream_connections", "gauge", "Otwarte połączenia WebSocket kiosków",
+         [({}, KioskStream.active)]),
+        ("event_stream_subscribers", "gauge", "Otwarte podglądy zdarzeń (SSE)", [({}, events["subscribers"])]),
+        ("event_bus_events_total", "counter", "Zdarzenia opublikowane na szynie", [({}, events["published"])]),
+        ("event_stream_dropped", "gauge", "Zdarzenia odrzucone z przepełnionych buforów otwartych podglądów",
+         [({}, events["dropped"])]),
+        ("face_index_templates", "gauge", "Wzorce twarzy w indeksie 1:N", [({}, len(face_index))]),
+        ("face_index_memory_bytes", "gauge", "Pamięć macierzy indeksu 1:N", [({}, face_index.memory_bytes())]),
+    ]
+
+
+def init_app(app):
+    """Podpina pomiar requestów i zapytań SQL (METRICS_ENABLED = False wyłącza)."""
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    _install_sql_hooks()
+    registry.add_collector(_runtime_collector)
@@ -0,0 +1,77 @@
+from flask import current_app
+from app.services.face_service import FaceServices
+from app.utils import metrics
+
+# Surowe body z obrazem (Content-Type: image/...), np. fetch(url, {body: blob})
+IMAGE_MIMETYPES = {"image/jpeg", "image/png", "image/webp"}
+
+
+class UploadError(ValueError):
+    """Żądanie bez poprawnego obrazu - komunikat idzie do odpowiedzi 400/413/415."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def read_face_upload(req):
+    """
+    Czyta pola i zdjęcia z żądania w jednym z trzech formatów:
+      - application/json: {"image": "data:image/jpeg;base64,..."} albo {"images": [...]}
+      - multipart/form-data: pliki 'image' / 'images', pola tekstowe w formularzu
+      - image/jpeg | image/png | image/webp: całe body to obraz, pola w query stringu
+
+    Zwraca (pola, lista bajtów obrazów). Binarny obraz trafia do bajtów jednym
+    odczytem strumienia - bez base64 (+33%) i bez kopii przez str.
+    Limit rozmiaru: FACE_UPLOAD_MAX_BYTES (413).
+    """
+    with metrics.FACE_STAGE.time(stage="upload"):
+        return _read_face_upload(req)
+
+
+def _read_face_upload(req):
+    limit = current_app.config.get("FACE_UPLOAD_MAX_BYTES")
+    if limit and req.content_length is not None and req.content_length > limit:
+        raise UploadError(f"Request too large (max {limit} bytes)", status=413)
+
+    if req.is_json:
+        data = req.get_json(silent=True)
+        if not isinstance(data, dict):
+            raise UploadError("Wymagany format JSON")
+        raw_images = data.get('images') or ([data['image']] if data.get('image') else [])
+        if not isinstance(raw_images, list):
+            raise UploadError("'images' must be a list")
+        images = [FaceServices.base64_to_bytes(image) if isinstance(image, str) else None
+                  for image in raw_images]
+        if any(image is None for image in images):
+            raise UploadError("Invalid Base64 image")
+        return data, _non_empty(images)
+
+    if req.mimetype == 'multipart/form-data':
+        files = req.files.getlist('images') or req.files.getlist('image')
+        return req.form.to_dict(), _non_empty([file.read() for file in files])
+
+    if req.mimetype in IMAGE_MIMETYPES:
+        body = _read_body(req.stream, limit)
+        return req.args.to_dict(), [body] if body else []
+
+    raise UploadError("Unsupported Content-Type (JSON, multipart/form-data or image/*)", status=415)
+
+
+def _non_empty(images):
+    """Pusty plik / pusty data URL nie jest obrazem - 400 zamiast błędu dekodowania (500)."""
+    if any(not image for image in images):
+        raise UploadError("Empty image")
+    return images
+
+
+def _read_body(stream, limit, chunk_size=64 * 1024):
+    """Czyta body kawałkami - bez Content-Length (chunked) limit pilnujemy przy czytaniu."""
+    body = bytearray()
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return bytes(body)
+        body += chunk
+        if limit and len(body) > limit:
+            raise UploadError(f"Request too large (max {limit} bytes)", status=413)
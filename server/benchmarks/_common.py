@@ -0,0 +1,135 @@
+"""
+Wspólne narzędzia benchmarków: aplikacja na tymczasowej bazie, seedowanie, pomiar czasu.
+
+Uruchamiaj z katalogu server/, np.:
+    python -m benchmarks.bench_id_allocator --employees 100000
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+import statistics
+from datetime import datetime, timedelta
+from flask import Flask
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.utils.db import db  # noqa: E402
+
+
+def make_app(db_path=None, **config):
+    """Minimalna aplikacja Flask (bez blueprintów i schedulera) na osobnej bazie SQLite."""
+    if db_path is None:
+        fd, db_path = tempfile.mkstemp(suffix=".db", prefix="bench_")
+        os.close(fd)
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config.update(config)
+    db.init_app(app)
+
+    with app.app_context():
+        from app.models.employee import Employee  # noqa: F401
+        from app.models.employee_face import FaceCredential  # noqa: F401
+        from app.models.qr_code import QRCredential  # noqa: F401
+        from app.models.access_log import AccessLog  # noqa: F401
+        from app.models.id_pool import IdSequence, FreeEmployeeId  # noqa: F401
+        from app.models.job_checkpoint import JobCheckpoint  # noqa: F401
+        db.create_all()
+
+    app.bench_db_path = db_path
+    return app
+
+
+def seed_employees(count, start_id=1, batch=10000, skip_every=0):
+    """Wstawia `count` pracowników; skip_every > 0 zostawia co n-te ID wolne (luki)."""
+    from sqlalchemy import insert
+    from app.models.employee import Employee
+
+    rows = []
+    employee_id = start_id
+    for _ in range(count):
+        if skip_every and employee_id % skip_every == 0:
+            employee_id += 1
+        rows.append({
+            "id": employee_id,
+            "first_name": "Bench",
+            "last_name": f"User{employee_id}",
+            "email": f"bench{employee_id}@example.com",
+        })
+        employee_id += 1
+        if len(rows) >= batch:
+            db.session.execute(insert(Employee), rows)
+            rows = []
+    if rows:
+        db.session.execute(insert(Employee), rows)
+    db.session.commit()
+
+
+TS_FORMAT = "%Y-%m-%d %H:%M:%S.%f"  # format DateTime w SQLite (SQLAlchemy)
+
+
+def seed_access_logs(conn, rows, employees, days, batch=100000, seed=42):
+    """Wstawia `rows` logów z ostatnich `days` dni (surowy SQL - bez liczników rollup)."""
+    now = datetime.utcnow()
+    span = days * 86400
+    statuses = ("granted", "granted", "granted", "denied")
+    methods = ("qr", "face")
+    rnd = random.Random(seed)
+    for start in range(0, rows, batch):
+        conn.exec_driver_sql(
+            "INSERT INTO access_log (employee_id, status, verification_method, timestamp) VALUES (?, ?, ?, ?)",
+            [(
+                rnd.randint(1, employees),
+                rnd.choice(statuses),
+                rnd.choice(methods),
+                (now - timedelta(seconds=rnd.randint(0, span))).strftime(TS_FORMAT),
+            ) for _ in range(min(batch, rows - start))]
+        )
+        print(f"  access_log: {min(start + batch, rows)}/{rows}", end="\r")
+    print()
+
+
+def seed_qr_codes(conn, employees, seed=42):
+    """Kod "qr-<id>" na pracownika, wygasanie losowo od -10 do +28 dni."""
+    now = datetime.utcnow()
+    rnd = random.Random(seed)
+    conn.exec_driver_sql(
+        'INSERT INTO "QRCredential" (employee_id, qr_code_data, expires_at, is_active) VALUES (?, ?, ?, 1)',
+        [(i, f"qr-{i}", (now + timedelta(days=rnd.randint(-10, 28))).strftime(TS_FORMAT))
+         for i in range(1, employees + 1)]
+    )
+
+
+def summarize(samples, elapsed=None):
+    """Statystyki czasów (ms); elapsed (s) - całkowity czas ściany, do przepustowości."""
+    samples = sorted(samples)
+    if not samples:
+        return {"runs": 0}
+    result = {
+        "runs": len(samples),
+        "mean_ms": statistics.fmean(samples),
+        "p50_ms": samples[len(samples) // 2],
+        "p99_ms": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+        "max_ms": samples[-1],
+    }
+    if elapsed:
+        result["throughput_rps"] = len(samples) / elapsed
+    return result
+
+
+def measure(fn, repeat):
+    """Woła fn() `repeat` razy, zwraca statystyki czasów w milisekundach."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+
+def print_result(name, result):
+    print(f"{name:<40} mean {result['mean_ms']:8.3f} ms   p50 {result['p50_ms']:8.3f} ms   "
+          f"p99 {result['p99_ms']:8.3f} ms   ({result['runs']} runs)")
@@ -0,0 +1,94 @@
+"""
+Plany zapytań (EXPLAIN QUERY PLAN) i czasy dla /logs, /stats, /raport
+i refresh_expired_qr_codes - bez indeksów i z indeksami z migracji 3f1a9c2d7b10.
+
+    python -m benchmarks.bench_access_log_indexes --rows 10000000 --employees 5000
+"""
+import argparse
+import os
+from datetime import datetime, timedelta
+from benchmarks._common import (make_app, seed_employees, seed_access_logs, seed_qr_codes,
+                                measure, print_result, TS_FORMAT)
+from app.utils.db import db
+
+INDEXES = {
+    "ix_access_log_timestamp_status": 'access_log (timestamp, status)',
+    "ix_access_log_employee_timestamp": 'access_log (employee_id, timestamp)',
+    "ix_access_log_status_timestamp": 'access_log (status, timestamp)',
+    "ix_qrcredential_active_expires": '"QRCredential" (is_active, expires_at)',
+    "ix_QRCredential_employee_id": '"QRCredential" (employee_id)',
+}
+
+def queries(employees):
+    now = datetime.utcnow()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0).strftime(TS_FORMAT)
+    month_ago = (now - timedelta(days=30)).strftime(TS_FORMAT)
+    week_ago = (now - timedelta(days=7)).strftime(TS_FORMAT)
+    now_s = now.strftime(TS_FORMAT)
+    employee_id = employees // 2
+    return {
+        "stats: today_access": (
+            "SELECT count(*) FROM access_log WHERE timestamp >= ?", (today,)),
+        "stats: today_denied": (
+            "SELECT count(*) FROM access_log WHERE timestamp >= ? AND status = 'denied'", (today,)),
+        "logs: latest 50": (
+            "SELECT * FROM access_log ORDER BY timestamp DESC LIMIT 50", ()),
+        "raport: employee, 30 days": (
+            "SELECT * FROM access_log WHERE employee_id = ? AND timestamp >= ? AND timestamp <= ? "
+            "ORDER BY timestamp DESC", (employee_id, month_ago, now_s)),
+        "raport: denied, 7 days": (
+            "SELECT * FROM access_log WHERE status = 'denied' AND timestamp >= ? AND timestamp <= ? "
+            "ORDER BY timestamp DESC", (week_ago, now_s)),
+        "qr: expired active codes": (
+            'SELECT id FROM "QRCredential" WHERE is_active = 1 AND expires_at IS NOT NULL '
+            'AND expires_at < ? ORDER BY expires_at', (now_s,)),
+    }
+
+
+def run_queries(conn, employees, runs):
+    for name, (sql, params) in queries(employees).items():
+        plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+        print(f"  {name}")
+        for row in plan:
+            print(f"      plan: {row[-1]}")
+        result = measure(lambda: conn.exec_driver_sql(sql, params).fetchall(), runs)
+        print_result("      time", result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--employees", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--keep-db", action="store_true", help="nie usuwaj bazy po benchmarku")
+    args = parser.parse_args()
+
+    app = make_app()
+    print(f"DB: {app.bench_db_path}")
+    try:
+        with app.app_context():
+            seed_employees(args.employees)
+            with db.engine.begin() as conn:
+                seed_access_logs(conn, args.rows, args.employees, args.days)
+                seed_qr_codes(conn, args.employees)
+
+            with db.engine.connect() as conn:
+                for name in INDEXES:
+                    conn.exec_driver_sql(f'DROP INDEX IF EXISTS "{name}"')
+                conn.exec_driver_sql("ANALYZE")
+                print("\n=== WITHOUT indexes ===")
+                run_queries(conn, args.employees, args.runs)
+
+                for name, target in INDEXES.items():
+                    conn.exec_driver_sql(f'CREATE INDEX IF NOT EXISTS "{name}" ON {target}')
+                conn.exec_driver_sql("ANALYZE")
+                print("\n=== WITH indexes ===")
+                run_queries(conn, args.employees, args.runs)
+    finally:
+        if not args.keep_db:
+            os.remove(app.bench_db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Profil "enroll": num_jitters (ile losowych przesunięć twarzy uśrednia dlib) - czas
+encodingu jednego zdjęcia i odległość wzorca od encodingów weryfikacyjnych
+(profil "verify", num_jitters=1) z wariantów tego samego zdjęcia.
+
+Czas rośnie mniej więcej liniowo z num_jitters, a rejestracja wsadowa
+(/api/employees/register/batch) liczy jeden encoding na osobę - ten sam mnożnik.
+
+    python -m benchmarks.bench_enroll_jitters --images ../faces_test --jitters 1 5 10
+"""
+import argparse
+import os
+import numpy as np
+from benchmarks._common import measure, print_result
+from benchmarks.bench_face_detectors import load_images, ROOT
+from app.services.face_service import FaceServices, DEFAULT_FACE_PROFILES
+from app.services.face_detectors import get_detector
+
+
+def locate(image, profile):
+    small, scale = FaceServices.downscale(image, profile["max_dimension"])
+    locations = get_detector("dlib").detect(small, profile)
+    if not locations:
+        return None
+    return FaceServices.scale_locations(locations[:1], scale, image.shape)[0]
+
+
+def main():
+    import face_recognition
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", default=os.path.join(ROOT, "faces_test"))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--jitters", type=int, nargs="+", default=[1, 5, 10])
+    args = parser.parse_args()
+
+    enroll = dict(DEFAULT_FACE_PROFILES["enroll"])
+    verify = dict(DEFAULT_FACE_PROFILES["verify"])
+    images = load_images(args.images)
+
+    # Oryginały do rejestracji, warianty (pomniejszony, ciemny, obrócony, lustro) do weryfikacji
+    originals = {name: image for name, image in images.items() if "(" not in name}
+    probes = {}
+    for name, image in images.items():
+        location = locate(image, verify)
+        if location is not None and "(" in name:
+            probes.setdefault(name.split(" (")[0], []).append(
+                face_recognition.face_encodings(image, [location], num_jitters=1)[0])
+    print(f"{len(originals)} enrollment images, {sum(map(len, probes.values()))} verification probes "
+          f"from {args.images}\n")
+
+    for jitters in args.jitters:
+        samples, distances = [], []
+        for name, image in originals.items():
+            location = locate(image, enroll)
+            if location is None:
+                continue
+            result = measure(lambda: face_recognition.face_encodings(image, [location], num_jitters=jitters),
+                             args.repeat)
+            samples.append(result["p50_ms"])
+            template = face_recognition.face_encodings(image, [location], num_jitters=jitters)[0]
+            distances.extend(float(np.linalg.norm(template - probe)) for probe in probes.get(name, []))
+
+        if not samples:
+            print(f"=== num_jitters={jitters}: no faces found ===\n")
+            continue
+        print(f"=== num_jitters={jitters} ===")
+        print_result("  encode (p50 per image)", {
+            "runs": len(samples), "mean_ms": float(np.mean(samples)),
+            "p50_ms": float(np.median(samples)), "p99_ms": float(np.percentile(samples, 99)),
+        })
+        if distances:
+            print(f"  distance template vs probes: mean {np.mean(distances):.3f}, "
+                  f"max {np.max(distances):.3f} (tolerance 0.6)")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Podgląd dashboardu: odpytywanie /api/admin/logs + /api/admin/stats vs strumień SSE (/api/admin/events).
+
+Odpytywanie: koszt jednego odświeżenia (oba requesty) na zasianej bazie - przy V widzach
+i odświeżaniu co T sekund to V / T takich par na sekundę, niezależnie od ruchu na bramkach.
+SSE: koszt publikacji jednego zdarzenia przy V subskrybentach, z wątkami czytającymi
+bufory jak generator endpointu - baza nie jest dotykana, koszt rośnie tylko z liczbą zdarzeń.
+
+    python -m benchmarks.bench_event_stream --viewers 1,10,100 --logs 200000
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+import numpy as np
+from benchmarks._common import measure, print_result
+from benchmarks.suite import build_app, seed
+from app.services.event_bus import EventBus
+from app.utils.db import db
+
+
+def poll_cost(app, repeat):
+    client = app.test_client()
+
+    def refresh():
+        stats = client.get("/api/admin/stats").get_json()
+        client.get("/api/admin/logs", query_string={"limit": max(min(stats["today_access"], 500), 1)}).close()
+
+    refresh()
+    return measure(refresh, repeat)
+
+
+def publish_cost(viewers, events):
+    bus = EventBus(max_subscribers=viewers)
+    subscriptions = [bus.subscribe() for _ in range(viewers)]
+    received = [0] * viewers
+
+    def reader(index, subscription):
+        while not subscription.closed:
+            _, batch = subscription.get(timeout=0.5)
+            received[index] += len(batch)
+
+    threads = [threading.Thread(target=reader, args=(i, s), daemon=True) for i, s in enumerate(subscriptions)]
+    for thread in threads:
+        thread.start()
+
+    event = {"id": 1, "employee_id": 42, "employee_name": "Jan Kowalski", "status": "granted",
+             "verification_method": "qr+face", "timestamp": "2026-01-01T08:00:00"}
+    start = time.perf_counter()
+    for _ in range(events):
+        bus.publish("access", event)
+    elapsed = time.perf_counter() - start
+
+    # Zdarzenia dostarczone albo odrzucone z przepełnionego bufora (klient dostaje wtedy "resync")
+    deadline = time.time() + 10
+    while sum(received) + sum(s.dropped for s in subscriptions) < viewers * events and time.time() < deadline:
+        time.sleep(0.01)
+    delivered = time.perf_counter() - start
+    bus.clear()
+    return elapsed / events * 1000, delivered, sum(received), sum(s.dropped for s in subscriptions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, default=2000)
+    parser.add_argument("--logs", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--viewers", default="1,10,100")
+    parser.add_argument("--refresh", type=float, default=5.0, help="odświeżanie dashboardu przy odpytywaniu (s)")
+    parser.add_argument("--events", type=int, default=2000, help="zdarzenia publikowane na szynę")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    fd, db_path = tempfile.mkstemp(suffix=".db", prefix="bench_events_")
+    os.close(fd)
+    app = build_app(db_path)
+    try:
+        print(f"Seeding {args.employees} employees, {args.logs} access logs ...")
+        seed(app, args.employees, args.logs, args.days, np.random.default_rng(0))
+        poll = poll_cost(app, args.repeat)
+    finally:
+        from app.services.access_log_writer import access_log_writer
+        access_log_writer.shutdown()
+        with app.app_context():
+            db.engine.dispose()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+    print_result("\none dashboard refresh (/stats + /logs)", poll)
+    for viewers in (int(v) for v in args.viewers.split(",")):
+        per_event_ms, delivered, received, dropped = publish_cost(viewers, args.events)
+        polling_load = viewers / args.refresh * poll["mean_ms"] / 1000
+        print(f"{viewers:>5} viewers | polling every {args.refresh:g}s: {viewers / args.refresh:7.1f} refreshes/s, "
+              f"{polling_load * 100:6.1f}% of one core | SSE: publish {per_event_ms * 1000:7.1f} us/event, "
+              f"{received}/{viewers * args.events} delivered, {dropped} dropped (bounded buffers) in {delivered:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
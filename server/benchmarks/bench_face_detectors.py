@@ -0,0 +1,96 @@
+"""
+Detektory twarzy: dlib HOG vs kaskady OpenCV (Haar / LBP) - czas detekcji, odsetek trafień
+i zgodność encodingu liczonego z ramki danego detektora z encodingiem z ramki dlib.
+
+Zbiór: obrazy z --images (domyślnie faces_test/) + warianty każdego (pomniejszony,
+ciemniejszy, obrócony o kilka stopni, lustrzane odbicie).
+
+    python -m benchmarks.bench_face_detectors --images ../faces_test --repeat 20
+    python -m benchmarks.bench_face_detectors --cascade-dir /sciezka/do/opencv/data/lbpcascades
+"""
+import argparse
+import os
+import numpy as np
+from PIL import Image, ImageOps
+from benchmarks._common import measure, print_result
+from app.services.face_service import FaceServices, DEFAULT_FACE_PROFILES
+from app.services.face_detectors import available_detectors, get_detector
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+def load_images(directory):
+    images = {}
+    for filename in sorted(os.listdir(directory)):
+        if not filename.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        with Image.open(os.path.join(directory, filename)) as img:
+            img = img.convert("RGB")
+        width, height = img.size
+        images[filename] = img
+        images[f"{filename} (50%)"] = img.resize((width // 2, height // 2))
+        images[f"{filename} (dark)"] = img.point(lambda v: v // 3)
+        images[f"{filename} (rot 10)"] = img.rotate(10, expand=True)
+        images[f"{filename} (mirror)"] = ImageOps.mirror(img)
+    return {name: np.asarray(img) for name, img in images.items()}
+
+
+def encode(image, location):
+    import face_recognition
+    return face_recognition.face_encodings(image, [location], num_jitters=1)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", default=os.path.join(ROOT, "faces_test"))
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--profile", default="verify", choices=sorted(DEFAULT_FACE_PROFILES))
+    parser.add_argument("--cascade-dir", default=None, help="katalog z kaskadami (np. LBP z repozytorium OpenCV)")
+    args = parser.parse_args()
+
+    profile = FaceServices.get_profile(args.profile)
+    images = load_images(args.images)
+    print(f"{len(images)} images from {args.images}, profile '{args.profile}' "
+          f"(max_dimension {profile['max_dimension']})\n")
+
+    # Jak w FaceServices.get_encoding_from_image: detekcja na pomniejszonej kopii
+    prepared = {name: FaceServices.downscale(image, profile["max_dimension"]) + (image,)
+                for name, image in images.items()}
+
+    reference = {}
+    for name, status in available_detectors(args.cascade_dir).items():
+        if status:
+            print(f"=== {name}: unavailable ({status})\n")
+            continue
+        detector = get_detector(name, args.cascade_dir)
+
+        hits, samples, distances = 0, [], []
+        for image_name, (small, scale, image) in prepared.items():
+            locations = detector.detect(small, profile)
+            result = measure(lambda: detector.detect(small, profile), args.repeat)
+            samples.append(result["p50_ms"])
+            if not locations:
+                continue
+            hits += 1
+            location = FaceServices.scale_locations(locations[:1], scale, image.shape)[0]
+            encoding = encode(image, location)
+            if name == "dlib":
+                reference[image_name] = encoding
+            elif image_name in reference:
+                distances.append(float(np.linalg.norm(encoding - reference[image_name])))
+
+        print(f"=== {name} ===")
+        print_result("  detection (p50 per image)", {
+            "runs": len(samples), "mean_ms": float(np.mean(samples)),
+            "p50_ms": float(np.median(samples)), "p99_ms": float(np.percentile(samples, 99)),
+        })
+        print(f"  hit rate: {hits}/{len(prepared)}")
+        if distances:
+            print(f"  encoding distance vs dlib box: mean {np.mean(distances):.3f}, max {np.max(distances):.3f} "
+                  f"(tolerance 0.6)")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Pamięć i czas identyfikacji indeksu twarzy: float64 (stary format) vs float32 vs int8,
+oraz zgodność wyników z float64.
+
+    python -m benchmarks.bench_face_index_formats --employees 100000 --queries 200
+"""
+import argparse
+import numpy as np
+from benchmarks._common import measure, print_result
+from app.services.face_index import FaceIndex
+
+VARIANTS = {
+    "float64": {"dtype": np.float64},
+    "float32": {"dtype": np.float32},
+    "int8": {"quantize": True},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--employees", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    known = rng.normal(scale=0.09, size=(args.employees, 128))
+    picks = rng.integers(0, args.employees, size=args.queries)
+    queries = known[picks] + rng.normal(scale=0.02, size=(args.queries, 128))
+
+    reference = None
+    for name, kwargs in VARIANTS.items():
+        index = FaceIndex(initial_capacity=args.employees, **kwargs)
+        index.load((i + 1, enc) for i, enc in enumerate(known))
+        results = [index.identify(q) for q in queries]
+
+        if reference is None:
+            reference = results
+        agree = sum(a[0] == b[0] for a, b in zip(results, reference))
+        max_error = max(abs(a[1] - b[1]) for a, b in zip(results, reference))
+
+        print(f"\n=== {name} ===")
+        print(f"  memory: {index.memory_bytes() / 2**20:8.1f} MiB")
+        print(f"  same match as float64: {agree}/{len(queries)}   max distance error: {max_error:.2e}")
+        it = iter(queries)
+        print_result("  identify", measure(lambda: index.identify(next(it)), len(queries)))
+
+
+if __name__ == "__main__":
+    main()
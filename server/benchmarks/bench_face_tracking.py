@@ -0,0 +1,82 @@
+"""
+Sesje śledzenia twarzy: detekcja na pełnej klatce vs tylko w ROI wokół ramki z poprzedniej klatki.
+
+Symuluje kiosk, który wysyła kolejne klatki tej samej osoby: obraz z --image przesuwany
+o kilka pikseli między klatkami (osoba lekko się rusza). Mierzy czas detekcji, odsetek
+klatek obsłużonych z ROI (reszta wraca do pełnej detekcji) i odległość encodingu
+liczonego z ramki z ROI od encodingu z pełnej detekcji.
+
+    python -m benchmarks.bench_face_tracking --frames 20 --shift 12
+    python -m benchmarks.bench_face_tracking --detector haar
+"""
+import argparse
+import io
+import os
+import numpy as np
+from PIL import Image
+from benchmarks._common import print_result, summarize
+from app.services.face_service import FaceServices, DEFAULT_FACE_PROFILES
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DEFAULT_IMAGE = os.path.join(ROOT, "faces_test", "face.jpg")
+
+
+def make_frames(path, count, shift, rng):
+    """Kolejne klatki: obraz przesunięty o losowy krok (dx, dy) względem poprzedniej, jako JPEG."""
+    with Image.open(path) as img:
+        img = img.convert("RGB")
+    frames, dx, dy = [], 0, 0
+    for _ in range(count):
+        dx, dy = dx + int(rng.integers(-shift, shift + 1)), dy + int(rng.integers(-shift, shift + 1))
+        frame = img.transform(img.size, Image.AFFINE, (1, 0, -dx, 0, 1, -dy))
+        buffer = io.BytesIO()
+        frame.save(buffer, format="JPEG", quality=90)
+        frames.append(buffer.getvalue())
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image", default=DEFAULT_IMAGE)
+    parser.add_argument("--frames", type=int, default=20)
+    parser.add_argument("--shift", type=int, default=12, help="maks. przesunięcie między klatkami (px)")
+    parser.add_argument("--margin", type=float, default=0.5, help="poszerzenie ROI (FACE_TRACKING_ROI_MARGIN)")
+    parser.add_argument("--profile", default="verify", choices=sorted(DEFAULT_FACE_PROFILES))
+    parser.add_argument("--detector", default="dlib")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    profile = dict(FaceServices.get_profile(args.profile), detector=args.detector, roi_margin=args.margin)
+    frames = make_frames(args.image, args.frames, args.shift, np.random.default_rng(args.seed))
+    print(f"{len(frames)} frames from {args.image}, shift <= {args.shift}px, "
+          f"detector '{args.detector}', ROI margin {args.margin}\n")
+
+    full_ms, full_encodings = [], []
+    for frame in frames:
+        timings = {}
+        full_encodings.append(FaceServices.get_encoding_from_image(io.BytesIO(frame), profile, timings))
+        full_ms.append(timings["detect"] * 1000)
+
+    # Sesja: pierwsza klatka z pełną detekcją, dalej ROI (fallback liczony razem z próbą w ROI)
+    tracked_ms, roi_hits, distances = [], 0, []
+    track = {}
+    for frame, reference in zip(frames, full_encodings):
+        timings = {}
+        encoding = FaceServices.get_encoding_from_image(io.BytesIO(frame), profile, timings, track)
+        tracked_ms.append((timings.get("detect_roi", 0.0) + timings.get("detect", 0.0)) * 1000)
+        if "detect_roi" in timings and "detect" not in timings:
+            roi_hits += 1
+        if encoding is not None and reference is not None:
+            distances.append(float(np.linalg.norm(encoding - reference)))
+
+    print_result("full-frame detection", summarize(full_ms))
+    print_result("tracked session     ", summarize(tracked_ms))
+    print_result("tracked, ROI frames ", summarize(tracked_ms[1:]))
+    print(f"\nframes served from ROI: {roi_hits}/{len(frames) - 1}")
+    if distances:
+        print(f"encoding distance vs full detection: mean {np.mean(distances):.3f}, "
+              f"max {np.max(distances):.3f} (tolerance 0.6)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Koszt alokacji ID pracownika: stary skan luk vs licznik + free-lista.
+
+    python -m benchmarks.bench_id_allocator --employees 100000 --runs 200
+"""
+import argparse
+import os
+from sqlalchemy import func
+from benchmarks._common import make_app, seed_employees, measure, print_result
+from app.utils.db import db
+from app.models.employee import Employee
+from app.utils.helpers import allocate_employee_ids, release_employee_id
+
+
+def legacy_gap_scan():
+    """Poprzednia implementacja get_next_available_id (min + self-join + max)."""
+    min_id = db.session.query(func.min(Employee.id)).scalar()
+    if min_id is None or min_id > 1:
+        return 1
+    e1 = db.aliased(Employee)
+    e2 = db.aliased(Employee)
+    gap_id = db.session.query(func.min(e1.id + 1)).\
+        outerjoin(e2, e2.id == e1.id + 1).\
+        filter(e2.id == None).\
+        scalar()
+    if gap_id:
+        return gap_id
+    return db.session.query(func.max(Employee.id)).scalar() + 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--employees", type=int, default=100000)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    app = make_app(EMPLOYEE_ID_REUSE_GAPS=True)
+    try:
+        with app.app_context():
+            print(f"Seeding {args.employees} employees...")
+            seed_employees(args.employees)
+
+            # pierwsze wywołanie inicjalizuje licznik (jednorazowy skan)
+            print_result("allocator: first call (seeding)", measure(
+                lambda: (allocate_employee_ids(1), db.session.rollback()), 1))
+            allocate_employee_ids(1)
+            db.session.commit()
+
+            print_result("legacy gap scan", measure(lambda: legacy_gap_scan(), min(args.runs, 20)))
+            print_result("allocator: sequence", measure(
+                lambda: (allocate_employee_ids(1), db.session.rollback()), args.runs))
+            print_result("allocator: sequence + commit", measure(
+                lambda: (allocate_employee_ids(1), db.session.commit()), args.runs))
+
+            def reuse_cycle():
+                release_employee_id(args.employees // 2)
+                db.session.commit()
+                allocate_employee_ids(1)
+                db.session.commit()
+            print_result("allocator: release + reuse", measure(reuse_cycle, args.runs))
+    finally:
+        os.remove(app.bench_db_path)
+
+
+if __name__ == "__main__":
+    main()
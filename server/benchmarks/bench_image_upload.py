@@ -0,0 +1,73 @@
+"""
+Przesyłanie zdjęcia na /verify: base64 w JSON-ie vs multipart/form-data vs surowe body image/jpeg.
+Mierzy rozmiar requestu, czas (parsowanie + dekodowanie obrazu) i szczyt pamięci (tracemalloc).
+
+    python -m benchmarks.bench_image_upload --image faces_test/face.jpg --repeat 50
+"""
+import argparse
+import base64
+import io
+import tracemalloc
+from flask import Flask, jsonify, request
+from werkzeug.test import EnvironBuilder
+from benchmarks._common import measure, print_result
+from app.services.face_service import FaceServices
+from app.utils.uploads import read_face_upload
+
+
+def build_app():
+    """Sam endpoint z parsowaniem i dekodowaniem - bez bazy i bez face_recognition."""
+    app = Flask(__name__)
+    app.config["FACE_UPLOAD_MAX_BYTES"] = 64 * 1024 * 1024
+
+    @app.post("/verify")
+    def verify():
+        fields, images = read_face_upload(request)
+        pixels = FaceServices.load_image(io.BytesIO(images[0]))
+        return jsonify({"qr_code": fields.get("qr_code"), "shape": list(pixels.shape)})
+
+    return app
+
+
+def requests_for(image):
+    data_url = "data:image/jpeg;base64," + base64.b64encode(image).decode("ascii")
+    return {
+        "json base64": lambda: {"json": {"qr_code": "bench", "image": data_url}},
+        "multipart": lambda: {"content_type": "multipart/form-data",
+                              "data": {"qr_code": "bench", "image": (io.BytesIO(image), "face.jpg", "image/jpeg")}},
+        "raw image/jpeg": lambda: {"query_string": {"qr_code": "bench"},
+                                   "data": image, "content_type": "image/jpeg"},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--image", default="../faces_test/face.jpg")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with open(args.image, "rb") as f:
+        image = f.read()
+    print(f"image: {args.image} ({len(image) / 1024:.1f} KiB)\n")
+
+    client = build_app().test_client()
+    for name, make_kwargs in requests_for(image).items():
+        def post():
+            response = client.post("/verify", **make_kwargs())
+            assert response.status_code == 200, response.get_data(as_text=True)
+
+        post()  # rozgrzewka
+        environ = EnvironBuilder(path="/verify", method="POST", **make_kwargs()).get_environ()
+        body_size = int(environ["CONTENT_LENGTH"])
+
+        tracemalloc.start()
+        post()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print_result(name, measure(post, args.repeat))
+        print(f"{'':<40} body {body_size / 1024:8.1f} KiB   peak memory {peak / 1024 / 1024:6.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Kanał WebSocket kiosku (/api/kiosk/stream) vs osobny request HTTP na każdą próbę (/api/auth/verify).
+
+Serwer werkzeug w wątku, baza zasiana jak w benchmarks.suite. Próba = kod QR + jedna klatka.
+HTTP: nowe połączenie, preflight CORS (OPTIONS - przeglądarka wysyła go przed POST image/jpeg)
+i POST. WebSocket: jedno połączenie na cały przebieg. Domyślnie encoding jest podmieniony na
+stały wektor (--real-encoding liczy dlib), żeby mierzyć narzut na próbę, a nie HOG.
+--burst N: kiosk wysyła N klatek naraz, serwer wybiera z nich najlepszą (jak /api/auth/verify).
+
+    python -m benchmarks.bench_kiosk_stream --attempts 200
+    python -m benchmarks.bench_kiosk_stream --attempts 20 --burst 5 --real-encoding
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from contextlib import ExitStack
+from unittest.mock import patch
+from urllib.parse import urlencode
+import numpy as np
+from werkzeug.serving import make_server
+from benchmarks._common import print_result, summarize
+from benchmarks.suite import build_app, seed, valid_qr_codes, DEFAULT_IMAGE
+from app.utils.db import db
+
+HOST, PORT = "127.0.0.1", 5057
+
+
+def http_attempt(qr_code, image, preflight):
+    conn = http.client.HTTPConnection(HOST, PORT)
+    try:
+        path = "/api/auth/verify?" + urlencode({"qr_code": qr_code})
+        if preflight:
+            conn.request("OPTIONS", path, headers={
+                "Origin": "http://localhost:5173", "Access-Control-Request-Method": "POST",
+                "Access-Control-Request-Headers": "content-type"})
+            conn.getresponse().read()
+        conn.request("POST", path, body=image, headers={"Content-Type": "image/jpeg",
+                                                         "Origin": "http://localhost:5173"})
+        response = conn.getresponse()
+        return json.loads(response.read())
+    finally:
+        conn.close()
+
+
+def ws_attempt(ws, qr_code, image, burst, attempt):
+    ws.send(json.dumps({"type": "qr", "qr_code": qr_code, "attempt": attempt}))
+    for _ in range(burst):
+        ws.send(image)
+    while True:
+        message = json.loads(ws.receive(30))
+        if message.get("attempt") == attempt and message["type"] in ("result", "retry", "error"):
+            return message
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--attempts", type=int, default=100)
+    parser.add_argument("--employees", type=int, default=200)
+    parser.add_argument("--burst", type=int, default=1, help="klatek na próbę w kanale WebSocket")
+    parser.add_argument("--image", default=DEFAULT_IMAGE)
+    parser.add_argument("--no-preflight", action="store_true", help="HTTP bez zapytania OPTIONS")
+    parser.add_argument("--real-encoding", action="store_true", help="encoding dlib zamiast stałego wektora")
+    args = parser.parse_args()
+
+    import simple_websocket
+
+    with open(args.image, "rb") as f:
+        image = f.read()
+    fd, db_path = tempfile.mkstemp(suffix=".db", prefix="bench_kiosk_")
+    os.close(fd)
+    app = build_app(db_path)
+    app.config["FACE_POOL_WORKERS"] = 0  # encoding w wątku requestu - podmiana działa w obu ścieżkach
+
+    with ExitStack() as stack:
+        if not args.real_encoding:
+            stack.enter_context(patch("app.services.face_service.FaceServices.get_encoding_from_image",
+                                      return_value=np.zeros(128)))
+            stack.enter_context(patch("app.services.face_service.FaceServices.compare_faces", return_value=True))
+
+        seed(app, args.employees, 0, 1, np.random.default_rng(0))
+        codes = valid_qr_codes(app)
+        server = make_server(HOST, PORT, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            results = {}
+            samples, statuses = [], {}
+            for i in range(args.attempts):
+                start = time.perf_counter()
+                result = http_attempt(codes[i % len(codes)], image, not args.no_preflight)
+                samples.append((time.perf_counter() - start) * 1000)
+                statuses[result.get("status")] = statuses.get(result.get("status"), 0) + 1
+            results["http"] = (summarize(samples), statuses)
+
+            ws = simple_websocket.Client.connect(f"ws://{HOST}:{PORT}/api/kiosk/stream?kiosk_id=bench")
+            ws.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # jak przeglądarka
+            ws.receive(5)  # "ready"
+            samples, statuses = [], {}
+            for i in range(args.attempts):
+                start = time.perf_counter()
+                result = ws_attempt(ws, codes[i % len(codes)], image, args.burst, i)
+                samples.append((time.perf_counter() - start) * 1000)
+                key = result.get("status") or result.get("reason") or result["type"]
+                statuses[key] = statuses.get(key, 0) + 1
+            ws.close()
+            results["websocket"] = (summarize(samples), statuses)
+        finally:
+            server.shutdown()
+            from app.services.access_log_writer import access_log_writer
+            access_log_writer.shutdown()
+            with app.app_context():
+                db.engine.dispose()
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(db_path + suffix):
+                    os.remove(db_path + suffix)
+
+    from app.utils import metrics
+    print(f"{args.attempts} attempts, encoding: {'dlib' if args.real_encoding else 'stubbed'}, "
+          f"preflight: {not args.no_preflight}, websocket burst: {args.burst}\n")
+    for name, (result, statuses) in results.items():
+        print_result(f"{name:<10}", result)
+        print(f"           outcomes: {statuses}")
+    print(f"\nwebsocket frames dropped as stale: {metrics.KIOSK_STREAM_FRAMES.value(result='dropped')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Przepustowość zdarzeń bramki (zapis AccessLog, commit na zdarzenie) przy równoległych
+odczytach dashboardu - domyślne ustawienia SQLite vs WAL + PRAGMA z app/config.py.
+
+    python -m benchmarks.bench_sqlite_tuning --writers 4 --readers 2 --seconds 10
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import func
+from benchmarks._common import make_app, seed_employees
+from app.utils.db import db, install_sqlite_pragmas, sqlite_settings
+from app.config import Config, engine_options, sqlite_pragmas
+
+
+def percentile(samples, q):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def build_app(tuned, employees):
+    if tuned:
+        config = {key: getattr(Config, key) for key in dir(Config) if key.isupper()}
+        fd, db_path = tempfile.mkstemp(suffix=".db", prefix="bench_")
+        os.close(fd)
+        app = make_app(db_path, SQLALCHEMY_ENGINE_OPTIONS=engine_options(config, f"sqlite:///{db_path}"))
+        with app.app_context():
+            install_sqlite_pragmas(db.engine, sqlite_pragmas(config))
+            db.engine.dispose()  # połączenia z create_all() nie mają jeszcze PRAGMA
+    else:
+        app = make_app()
+    with app.app_context():
+        seed_employees(employees)
+        settings = sqlite_settings(db.engine)
+    return app, settings
+
+
+def writer(app, stop, stats, employees, worker):
+    from app.models.access_log import AccessLog
+    employee_id = worker % employees + 1
+    with app.app_context():
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                db.session.add(AccessLog(employee_id=employee_id, status="granted",
+                                         verification_method="qr", timestamp=datetime.utcnow()))
+                db.session.commit()
+                stats["write_ms"].append((time.perf_counter() - start) * 1000)
+            except Exception:
+                db.session.rollback()
+                stats["write_errors"] += 1
+        db.session.remove()
+
+
+def reader(app, stop, stats):
+    from app.models.access_log import AccessLog
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    with app.app_context():
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                db.session.query(func.count(AccessLog.id)).filter(AccessLog.timestamp >= today).scalar()
+                AccessLog.query.order_by(AccessLog.timestamp.desc()).limit(50).all()
+                db.session.rollback()  # koniec transakcji odczytu
+                stats["read_ms"].append((time.perf_counter() - start) * 1000)
+            except Exception:
+                db.session.rollback()
+                stats["read_errors"] += 1
+        db.session.remove()
+
+
+def run(app, writers, readers, seconds, employees):
+    stats = {"write_ms": [], "read_ms": [], "write_errors": 0, "read_errors": 0}
+    stop = threading.Event()
+    threads = [threading.Thread(target=writer, args=(app, stop, stats, employees, i)) for i in range(writers)]
+    threads += [threading.Thread(target=reader, args=(app, stop, stats)) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return stats
+
+
+def report(name, settings, stats, seconds):
+    writes, reads = stats["write_ms"], stats["read_ms"]
+    print(f"\n=== {name} ===")
+    print(f"  settings: {settings}")
+    print(f"  door events: {len(writes) / seconds:9.1f} /s   "
+          f"p50 {percentile(writes, 0.5):7.2f} ms   p99 {percentile(writes, 0.99):7.2f} ms   "
+          f"errors {stats['write_errors']}")
+    print(f"  dashboard:   {len(reads) / seconds:9.1f} /s   "
+          f"p50 {percentile(reads, 0.5):7.2f} ms   p99 {percentile(reads, 0.99):7.2f} ms   "
+          f"errors {stats['read_errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--employees", type=int, default=1000)
+    args = parser.parse_args()
+
+    for name, tuned in (("default (rollback journal)", False), ("tuned (WAL + pragmas)", True)):
+        app, settings = build_app(tuned, args.employees)
+        try:
+            stats = run(app, args.writers, args.readers, args.seconds, args.employees)
+            report(name, settings, stats, args.seconds)
+        finally:
+            with app.app_context():
+                db.engine.dispose()
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(app.bench_db_path + suffix):
+                    os.remove(app.bench_db_path + suffix)
+
+
+if __name__ == "__main__":
+    main()
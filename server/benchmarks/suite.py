@@ -0,0 +1,288 @@
+"""
+Zestaw benchmarków gorących ścieżek serwera na pełnej aplikacji (create_app) i zasianej bazie.
+
+Baza: N pracowników z syntetycznymi wzorcami twarzy i kodami QR, M logów dostępu.
+Scenariusze: /api/auth/qr, /api/auth/face (faces_test/face.jpg), /api/admin/logs,
+/api/admin/raport, /api/admin/stats, rejestracja i refresh_expired_qr_codes.
+Wynik (przepustowość, p50/p99) idzie do pliku JSON; --compare porównuje z poprzednim
+przebiegiem i kończy się kodem 1, gdy któraś ścieżka zwolniła ponad --threshold.
+
+    python -m benchmarks.suite --employees 5000 --logs 200000 --seed 1
+    python -m benchmarks.suite --only qr,logs --compare benchmarks/results/poprzedni.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import numpy as np
+from benchmarks._common import seed_employees, seed_access_logs, seed_qr_codes, summarize, TS_FORMAT
+from app.utils.db import db
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DEFAULT_IMAGE = os.path.join(ROOT, "faces_test", "face.jpg")
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+# ------------------------------
+# Aplikacja i dane
+# ------------------------------
+def build_app(db_path):
+    from main import create_app
+    return create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}",
+        "SCHEDULER_ENABLED": False,
+    })
+
+
+def seed(app, employees, logs, days, rng):
+    """Zasiewa bazę i przeładowuje to, co create_app() wczytał przy starcie (indeks, cache, liczniki)."""
+    from app.services.encoding_format import pack
+    from app.services.face_index import face_index
+    from app.services.qr_cache import qr_cache
+    from app.services.stats_rollup import rebuild_rollups
+
+    seed_value = int(rng.integers(2**31))
+    with app.app_context():
+        seed_employees(employees)
+        encodings = rng.normal(scale=0.09, size=(employees, 128))
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql(
+                "INSERT INTO face_credential (employee_id, face_encoding, source) VALUES (?, ?, 'enroll')",
+                [(i + 1, pack(encoding)) for i, encoding in enumerate(encodings)]
+            )
+            seed_qr_codes(conn, employees, seed=seed_value)
+            seed_access_logs(conn, logs, employees, days, seed=seed_value)
+        rebuild_rollups()
+        face_index.load_from_db()
+        qr_cache.warm()
+
+
+def valid_qr_codes(app):
+    from app.models.qr_code import QRCredential
+    with app.app_context():
+        rows = db.session.query(QRCredential.qr_code_data)\
+            .filter(QRCredential.is_active.is_(True), QRCredential.expires_at > datetime.utcnow()).all()
+        return [code for (code,) in rows]
+
+
+# ------------------------------
+# Scenariusze
+# ------------------------------
+def http_scenarios(args, app, image, rng):
+    """nazwa -> (liczba requestów, funkcja i -> argumenty client.open)."""
+    codes = valid_qr_codes(app)
+    today = datetime.utcnow().date()
+    run_id = int(time.time())
+    # Losowania z góry - generator numpy nie jest bezpieczny wątkowo (--concurrency)
+    qr_picks = [codes[k] for k in rng.integers(len(codes), size=max(args.requests, 1))]
+    face_picks = rng.integers(1, args.employees + 1, size=max(args.face_requests, 1)).tolist()
+
+    def qr(i):
+        return {"path": "/api/auth/qr", "method": "POST", "json": {"qr_code": qr_picks[i % len(qr_picks)]}}
+
+    def face(i):
+        return {"path": "/api/auth/face", "method": "POST", "data": image, "content_type": "image/jpeg",
+                "query_string": {"employee_id": face_picks[i % len(face_picks)]}}
+
+    def logs(i):
+        return {"path": "/api/admin/logs", "query_string": {"limit": 50}}
+
+    def raport(i):
+        return {"path": "/api/admin/raport", "query_string": {
+            "date_from": (today - timedelta(days=7)).isoformat(), "date_to": today.isoformat(),
+            "page_size": 500}}
+
+    def stats(i):
+        return {"path": "/api/admin/stats"}
+
+    def register(i):
+        return {"path": "/api/employees/register", "method": "POST", "data": image,
+                "content_type": "image/jpeg", "query_string": {
+                    "first_name": "Bench", "last_name": f"Register{i}",
+                    "email": f"bench.register.{run_id}.{i + 1000}@example.com"}}
+
+    return {
+        "qr": (args.requests, qr),
+        "face": (args.face_requests, face),
+        "logs": (args.requests, logs),
+        "raport": (args.requests, raport),
+        "stats": (args.requests, stats),
+        "register": (args.face_requests, register),
+    }
+
+
+def run_http(app, count, make_request, concurrency, warmup):
+    local = threading.local()
+
+    def one(i):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = app.test_client()
+        start = time.perf_counter()
+        response = client.open(**make_request(i))
+        elapsed = (time.perf_counter() - start) * 1000
+        response.close()
+        return elapsed, response.status_code
+
+    for i in range(warmup):
+        one(-1 - i)  # ujemne i: rejestracja dostaje osobne adresy e-mail
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(one, range(count)))
+    result = summarize([ms for ms, _ in results], time.perf_counter() - started)
+
+    statuses = {}
+    for _, status in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    result["status_codes"] = statuses
+    result["errors"] = sum(n for status, n in statuses.items() if int(status) >= 500)
+    return result
+
+
+def run_refresh(app, runs, expire_count):
+    """Każdy przebieg: `expire_count` kodów cofniętych w przeszłość, potem jedna rotacja."""
+    from app.utils.helpers import refresh_expired_qr_codes
+
+    samples = []
+    started = time.perf_counter()
+    with app.app_context():
+        for _ in range(runs):
+            past = (datetime.utcnow() - timedelta(days=1)).strftime(TS_FORMAT)
+            with db.engine.begin() as conn:
+                conn.exec_driver_sql(
+                    'UPDATE "QRCredential" SET expires_at = ? WHERE id IN '
+                    '(SELECT id FROM "QRCredential" WHERE is_active = 1 ORDER BY random() LIMIT ?)',
+                    (past, expire_count)
+                )
+            start = time.perf_counter()
+            refresh_expired_qr_codes()
+            samples.append((time.perf_counter() - start) * 1000)
+            db.session.remove()
+    result = summarize(samples, time.perf_counter() - started)
+    result["codes_per_run"] = expire_count
+    return result
+
+
+# ------------------------------
+# Wynik i porównanie
+# ------------------------------
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_row(name, result):
+    if not result.get("runs"):
+        print(f"{name:<10} (no runs)")
+        return
+    print(f"{name:<10} {result.get('throughput_rps', 0):9.1f} req/s   p50 {result['p50_ms']:9.2f} ms   "
+          f"p99 {result['p99_ms']:9.2f} ms   ({result['runs']} runs, statuses {result.get('status_codes', '-')})")
+
+
+def compare(current, baseline, threshold):
+    """Drukuje zmianę p50/p99 względem bazowego pliku; zwraca nazwy ścieżek z regresją."""
+    regressions = []
+    print(f"\n=== vs {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')}) ===")
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if not before or not before.get("runs") or not result.get("runs"):
+            continue
+        ratios = {key: result[key] / before[key] for key in ("p50_ms", "p99_ms") if before[key] > 0}
+        flag = "  REGRESSION" if any(ratio > threshold for ratio in ratios.values()) else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:<10} p50 x{ratios.get('p50_ms', 1):5.2f}   p99 x{ratios.get('p99_ms', 1):5.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, default=2000)
+    parser.add_argument("--logs", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=90, help="rozrzut logów w czasie")
+    parser.add_argument("--requests", type=int, default=300, help="requesty na szybki scenariusz")
+    parser.add_argument("--face-requests", type=int, default=20, help="requesty /face i rejestracji")
+    parser.add_argument("--refresh-runs", type=int, default=5)
+    parser.add_argument("--refresh-codes", type=int, default=500, help="kody wygaszane przed każdą rotacją")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--image", default=DEFAULT_IMAGE)
+    parser.add_argument("--only", help="lista scenariuszy po przecinku (qr,face,logs,raport,stats,register,refresh)")
+    parser.add_argument("--output", help="plik JSON (domyślnie benchmarks/results/suite-<czas>-<commit>.json)")
+    parser.add_argument("--compare", help="poprzedni plik JSON do porównania")
+    parser.add_argument("--threshold", type=float, default=1.25, help="dopuszczalny wzrost p50/p99 (x)")
+    args = parser.parse_args()
+
+    only = set(args.only.split(",")) if args.only else None
+    rng = np.random.default_rng(args.seed)
+    with open(args.image, "rb") as f:
+        image = f.read()
+
+    fd, db_path = tempfile.mkstemp(suffix=".db", prefix="bench_suite_")
+    os.close(fd)
+    app = build_app(db_path)
+    try:
+        print(f"Seeding {args.employees} employees, {args.logs} access logs ...")
+        seed(app, args.employees, args.logs, args.days, rng)
+
+        results = {}
+        for name, (count, make_request) in http_scenarios(args, app, image, rng).items():
+            if only and name not in only:
+                continue
+            results[name] = run_http(app, count, make_request, args.concurrency, args.warmup)
+            print_row(name, results[name])
+        if not only or "refresh" in only:
+            results["refresh"] = run_refresh(app, args.refresh_runs, min(args.refresh_codes, args.employees))
+            print_row("refresh", results["refresh"])
+    finally:
+        from app.services.access_log_writer import access_log_writer
+        from app.services.face_pool import face_pool
+        access_log_writer.shutdown()
+        face_pool.shutdown()
+        with app.app_context():
+            db.engine.dispose()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+    commit = git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"suite-{datetime.now():%Y%m%d-%H%M%S}-{commit or 'nogit'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            print(f"Regressions (> x{args.threshold}): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
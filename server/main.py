@@ -1,22 +1,28 @@
 import warnings 
 warnings.filterwarnings("ignore", category=UserWarning, module='face_recognition_models')
 import os
+import time
 import atexit
+from datetime import datetime, timedelta, timezone
 from flask import Flask
 from flask_cors import CORS
 from flask_migrate import Migrate
 from apscheduler.schedulers.background import BackgroundScheduler
-from app.utils.helpers import refresh_expired_qr_codes
-from app.utils.db import db
+from app.utils.helpers import refresh_expired_qr_codes, next_qr_expiry
+from app.utils.db import db, install_sqlite_pragmas, sqlite_settings
+from app.utils import metrics
+from app.services import face_detectors
+from app.config import Config, database_uri, engine_options, sqlite_pragmas
 
 
 # GLOBAL migrate object
-migrate = Migrate()
+migrate = Migrate(render_as_batch=True)  # SQLite: ALTER TABLE przez kopię tabeli
 
-def create_app():
+def create_app(config=None):
     """
     Main Flask application factory.
     Sets up the app, database, and blueprints.
+    config: optional overrides applied on top of the defaults below (e.g. benchmarks).
     """
 
     # ------------------------------
@@ -28,7 +34,7 @@ def create_app():
         r"/api/*": {
             "origins": ["http://localhost:5000","http://localhost:5173"],
             "methods": ["GET", "POST", "PUT", "DELETE"],
-            "allow_headers": ["Content-Type"]
+            "allow_headers": ["Content-Type", "X-Kiosk-Id"]
         }
     })
 
@@ -38,19 +44,124 @@ def create_app():
     # Absolute path to SQLite DB inside instance/
     db_path = os.path.join(app.instance_path, "access_system.db")
 
-    # Database config
-    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
+    # Database config (app/config.py: DATABASE_URL, PRAGMA SQLite, pula połączeń)
+    app.config.from_object(Config)
+    app.config["SQLALCHEMY_DATABASE_URI"] = database_uri(app.config, db_path)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config, app.config["SQLALCHEMY_DATABASE_URI"])
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     app.config["SECRET_KEY"] = "your-secret-key"
 
+    # Cache zdekodowanych wzorców twarzy (/api/auth/face)
+    app.config["FACE_CACHE_MAXSIZE"] = 10000
+    app.config["FACE_CACHE_TTL"] = 3600  # sekundy
+
+    # Nadpisania profili detekcji (app/services/face_service.DEFAULT_FACE_PROFILES),
+    # np. {"verify": {"max_dimension": 640, "model": "cnn"}}
+    app.config["FACE_PROFILES"] = {}
+
+    # Detektor twarzy (app/services/face_detectors.py): "dlib" (HOG/CNN wg profilu),
+    # "haar" (kaskada OpenCV, kilka razy szybsza) albo "lbp" (kaskada z FACE_CASCADE_DIR).
+    # Per profil: FACE_PROFILES = {"verify": {"detector": "haar"}}
+    app.config["FACE_DETECTOR"] = "dlib"
+    app.config["FACE_CASCADE_DIR"] = None  # katalog z plikami kaskad (domyślnie cv2.data.haarcascades)
+
+    # Ocena klatek przed encodingiem (app/services/frame_quality.py): z serii zdjęć
+    # encoding dostaje najlepsze, klatki rozmyte / ciemne / bez twarzy odrzucane od razu.
+    # Nadpisania progów, np. {"min_sharpness": 5.0, "max_burst": 3}
+    app.config["FRAME_QUALITY_ENABLED"] = True
+    app.config["FRAME_QUALITY"] = {}
+
+    # Sesje śledzenia twarzy na kioskach (app/services/face_tracking.py): kolejne klatki
+    # z tego samego kiosku (nagłówek X-Kiosk-Id) i dla tej samej osoby szukają twarzy
+    # tylko w otoczeniu ramki z poprzedniej klatki; pełna detekcja, gdy twarz zniknie z ROI.
+    app.config["FACE_TRACKING_ENABLED"] = True
+    app.config["FACE_TRACKING_TTL"] = 30  # sekundy bez klatki, po których sesja wygasa
+    app.config["FACE_TRACKING_MAX_SESSIONS"] = 256
+    app.config["FACE_TRACKING_ROI_MARGIN"] = 0.5  # poszerzenie ramki z każdej strony (x bok ramki)
+
+    # Zapis wzorców w bazie: float32 | float64 | int8 (app/services/encoding_format.py)
+    app.config["FACE_ENCODING_DTYPE"] = "float32"
+    # Indeks 1:N w pamięci: True = wiersze int8 (~1/8 pamięci float64), False = float32
+    app.config["FACE_INDEX_QUANTIZE"] = False
+
+    # Wiele wzorców twarzy na pracownika (app/services/face_templates.py)
+    app.config["FACE_MAX_TEMPLATES"] = 5
+    # Opt-in: udana weryfikacja /face w przedziale odległości [MIN, MAX] dodaje wzorzec
+    app.config["FACE_AUTO_ADD_TEMPLATES"] = False
+    app.config["FACE_AUTO_ADD_MIN_DISTANCE"] = 0.1   # bliżej = duplikat istniejącego wzorca
+    app.config["FACE_AUTO_ADD_MAX_DISTANCE"] = 0.35  # dalej = za mała pewność
+
+    # Pula procesów do liczenia encodingów (0 = liczenie w wątku requestu)
+    app.config["FACE_POOL_WORKERS"] = max(1, (os.cpu_count() or 2) - 1)
+    app.config["FACE_POOL_QUEUE_SIZE"] = 8
+    app.config["FACE_POOL_TIMEOUT"] = 10.0  # sekundy
+
+    # Alokacja ID pracowników: True = ID usuniętych pracowników wracają do puli
+    app.config["EMPLOYEE_ID_REUSE_GAPS"] = True
+
+    # Logi dostępu zapisywane w tle, paczkami (False = zapis w wątku requestu)
+    app.config["ACCESS_LOG_ASYNC"] = True
+    app.config["ACCESS_LOG_BATCH_SIZE"] = 100
+    app.config["ACCESS_LOG_FLUSH_INTERVAL"] = 1.0  # sekundy
+    app.config["ACCESS_LOG_MAX_QUEUE"] = 10000
+    app.config["ACCESS_LOG_OVERFLOW_POLICY"] = "drop_oldest"  # drop_newest | drop_oldest | block
+
+    # Podgląd zdarzeń na żywo (/api/admin/events, SSE): historia do wznowienia po Last-Event-ID,
+    # bufor na klienta (przepełniony = "resync"), limit otwartych podglądów, keep-alive w sekundach
+    app.config["EVENT_BUS_HISTORY"] = 1000
+    app.config["EVENT_BUS_CLIENT_BUFFER"] = 256
+    app.config["EVENT_BUS_MAX_SUBSCRIBERS"] = 100
+    app.config["EVENT_STREAM_KEEPALIVE"] = 15
+
+    # Maksymalny rozmiar requestu ze zdjęciem (/register, /auth/face, /verify, /identify) - większe dostają 413.
+    # Nie dotyczy /register/batch (strumień NDJSON z wieloma zdjęciami).
+    app.config["FACE_UPLOAD_MAX_BYTES"] = 8 * 1024 * 1024
+
+    # Kanał WebSocket kiosku (/api/kiosk/stream, wymaga flask-sock): limit rozmiaru klatki
+    # jak dla uploadu, ping co 25 s (proxy nie zamyka bezczynnego połączenia)
+    app.config["SOCK_SERVER_OPTIONS"] = {
+        "ping_interval": 25,
+        "max_message_size": app.config["FACE_UPLOAD_MAX_BYTES"],
+        "receive_bytes": 64 * 1024,
+    }
+
+    # Rejestracja wsadowa: ile osób na jedną transakcję
+    app.config["BATCH_ENROLL_CHUNK_SIZE"] = 100
+
+    # Rotacja wygasłych QR: co ile minut (i najpóźniej o najbliższym wygaśnięciu), ile kodów na commit
+    app.config["QR_REFRESH_INTERVAL_MINUTES"] = 5
+    app.config["QR_REFRESH_CHUNK_SIZE"] = 500
+
+    # Cache kodów QR: ile sekund wpis jest ważny bez ponownego odczytu z bazy.
+    # Zmiany z innych procesów (kilka workerów) widać najpóźniej po tym czasie; None = jeden proces
+    app.config["QR_CACHE_TTL"] = 60
+
+    # Metryki (/api/admin/metrics): czasy requestów, etapów rozpoznawania twarzy, zapytań SQL, jobów
+    app.config["METRICS_ENABLED"] = True
+
+    # Scheduler jobów w tle (rotacja QR); False np. w benchmarkach
+    app.config["SCHEDULER_ENABLED"] = True
+
+    if config:
+        app.config.update(config)
+        if "SQLALCHEMY_ENGINE_OPTIONS" not in config:
+            app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config, app.config["SQLALCHEMY_DATABASE_URI"])
+
+    # Nieznana nazwa detektora (np. "hog") - błąd przy starcie, nie 500 na każdym requeście
+    face_detectors.validate_config(app.config)
+
     # Initialize DB + migrations
     db.init_app(app)
     migrate.init_app(app, db)
+    metrics.init_app(app)
 
     # ----------------------------------------
     # KONTEKST APLIKACJI I TWORZENIE BAZY
     # ----------------------------------------
     with app.app_context():
+        # 0. PRAGMA SQLite na każdym połączeniu (WAL, synchronous, busy_timeout, mmap, cache)
+        install_sqlite_pragmas(db.engine, sqlite_pragmas(app.config))
+
         # 1. IMPORT MODELI
         # Ważne: Musimy zaimportować klasy ze wszystkich plików modeli,
         # żeby SQLAlchemy wiedziało o ich istnieniu przed create_all().
@@ -59,15 +170,61 @@ def create_app():
         from app.models.employee_face import FaceCredential
         from app.models.qr_code import QRCredential  # Pamiętaj, klasa nazywa się QRCredential
         from app.models.access_log import AccessLog
+        from app.models.id_pool import IdSequence, FreeEmployeeId
+        from app.models.access_stats import AccessStatsRollup, StatsCounter
+        from app.models.job_checkpoint import JobCheckpoint
+        from app.services import stats_rollup  # rejestruje aktualizację liczników przy zapisie logów
+        from app.services import access_events  # noqa: F401 - publikuje nowe logi do podglądu na żywo
         
         # 2. TWORZENIE TABEL
         # SQLAlchemy przeskanuje zaimportowane modele i utworzy brakujące tabele
         db.create_all()
 
+        # Istniejąca baza bez liczników (pierwszy start po aktualizacji) - przelicz z logów
+        if AccessStatsRollup.query.first() is None and AccessLog.query.first() is not None:
+            print(f"[Stats] Rebuilt rollups from {stats_rollup.rebuild_rollups()} access logs")
+        if StatsCounter.query.first() is None:
+            print(f"[Stats] Counted {stats_rollup.rebuild_counters()} employees")
+
+        # 3. INDEKS TWARZY W PAMIĘCI (identyfikacja 1:N)
+        from app.services.face_index import face_index
+        face_index.configure(quantize=app.config["FACE_INDEX_QUANTIZE"])
+        indexed = face_index.load_from_db()
+
+        # 4. CACHE WZORCÓW TWARZY (czysty przy każdym starcie)
+        from app.services.face_cache import face_encoding_cache
+        face_encoding_cache.maxsize = app.config["FACE_CACHE_MAXSIZE"]
+        face_encoding_cache.ttl = app.config["FACE_CACHE_TTL"]
+        face_encoding_cache.clear()
+
+        from app.services.face_tracking import face_tracking_sessions
+        face_tracking_sessions.maxsize = app.config["FACE_TRACKING_MAX_SESSIONS"]
+        face_tracking_sessions.ttl = app.config["FACE_TRACKING_TTL"]
+        face_tracking_sessions.clear()
+
+        from app.services.event_bus import event_bus
+        event_bus.configure(
+            history_size=app.config["EVENT_BUS_HISTORY"],
+            client_buffer=app.config["EVENT_BUS_CLIENT_BUFFER"],
+            max_subscribers=app.config["EVENT_BUS_MAX_SUBSCRIBERS"]
+        )
+
+        # 5. CACHE KODÓW QR (ważny skan bez zapytania do bazy)
+        from app.services.qr_cache import qr_cache
+        qr_cache.ttl = app.config["QR_CACHE_TTL"]
+        cached_qr = qr_cache.warm()
+
         # Logowanie dla pewności
         print("-" * 50)
-        print(f"Connected to DB at: {db_path}")
+        print(f"Connected to DB at: {db.engine.url.render_as_string(hide_password=True)}")
+        if db.engine.dialect.name == "sqlite":
+            print("SQLite settings:", sqlite_settings(db.engine))
         print("Detected tables:", db.metadata.tables.keys())
+        print(f"Face index loaded: {indexed} encodings ({face_index.memory_bytes() / 1024:.0f} KiB)")
+        print(f"QR cache warmed: {cached_qr} codes")
+        if app.config["FACE_DETECTOR"] != "dlib":
+            problem = face_detectors.available_detectors(app.config["FACE_CASCADE_DIR"]).get(app.config["FACE_DETECTOR"])
+            print(f"Face detector: {app.config['FACE_DETECTOR']}" + (f" UNAVAILABLE ({problem}) - using dlib" if problem else ""))
         print("-" * 50)
 
     # ----------------------------------------
@@ -77,39 +234,76 @@ def create_app():
     from app.routes.employees import employees_bp
     from app.routes.auth import auth_bp
     from app.routes.admin import admin_bp
+    from app.routes.kiosk import kiosk_bp
     
     app.register_blueprint(employees_bp, url_prefix="/api/employees")
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
     app.register_blueprint(admin_bp, url_prefix="/api/admin")
+    app.register_blueprint(kiosk_bp, url_prefix="/api/kiosk")
+
+    # ----------------------------------------
+    # KOMENDY CLI
+    # ----------------------------------------
+    @app.cli.command("rebuild-stats")
+    def rebuild_stats_command():
+        """Przelicza tabelę access_stats_rollup z surowych logów i liczniki stats_counter."""
+        from app.services.stats_rollup import rebuild_rollups, rebuild_counters
+        processed = rebuild_rollups()
+        print(f"[Stats] Rebuilt rollups from {processed} access logs")
+        print(f"[Stats] Counted {rebuild_counters()} employees")
 
     # ----------------------------------------
     # SCHEDULER
     # ----------------------------------------
-    scheduler = BackgroundScheduler()
+    # Scheduler liczy w UTC, tak jak expires_at w bazie (datetime.utcnow)
+    scheduler = BackgroundScheduler(timezone=timezone.utc)
 
     # Uruchamiaj scheduler tylko gdy NIE jesteśmy w trybie TESTING
-    if not app.config.get("TESTING", False):
+    if not app.config.get("TESTING", False) and app.config["SCHEDULER_ENABLED"]:
         def _cleanup_job():
-            """Job: czyszczenie wygasłych i nieaktywnych QR"""
+            """Job: rotacja wygasłych QR paczkami (wznawia przerwany przebieg)"""
+            start, result = time.perf_counter(), "ok"
             with app.app_context():
                 try:
-                    refreshed = refresh_expired_qr_codes()
-                    print(f"[QR Cleanup Job] Refreshed: {len(refreshed)} employees")
+                    refreshed = refresh_expired_qr_codes(
+                        chunk_size=app.config["QR_REFRESH_CHUNK_SIZE"],
+                        progress=lambda cp: print(f"[QR Cleanup Job] Progress: {cp['processed']} rotated")
+                    )
+                    if refreshed:
+                        print(f"[QR Cleanup Job] Refreshed: {len(refreshed)} employees")
+                    _schedule_next_expiry(next_qr_expiry())
                 except Exception as e:
+                    result = "error"
                     print(f"[QR Cleanup Job] Error: {str(e)}")
+                finally:
+                    db.session.remove()
+                    metrics.JOB_DURATION.observe(time.perf_counter() - start, job="qr_expiry_refresh", result=result)
+
+        def _schedule_next_expiry(expires_at):
+            """Jeśli jakiś kod wygasa przed kolejnym przebiegiem - uruchom job zaraz po nim."""
+            job = scheduler.get_job('cleanup_qr_job')
+            if expires_at is None or job is None or job.next_run_time is None:
+                return
+            run_at = expires_at.replace(tzinfo=timezone.utc) + timedelta(seconds=1)
+            if run_at < job.next_run_time:
+                job.modify(next_run_time=max(run_at, datetime.now(timezone.utc)))
 
-        # Dodaj job: uruchamiaj co 24 godziny
+        # Dodaj job: co QR_REFRESH_INTERVAL_MINUTES, pierwszy przebieg chwilę po starcie
+        # (dokończy przebieg przerwany restartem)
         scheduler.add_job(
             _cleanup_job,
             'interval',
-            hours=24,
+            minutes=app.config["QR_REFRESH_INTERVAL_MINUTES"],
+            next_run_time=datetime.now(timezone.utc) + timedelta(seconds=10),
             id='cleanup_qr_job',
-            replace_existing=True
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
         )
 
         # Uruchom scheduler
         scheduler.start()
-        print("[Scheduler] Started QR cleanup job (every 24h)")
+        print(f"[Scheduler] Started QR refresh job (every {app.config['QR_REFRESH_INTERVAL_MINUTES']} min)")
 
         # Zamknij scheduler gdy aplikacja się wyłącza
         atexit.register(lambda: scheduler.shutdown(wait=False))
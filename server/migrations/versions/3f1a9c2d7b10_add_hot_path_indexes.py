@@ -0,0 +1,37 @@
+"""add indexes for access_log and QRCredential hot paths
+
+Revision ID: 3f1a9c2d7b10
+Revises: 
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1a9c2d7b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# Schemat bazy tworzy db.create_all() w create_app(), więc nowe bazy mają
+# te indeksy od razu - stąd if_not_exists. Migracja jest dla istniejących baz.
+INDEXES = [
+    ('ix_access_log_timestamp_status', 'access_log', ['timestamp', 'status']),
+    ('ix_access_log_employee_timestamp', 'access_log', ['employee_id', 'timestamp']),
+    ('ix_access_log_status_timestamp', 'access_log', ['status', 'timestamp']),
+    ('ix_qrcredential_active_expires', 'QRCredential', ['is_active', 'expires_at']),
+    ('ix_QRCredential_employee_id', 'QRCredential', ['employee_id']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,97 @@
+"""rewrite face_credential.face_encoding to versioned float32 format
+
+Revision ID: 8c2e4b7a1d55
+Revises: 3f1a9c2d7b10
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import numpy as np
+import struct
+
+
+# revision identifiers, used by Alembic.
+revision = '8c2e4b7a1d55'
+down_revision = '3f1a9c2d7b10'
+branch_labels = None
+depends_on = None
+
+
+# Kopia formatu z app/services/encoding_format.py (wersja 1) z dnia migracji -
+# migracja nie może się zmienić razem z kodem aplikacji.
+MAGIC = b"FE"
+HEADER = struct.Struct("<2sBBHH")
+FLOAT64, FLOAT32 = 1, 2
+MODEL_VERSION = 1
+BATCH_SIZE = 1000
+
+face_credential = sa.table(
+    'face_credential',
+    sa.column('id', sa.Integer),
+    sa.column('face_encoding', sa.LargeBinary),
+)
+
+
+def _header(blob):
+    if len(blob) < HEADER.size or bytes(blob[:2]) != MAGIC:
+        return None
+    magic, version, code, dim, model_version = HEADER.unpack_from(blob)
+    itemsize = {FLOAT64: 8, FLOAT32: 4}.get(code)
+    if version != 1 or itemsize is None or len(blob) != HEADER.size + dim * itemsize:
+        return None
+    return code, dim
+
+
+def _rewrite(convert):
+    """Przepisuje bloby paczkami po id; convert(blob) zwraca nowy blob albo None (bez zmian)."""
+    connection = op.get_bind()
+    last_id, rewritten = 0, 0
+    while True:
+        rows = connection.execute(
+            sa.select(face_credential.c.id, face_credential.c.face_encoding)
+            .where(face_credential.c.id > last_id)
+            .order_by(face_credential.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        for row_id, blob in rows:
+            new_blob = convert(bytes(blob))
+            if new_blob is not None:
+                connection.execute(
+                    face_credential.update()
+                    .where(face_credential.c.id == row_id)
+                    .values(face_encoding=new_blob)
+                )
+                rewritten += 1
+        last_id = rows[-1][0]
+    print(f"[Migration] Rewrote {rewritten} face encodings")
+
+
+def _to_float32(blob):
+    # Stary format: surowe float64 bez nagłówka. Bloby z nagłówkiem (baza z
+    # db.create_all() albo ponowne uruchomienie) zostają bez zmian
+    if _header(blob) is not None or len(blob) % 8 != 0:
+        return None
+    vector = np.frombuffer(blob, dtype=np.float64)
+    header = HEADER.pack(MAGIC, 1, FLOAT32, vector.shape[0], MODEL_VERSION)
+    return header + vector.astype(np.float32).tobytes()
+
+
+def _to_legacy_float64(blob):
+    header = _header(blob)
+    if header is None:
+        return None
+    code, _ = header
+    dtype = np.float32 if code == FLOAT32 else np.float64
+    return np.frombuffer(blob, dtype=dtype, offset=HEADER.size).astype(np.float64).tobytes()
+
+
+def upgrade():
+    _rewrite(_to_float32)
+
+
+def downgrade():
+    # Zapisy int8 (jeśli ktoś je włączył) nie mają tu odpowiednika - zostają bez zmian
+    _rewrite(_to_legacy_float64)
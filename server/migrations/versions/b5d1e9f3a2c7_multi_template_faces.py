@@ -0,0 +1,61 @@
+"""multiple face templates per employee
+
+Revision ID: b5d1e9f3a2c7
+Revises: 8c2e4b7a1d55
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5d1e9f3a2c7'
+down_revision = '8c2e4b7a1d55'
+branch_labels = None
+depends_on = None
+
+
+# W SQLite UNIQUE z definicji kolumny nie ma nazwy - nadajemy ją konwencją,
+# żeby batch_alter_table (kopia tabeli) mógł go usunąć.
+NAMING_CONVENTION = {"uq": "uq_%(table_name)s_%(column_0_name)s"}
+
+
+def _employee_unique_constraints(inspector):
+    return [
+        uc["name"] or "uq_face_credential_employee_id"
+        for uc in inspector.get_unique_constraints("face_credential")
+        if uc["column_names"] == ["employee_id"]
+    ]
+
+
+def upgrade():
+    # Baza z db.create_all() ma już docelowy schemat - zmieniamy tylko to, czego brakuje
+    inspector = sa.inspect(op.get_bind())
+    constraints = _employee_unique_constraints(inspector)
+    columns = {column["name"] for column in inspector.get_columns("face_credential")}
+    indexes = {index["name"] for index in inspector.get_indexes("face_credential")}
+    if not constraints and {"source", "quality"} <= columns and "ix_face_credential_employee_id" in indexes:
+        return
+    with op.batch_alter_table("face_credential", naming_convention=NAMING_CONVENTION) as batch_op:
+        for name in constraints:
+            batch_op.drop_constraint(name, type_="unique")
+        if "source" not in columns:
+            batch_op.add_column(sa.Column("source", sa.String(length=20), nullable=False, server_default="enroll"))
+        if "quality" not in columns:
+            batch_op.add_column(sa.Column("quality", sa.Float(), nullable=True))
+        if "ix_face_credential_employee_id" not in indexes:
+            batch_op.create_index("ix_face_credential_employee_id", ["employee_id"], unique=False)
+
+
+def downgrade():
+    # Zostaw po jednym (najstarszym) wzorcu na pracownika, inaczej UNIQUE się nie założy
+    op.execute(
+        "DELETE FROM face_credential WHERE id NOT IN "
+        "(SELECT MIN(id) FROM face_credential GROUP BY employee_id)"
+    )
+    with op.batch_alter_table("face_credential", naming_convention=NAMING_CONVENTION) as batch_op:
+        batch_op.drop_index("ix_face_credential_employee_id")
+        batch_op.drop_column("quality")
+        batch_op.drop_column("source")
+        batch_op.create_unique_constraint("uq_face_credential_employee_id", ["employee_id"])
@@ -0,0 +1,33 @@
+"""access_log.employee_id nullable, NULL for unknown person
+
+Revision ID: d7a3f0c9e4b2
+Revises: b5d1e9f3a2c7
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a3f0c9e4b2'
+down_revision = 'b5d1e9f3a2c7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Baza z db.create_all() ma już kolumnę nullable - wtedy tylko porządkujemy dane
+    columns = sa.inspect(op.get_bind()).get_columns("access_log")
+    if not next(column["nullable"] for column in columns if column["name"] == "employee_id"):
+        with op.batch_alter_table("access_log") as batch_op:
+            batch_op.alter_column("employee_id", existing_type=sa.Integer(), nullable=True)
+    # Odmowy zapisywane wcześniej jako tekst "unknown" w kolumnie INTEGER (tolerował to tylko SQLite)
+    op.execute("UPDATE access_log SET employee_id = NULL WHERE employee_id = 'unknown'")
+
+
+def downgrade():
+    # Poprzedni format - działa tylko w SQLite, jak przed migracją
+    op.execute("UPDATE access_log SET employee_id = 'unknown' WHERE employee_id IS NULL")
+    with op.batch_alter_table("access_log") as batch_op:
+        batch_op.alter_column("employee_id", existing_type=sa.Integer(), nullable=False)
@@ -41,6 +41,9 @@ def app():
         from app.models.employee_face import FaceCredential
         from app.models.qr_code import QRCredential
         from app.models.access_log import AccessLog
+        from app.models.id_pool import IdSequence, FreeEmployeeId
+        from app.models.access_stats import AccessStatsRollup
+        from app.models.job_checkpoint import JobCheckpoint
 
         db.create_all()
 
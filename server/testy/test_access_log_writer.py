@@ -0,0 +1,84 @@
+import queue
+import time
+from app.models.access_log import AccessLog
+from app.services.access_log_writer import AccessLogWriter
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_async_writer_flushes_on_shutdown(app):
+    """Zdarzenia z kolejki trafiają do bazy najpóźniej przy zamknięciu writera."""
+    writer = AccessLogWriter()
+    writer.start(app, batch_size=50, flush_interval=60)
+
+    for i in range(5):
+        writer.record(employee_id=i + 1, status="granted", verification_method="qr")
+    writer.shutdown()
+
+    assert AccessLog.query.count() == 5
+    stats = writer.stats()
+    assert stats["enqueued"] == 5
+    assert stats["written"] == 5
+    assert stats["queue_depth"] == 0
+
+
+def test_async_writer_flushes_full_batch(app):
+    writer = AccessLogWriter()
+    writer.start(app, batch_size=3, flush_interval=60)
+
+    for _ in range(3):
+        writer.record(employee_id=1, status="denied", verification_method="face")
+    # batch pełny -> zapis bez czekania na interval
+    assert wait_for(lambda: writer.written == 3)
+    writer.shutdown()
+
+
+def test_bad_row_does_not_drop_batch(app):
+    """Odrzucona paczka jest zapisywana pojedynczo - traci się tylko błędny wiersz."""
+    writer = AccessLogWriter()
+    writer.start(app, batch_size=3, flush_interval=60)
+
+    writer.record(employee_id=1, status="granted", verification_method="qr")
+    writer.record(employee_id="unknown", status="denied", verification_method="qr")
+    writer.record(employee_id=2, status=None, verification_method="qr")  # NOT NULL
+    assert wait_for(lambda: writer.written + writer.failed == 3)
+    writer.shutdown()
+
+    assert writer.failed == 1
+    assert sorted((l.employee_id or 0, l.status) for l in AccessLog.query.all()) == \
+        [(0, "denied"), (1, "granted")]
+
+
+def _full_writer(policy):
+    writer = AccessLogWriter()
+    writer.overflow_policy = policy
+    writer.block_timeout = 0.01
+    writer._queue = queue.Queue(maxsize=2)
+    writer._enqueue({"employee_id": 1})
+    writer._enqueue({"employee_id": 2})
+    return writer
+
+
+def test_overflow_drop_newest():
+    writer = _full_writer("drop_newest")
+    assert writer._enqueue({"employee_id": 3}) is False
+    assert [e["employee_id"] for e in writer._drain()] == [1, 2]
+    assert writer.dropped == 1
+
+
+def test_overflow_drop_oldest():
+    writer = _full_writer("drop_oldest")
+    assert writer._enqueue({"employee_id": 3}) is True
+    assert [e["employee_id"] for e in writer._drain()] == [2, 3]
+    assert writer.dropped == 1
+
+
+def test_overflow_block_times_out():
+    writer = _full_writer("block")
+    assert writer._enqueue({"employee_id": 3}) is False
+    assert writer.dropped == 1
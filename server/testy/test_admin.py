@@ -81,6 +81,31 @@ def test_get_admin_stats(client, setup_admin_data):
     assert data['today_access'] == 2  # l1 i l2
     assert data['today_denied'] == 1  # l2 (denied)
 
+def test_admin_stats_employee_count_follows_changes(client, setup_admin_data):
+    """Liczba pracowników w /stats pochodzi z licznika - bez count(*) na tabeli employee."""
+    from sqlalchemy import event
+
+    with client.application.app_context():
+        db.session.add(Employee(first_name="Nowy", last_name="Pracownik", email="nowy@firma.pl"))
+        db.session.commit()
+
+    selects = []
+    def record(conn, cursor, statement, *args):
+        selects.append(statement)
+
+    with client.application.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        res = client.get('/api/admin/stats')
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert res.get_json()['total_employees'] == 2
+    assert not any("FROM employee" in statement for statement in selects)
+
+    client.delete('/api/employees/10/delete')
+    assert client.get('/api/admin/stats').get_json()['total_employees'] == 1
+
 # --- TESTY DLA /raport ---
 
 def test_generate_raport_no_filters(client, setup_admin_data):
@@ -110,4 +135,111 @@ def test_generate_raport_bad_date(client, setup_admin_data):
     """Testuje obsługę błędnego formatu daty"""
     res = client.post('/api/admin/raport', json={"date_from": "2025/12/20"})
     assert res.status_code == 400
-    assert "Nieprawidłowy format daty" in res.get_json()['error']
\ No newline at end of file
+    assert "Nieprawidłowy format daty" in res.get_json()['error']
+
+def test_generate_raport_cursor_pagination(client, setup_admin_data):
+    """Raport stronicowany kursorem: strony się nie powtarzają i pokrywają całość"""
+    res = client.post('/api/admin/raport', json={"page_size": 2})
+    first = res.get_json()
+    assert first['count'] == 2
+    assert first['next_cursor']
+
+    res = client.post('/api/admin/raport', json={"page_size": 2, "cursor": first['next_cursor']})
+    second = res.get_json()
+    assert second['count'] == 1
+    assert second['next_cursor'] is None
+    assert second['data'][0]['timestamp'] <= first['data'][-1]['timestamp']
+
+def test_generate_raport_bad_cursor(client, setup_admin_data):
+    res = client.post('/api/admin/raport', json={"page_size": 2, "cursor": "zly-kursor"})
+    assert res.status_code == 400
+
+def test_generate_raport_csv_stream(client, setup_admin_data):
+    """Raport CSV (GET) - nagłówek + jeden wiersz na zdarzenie"""
+    res = client.get('/api/admin/raport?format=csv')
+    assert res.status_code == 200
+    assert res.mimetype == 'text/csv'
+    lines = res.get_data(as_text=True).strip().splitlines()
+    assert lines[0].startswith("timestamp,employee_id,full_name")
+    assert len(lines) == 4
+
+def test_generate_raport_ndjson_stream(client, setup_admin_data):
+    import json
+    res = client.post('/api/admin/raport', json={"format": "ndjson", "entry_type": "denied"})
+    assert res.status_code == 200
+    rows = [json.loads(line) for line in res.get_data(as_text=True).splitlines()]
+    assert len(rows) == 1
+    assert rows[0]['status'] == "denied"
+
+def test_get_access_logs_single_query(client, setup_admin_data):
+    """Logi pobierane jednym zapytaniem, niezależnie od liczby wierszy (brak N+1)"""
+    from sqlalchemy import event
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    with client.application.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        res = client.get('/api/admin/logs?limit=10')
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    assert res.status_code == 200
+    assert len(res.get_json()['logs']) == 3
+    assert len(statements) == 1
+
+def test_get_access_logs_filters_and_cursor(client, setup_admin_data):
+    """Filtry po statusie/metodzie i stronicowanie before_ts/before_id"""
+    res = client.get('/api/admin/logs?status=granted&method=face')
+    logs = res.get_json()['logs']
+    assert len(logs) == 2
+    assert all(l['status'] == 'granted' and l['verification_method'] == 'face' for l in logs)
+
+    first = client.get('/api/admin/logs?limit=2').get_json()
+    assert len(first['logs']) == 2
+    rest = client.get(
+        f"/api/admin/logs?limit=2&before_ts={first['next_before_ts']}&before_id={first['next_before_id']}"
+    ).get_json()
+    assert len(rest['logs']) == 1
+    seen = {l['id'] for l in first['logs']}
+    assert rest['logs'][0]['id'] not in seen
+
+def test_get_access_logs_limit_capped(client, setup_admin_data):
+    res = client.get('/api/admin/logs?limit=100000')
+    assert res.status_code == 200
+    assert len(res.get_json()['logs']) == 3
+
+# --- TESTY DLA TABELI ROLLUP ---
+
+def test_stats_timeseries_daily(client, setup_admin_data):
+    """Szereg dzienny: wczoraj 1 zdarzenie, dziś 2 (1 odmowa)"""
+    res = client.get('/api/admin/stats/timeseries?granularity=day')
+    assert res.status_code == 200
+    buckets = res.get_json()['buckets']
+    assert [b['total'] for b in buckets] == [1, 2]
+    assert buckets[-1]['by_status'] == {"granted": 1, "denied": 1}
+    assert buckets[-1]['by_method'] == {"face": 1, "qr": 1}
+
+def test_stats_timeseries_bad_granularity(client):
+    res = client.get('/api/admin/stats/timeseries?granularity=week')
+    assert res.status_code == 400
+
+def test_rebuild_rollups_matches_incremental(client, setup_admin_data):
+    """Przeliczenie od zera daje te same liczniki co aktualizacje przyrostowe"""
+    from app.models.access_stats import AccessStatsRollup
+    from app.services.stats_rollup import rebuild_rollups
+
+    def snapshot():
+        return sorted(
+            (r.granularity, r.bucket_start, r.status, r.verification_method, r.count)
+            for r in AccessStatsRollup.query.all()
+        )
+
+    with client.application.app_context():
+        incremental = snapshot()
+        assert rebuild_rollups() == 3
+        assert snapshot() == incremental
@@ -1,6 +1,8 @@
+import io
 import pytest
 from unittest.mock import patch
 import numpy as np
+from app.services import encoding_format
 
 def test_full_auth_flow_success(client):
     """
@@ -115,3 +117,229 @@ def test_verify_qr_endpoint_logic(client, app):
         db.session.commit()
         resp_inactive = client.post("/api/auth/qr", json={"qr_code": qr_data})
         assert resp_inactive.status_code == 401
+
+def _register_for_qr(client, email):
+    with patch('app.services.face_service.FaceServices.get_encoding_from_image') as m_enc:
+        m_enc.return_value = np.zeros(128)
+        res = client.post('/api/employees/register', json={
+            'first_name': 'Qr', 'last_name': 'Cache', 'email': email, 'image': 'data:image/jpeg;base64,AAA='
+        })
+    data = res.get_json()
+    return data['employee_id'], data['qr_code']
+
+def test_verify_qr_served_from_cache(client, app):
+    """Drugi skan tego samego kodu nie odpytuje bazy o QR ani o pracownika."""
+    from sqlalchemy import event
+    from app.utils.db import db
+    from app.services.qr_cache import qr_cache
+
+    emp_id, qr_code = _register_for_qr(client, 'qr.cache@test.pl')
+    assert client.post('/api/auth/qr', json={'qr_code': qr_code}).status_code == 200
+
+    selects = []
+    def count(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT"):
+            selects.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", count)
+    try:
+        hits_before = qr_cache.hits
+        res = client.post('/api/auth/qr', json={'qr_code': qr_code})
+    finally:
+        event.remove(db.engine, "before_cursor_execute", count)
+
+    assert res.status_code == 200
+    assert res.get_json()['employee_id'] == emp_id
+    assert qr_cache.hits == hits_before + 1
+    assert selects == []
+
+def test_qr_cache_invalidated_by_switch_and_regenerate(client):
+    """Wyłączenie i wygenerowanie nowego kodu od razu działa mimo cache."""
+    emp_id, qr_code = _register_for_qr(client, 'qr.invalidate@test.pl')
+    assert client.post('/api/auth/qr', json={'qr_code': qr_code}).status_code == 200
+
+    client.post(f'/api/employees/{emp_id}/switch_qr_state', json={"is_active": False})
+    assert client.post('/api/auth/qr', json={'qr_code': qr_code}).status_code == 401
+
+    new_code = client.post(f'/api/employees/{emp_id}/generate_new_qr_code').get_json()['qr_code']
+    assert client.post('/api/auth/qr', json={'qr_code': qr_code}).status_code == 401
+    assert client.post('/api/auth/qr', json={'qr_code': new_code}).status_code == 200
+
+    client.delete(f'/api/employees/{emp_id}/delete')
+    assert client.post('/api/auth/qr', json={'qr_code': new_code}).status_code == 401
+
+def test_qr_cache_skips_row_read_before_invalidation(client, app):
+    """Odczyt z bazy sprzed commitu wyłączającego kod nie wraca do cache po invalidacji."""
+    from app.services.qr_cache import QRCredentialCache
+
+    emp_id, qr_code = _register_for_qr(client, 'qr.race@test.pl')
+    cache = QRCredentialCache()
+    real_query = cache._query
+
+    class ReadThenInvalidate:
+        # Równoległy commit (np. switch_qr_state) kończy się między odczytem a zapisem do cache
+        def filter(self, *criteria):
+            self.query = real_query().filter(*criteria)
+            return self
+
+        def first(self):
+            row = self.query.first()
+            cache.invalidate_employee(emp_id)
+            return row
+
+    with app.app_context():
+        cache._query = ReadThenInvalidate
+        assert cache.lookup(qr_code).employee_id == emp_id
+        assert len(cache) == 0
+
+        cache._query = real_query
+        cache.lookup(qr_code)
+        assert len(cache) == 1
+
+def test_qr_cache_entries_expire_after_ttl(client, app):
+    """Po ttl wpis jest czytany z bazy od nowa (zmiany z innych procesów)."""
+    from app.services.qr_cache import QRCredentialCache
+
+    _, qr_code = _register_for_qr(client, 'qr.ttl@test.pl')
+    now = [0.0]
+    cache = QRCredentialCache(ttl=60, clock=lambda: now[0])
+
+    with app.app_context():
+        cache.lookup(qr_code)
+        now[0] = 59
+        cache.lookup(qr_code)
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        now[0] = 61
+        cache.lookup(qr_code)
+        assert (cache.hits, cache.misses) == (1, 2)
+
+def test_face_verification_adds_template_when_enabled(client, app):
+    """Opt-in: pewna weryfikacja dodaje wzorzec 'verify', nadmiar usuwany od najstarszych."""
+    from app.models.employee_face import FaceCredential
+    from app.services.face_index import face_index
+    app.config.update({"FACE_AUTO_ADD_TEMPLATES": True, "FACE_MAX_TEMPLATES": 2})
+
+    base = np.zeros(128)
+    with patch('app.services.face_service.FaceServices.get_encoding_from_image', return_value=base):
+        reg = client.post('/api/employees/register', json={
+            'first_name': 'Tom', 'last_name': 'Templates',
+            'email': 'templates@test.pl', 'image': 'data:image/jpeg;base64,AAA='
+        })
+    emp_id = reg.get_json()['employee_id']
+
+    def verify(encoding):
+        with patch('app.services.face_service.FaceServices.get_encoding_from_image', return_value=encoding), \
+             patch('app.services.face_service.FaceServices.compare_faces', return_value=True):
+            return client.post('/api/auth/face', json={'employee_id': emp_id, 'image': 'data:image/jpeg;base64,AAA='})
+
+    near_duplicate = np.full(128, 0.001)          # odległość ~0.01 - nic nowego
+    confident = np.full(128, 0.02)                # ~0.23
+    confident_other = np.full(128, -0.02)         # ~0.23 od bazowego
+    uncertain = np.full(128, 0.05)                # ~0.57 - za daleko
+
+    for encoding in (near_duplicate, uncertain, confident, confident_other):
+        assert verify(encoding).status_code == 200
+
+    with app.app_context():
+        templates = FaceCredential.query.filter_by(employee_id=emp_id).order_by(FaceCredential.id).all()
+        assert [t.source for t in templates] == ["enroll", "verify"]
+        # Limit 2: pierwszy wzorzec 'verify' został zastąpiony nowszym
+        assert np.allclose(encoding_format.unpack(templates[1].face_encoding), -0.02)
+    assert face_index.template_count(emp_id) == 2
+
+def test_combined_verify_writes_one_event(client, app):
+    """/verify: QR i twarz w jednym requeście, jeden wpis 'qr+face' w logu."""
+    from app.models.access_log import AccessLog
+    emp_id, qr_code = _register_for_qr(client, 'combined@test.pl')
+
+    with patch('app.services.face_service.FaceServices.get_encoding_from_image', return_value=np.zeros(128)), \
+         patch('app.services.face_service.FaceServices.compare_faces', return_value=True):
+        res = client.post('/api/auth/verify', json={'qr_code': qr_code, 'image': 'data:image/jpeg;base64,AAA='})
+
+    assert res.status_code == 200
+    assert res.get_json()['employee_id'] == emp_id
+    with app.app_context():
+        logs = AccessLog.query.all()
+        assert [(l.employee_id, l.status, l.verification_method) for l in logs] == [(emp_id, "granted", "qr+face")]
+
+def test_combined_verify_rejects_bad_qr_before_face_work(client, app):
+    """Wyłączony albo nieznany kod QR kończy request bez liczenia encodingu; zła twarz -> 401."""
+    emp_id, qr_code = _register_for_qr(client, 'combined.bad@test.pl')
+
+    with patch('app.services.face_service.FaceServices.get_encoding_from_image', return_value=np.zeros(128)), \
+         patch('app.services.face_service.FaceServices.compare_faces', return_value=False):
+        res = client.post('/api/auth/verify', json={'qr_code': qr_code, 'image': 'data:image/jpeg;base64,AAA='})
+    assert res.status_code == 401
+    assert "nie pasuje" in res.get_json()['message']
+
+    client.post(f'/api/employees/{emp_id}/switch_qr_state', json={"is_active": False})
+    client.post('/api/auth/qr', json={'qr_code': qr_code})  # kod wraca do cache jako nieaktywny
+
+    with patch('app.services.face_service.FaceServices.get_encoding_from_image') as m_enc:
+        res = client.post('/api/auth/verify', json={'qr_code': qr_code, 'image': 'data:image/jpeg;base64,AAA='})
+        assert m_enc.call_count == 0
+        unknown = client.post('/api/auth/verify', json={'qr_code': 'no-such-code', 'image': 'data:image/jpeg;base64,AAA='})
+        assert m_enc.call_count == 0
+    assert res.status_code == 401
+    assert unknown.status_code == 401
+
+def test_verify_accepts_raw_image_body(client, app):
+    """Body image/jpeg + qr_code w query stringu; zły Content-Type -> 415, za duży -> 413."""
+    emp_id, qr_code = _register_for_qr(client, 'raw.body@test.pl')
+
+    with patch('app.services.face_service.FaceServices.get_encoding_from_image', return_value=np.zeros(128)) as m_enc, \
+         patch('app.services.face_service.FaceServices.compare_faces', return_value=True):
+        res = client.post(f'/api/auth/verify?qr_code={qr_code}', data=b'\xff\xd8jpeg-bytes',
+                          content_type='image/jpeg')
+    assert res.status_code == 200
+    assert res.get_json()['employee_id'] == emp_id
+    assert m_enc.call_args[0][0].getvalue() == b'\xff\xd8jpeg-bytes'
+
+    res = client.post('/api/auth/face/identify', data=b'abc', content_type='text/plain')
+    assert res.status_code == 415
+
+    app.config["FACE_UPLOAD_MAX_BYTES"] = 16
+    res = client.post(f'/api/auth/verify?qr_code={qr_code}', data=b'x' * 17, content_type='image/jpeg')
+    assert res.status_code == 413
+
+def test_empty_image_part_rejected(client):
+    """Pusty plik w multipart albo pusty data URL -> 400, nie błąd dekodowania."""
+    with patch('app.services.face_service.FaceServices.get_encoding_from_image') as m_enc:
+        res = client.post('/api/auth/face', content_type='multipart/form-data', data={
+            'employee_id': '1', 'image': (io.BytesIO(b''), 'empty.jpg', 'image/jpeg'),
+        })
+        assert res.status_code == 400
+        assert res.get_json()['error'] == "Empty image"
+
+        res = client.post('/api/auth/face', json={'employee_id': 1, 'images': ['data:image/jpeg;base64,']})
+        assert res.status_code == 400
+        assert m_enc.call_count == 0
+
+def test_face_tracking_session_per_kiosk(client, app):
+    """Druga klatka z tego samego kiosku dostaje ramkę z poprzedniej; inny kiosk - nie."""
+    with patch('app.services.face_service.FaceServices.get_encoding_from_image') as m_enc, \
+         patch('app.services.face_service.FaceServices.encoding_to_bytes') as m_bytes:
+        m_enc.return_value = np.zeros(128)
+        m_bytes.return_value = b"fake-encoding-bytes"
+        emp_id = client.post('/api/employees/register', json={
+            'first_name': 'Kiosk', 'last_name': 'User',
+            'email': 'kiosk.tracking@example.com', 'image': 'data:image/jpeg;base64,AAA='
+        }).get_json()['employee_id']
+
+    hints = []
+
+    def fake_encoding(file_storage, profile=None, timings=None, track=None):
+        hints.append(track["box"])
+        track["box"] = (10, 60, 60, 10)
+        return np.zeros(128)
+
+    payload = {'employee_id': emp_id, 'image': 'data:image/jpeg;base64,AAA='}
+    with patch('app.services.face_service.FaceServices.get_encoding_from_image', side_effect=fake_encoding), \
+         patch('app.services.face_service.FaceServices.compare_faces', return_value=True):
+        for kiosk in ("kiosk-1", "kiosk-1", "kiosk-2"):
+            response = client.post('/api/auth/face', json=payload, headers={'X-Kiosk-Id': kiosk})
+            assert response.status_code == 200
+        client.post('/api/auth/face', json=payload)  # bez kiosku - bez sesji
+
+    assert hints == [None, (10, 60, 60, 10), None, None]
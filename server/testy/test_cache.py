@@ -0,0 +1,88 @@
+import numpy as np
+from unittest.mock import patch
+from app.utils.cache import LRUCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_eviction_order():
+    """Po przekroczeniu maxsize wylatuje najdawniej używany wpis."""
+    cache = LRUCache(maxsize=2)
+    cache.put(1, "a")
+    cache.put(2, "b")
+    cache.get(1)
+    cache.put(3, "c")
+
+    assert cache.get(2) is None
+    assert cache.get(1) == "a"
+    assert cache.get(3) == "c"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry():
+    clock = FakeClock()
+    cache = LRUCache(maxsize=10, ttl=5, clock=clock)
+    cache.put("k", 42)
+    clock.now = 4.9
+    assert cache.get("k") == 42
+    clock.now = 5.1
+    assert cache.get("k") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_get_or_load_counts_hits_and_misses():
+    cache = LRUCache(maxsize=10)
+    calls = []
+    loader = lambda key: calls.append(key) or key * 2
+
+    assert cache.get_or_load(3, loader) == 6
+    assert cache.get_or_load(3, loader) == 6
+    assert calls == [3]
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_get_or_load_skips_value_loaded_before_invalidate():
+    """Wartość wczytana przed invalidate() (równoległe usunięcie) nie wraca do cache."""
+    cache = LRUCache(maxsize=10)
+
+    def loader(key):
+        cache.invalidate(key)
+        return "old"
+
+    assert cache.get_or_load(1, loader) == "old"
+    assert cache.get(1) is None
+    assert cache.get_or_load(1, lambda key: "new") == "new"
+    assert cache.get(1) == "new"
+
+
+def test_face_cache_invalidated_on_delete(client):
+    """Weryfikacja korzysta z cache, a usunięcie pracownika go czyści."""
+    from app.services.face_cache import face_encoding_cache
+
+    with patch('app.services.face_service.FaceServices.get_encoding_from_image') as m_enc:
+        m_enc.return_value = np.zeros(128)
+        reg = client.post('/api/employees/register', json={
+            'first_name': 'Cache', 'last_name': 'Test',
+            'email': 'cache.test@test.pl', 'image': 'data:image/jpeg;base64,AAA='
+        })
+        emp_id = reg.get_json()['employee_id']
+
+        hits_before = face_encoding_cache.hits
+        res = client.post('/api/auth/face', json={'employee_id': emp_id, 'image': 'data:image/jpeg;base64,AAA='})
+        assert res.status_code == 200
+        assert face_encoding_cache.hits == hits_before + 1
+
+    client.delete(f'/api/employees/{emp_id}/delete')
+    assert face_encoding_cache.get(emp_id) is None
+
+    res = client.get('/api/admin/cache_stats')
+    assert res.status_code == 200
+    assert res.get_json()['face_encoding']['maxsize'] > 0
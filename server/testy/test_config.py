@@ -0,0 +1,34 @@
+# tests/test_config.py
+from sqlalchemy import create_engine
+from app.config import database_uri, engine_options, sqlite_pragmas
+from app.utils.db import install_sqlite_pragmas, sqlite_settings
+
+SQLITE_CONFIG = {
+    "SQLITE_JOURNAL_MODE": "WAL",
+    "SQLITE_SYNCHRONOUS": "NORMAL",
+    "SQLITE_BUSY_TIMEOUT_MS": 3000,
+    "SQLITE_MMAP_SIZE": 1024 * 1024,
+    "SQLITE_CACHE_SIZE_KB": 4096,
+}
+
+def test_database_uri_defaults_to_sqlite_file():
+    assert database_uri({}, "/tmp/a.db") == "sqlite:////tmp/a.db"
+    assert database_uri({"DATABASE_URL": "postgres://u:p@db/x"}, "/tmp/a.db") == "postgresql://u:p@db/x"
+
+def test_engine_options_per_backend():
+    assert engine_options({}, "sqlite:///:memory:") == {}
+    sqlite = engine_options({"DB_POOL_SIZE": 4}, "sqlite:////tmp/a.db")
+    assert sqlite["pool_size"] == 4
+    assert sqlite["connect_args"]["check_same_thread"] is False
+    assert engine_options({}, "postgresql://db/x")["pool_pre_ping"] is True
+
+def test_sqlite_pragmas_applied_on_connect(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'tuned.db'}")
+    install_sqlite_pragmas(engine, sqlite_pragmas(SQLITE_CONFIG))
+
+    settings = sqlite_settings(engine)
+    assert settings["journal_mode"] == "wal"
+    assert settings["synchronous"] == 1  # NORMAL
+    assert settings["busy_timeout"] == 3000
+    assert settings["cache_size"] == -4096
+    engine.dispose()
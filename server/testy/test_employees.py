@@ -168,9 +168,129 @@ def test_delete_employee(client, clean_db):
     res_get = client.get('/api/employees/all')
     assert len(res_get.get_json()) == 0
 
+def test_deleted_id_with_access_history_not_reused(client, clean_db):
+    """ID usuniętego pracownika z logami dostępu nie trafia do nowej osoby (historia zostaje przy "Unknown")"""
+    img_b64 = get_img_b64("faces_test/face.jpg")
+    alice = client.post('/api/employees/register', json={
+        "first_name": "Alice", "last_name": "Old", "email": "alice@reuse.pl", "image": img_b64
+    }).get_json()
+    assert client.post('/api/auth/qr', json={"qr_code": alice['qr_code']}).status_code == 200
+    assert client.delete(f"/api/employees/{alice['employee_id']}/delete").status_code == 200
+
+    bob = client.post('/api/employees/register', json={
+        "first_name": "Bob", "last_name": "New", "email": "bob@reuse.pl", "image": img_b64
+    }).get_json()
+    assert bob['employee_id'] != alice['employee_id']
+
+    logs = client.get('/api/admin/logs').get_json()['logs']
+    assert [(l['employee_id'], l['employee_name']) for l in logs] == [(alice['employee_id'], "Unknown")]
+
 def test_modify_non_existent_employee(client, clean_db):
     """Testuje modyfikację nieistniejącego pracownika (404)"""
     res = client.put('/api/employees/modify_employee', json={
         "employee_id": 999, "first_name": "A", "last_name": "B", "email": "a@b.com"
     })
-    assert res.status_code == 404
\ No newline at end of file
+    assert res.status_code == 404
+
+def test_register_batch_json(client, clean_db):
+    """Rejestracja wsadowa: raport per pozycja, duplikaty e-maili odrzucone"""
+    img_b64 = get_img_b64("faces_test/face.jpg")
+    payload = [
+        {"first_name": "Anna", "last_name": "A", "email": "anna@batch.pl", "image": img_b64},
+        {"first_name": "Bartek", "last_name": "B", "email": "bartek@batch.pl", "image": img_b64},
+        {"first_name": "Anna", "last_name": "Dup", "email": "anna@batch.pl", "image": img_b64},
+        {"first_name": "Brak", "last_name": "Zdjecia", "email": "brak@batch.pl"},
+    ]
+    res = client.post('/api/employees/register/batch', json=payload)
+
+    assert res.status_code == 200
+    data = res.get_json()
+    assert data['created'] == 2
+    assert [r['status'] for r in data['results']] == ["created", "created", "error", "error"]
+    assert data['results'][2]['error'] == "Email already exists"
+
+    ids = {r['employee_id'] for r in data['results'][:2]}
+    with client.application.app_context():
+        for emp_id in ids:
+            emp = db.session.get(Employee, emp_id)
+            assert len(emp.face_templates) == 1
+            assert emp.qr_code.is_active is True
+
+    # Insert przez Core - licznik pracowników w /stats i tak rośnie
+    assert client.get('/api/admin/stats').get_json()['total_employees'] == 2
+
+def test_register_batch_retry_after_failed_image(client, clean_db):
+    """Linia bez twarzy nie zajmuje e-maila - poprawiona linia z tym samym adresem przechodzi"""
+    from unittest.mock import patch
+    import numpy as np
+    payload = [
+        {"first_name": "Ola", "last_name": "Zle", "email": "ola@batch.pl", "image": "data:image/jpeg;base64,AAA="},
+        {"first_name": "Ola", "last_name": "Dobre", "email": "ola@batch.pl", "image": "data:image/jpeg;base64,AAA="},
+    ]
+    with patch('app.services.face_service.FaceServices.get_encoding_from_image', side_effect=[None, np.zeros(128)]):
+        res = client.post('/api/employees/register/batch', json=payload)
+
+    assert res.status_code == 200
+    results = res.get_json()['results']
+    assert results[0]['error'] == "No face detected"
+    assert results[1]['status'] == "created"
+
+def test_register_batch_ndjson(client, clean_db):
+    """Rejestracja wsadowa ze strumienia NDJSON"""
+    import json
+    img_b64 = get_img_b64("faces_test/face.jpg")
+    lines = [
+        json.dumps({"first_name": "Nd", "last_name": str(i), "email": f"nd{i}@batch.pl", "image": img_b64})
+        for i in range(3)
+    ]
+    res = client.post(
+        '/api/employees/register/batch',
+        data="\n".join(lines) + "\nnie-json\n",
+        content_type="application/x-ndjson"
+    )
+
+    assert res.status_code == 200
+    data = res.get_json()
+    assert data['total'] == 4
+    assert data['created'] == 3
+    assert data['results'][3]['error'] == "Invalid item"
+
+def test_register_with_image_burst(client, clean_db):
+    """Seria zdjęć przy rejestracji = kilka wzorców; ponad FACE_MAX_TEMPLATES -> 400"""
+    from unittest.mock import patch
+    import numpy as np
+    from app.services.face_index import face_index
+
+    encodings = [np.full(128, 0.1), np.full(128, 0.12), None]
+    with patch('app.services.face_service.FaceServices.get_encoding_from_image', side_effect=encodings):
+        res = client.post('/api/employees/register', json={
+            "first_name": "Seria", "last_name": "Zdjec", "email": "burst@test.pl",
+            "images": ["data:image/jpeg;base64,AAA="] * 3
+        })
+    assert res.status_code == 201
+    data = res.get_json()
+    assert data['templates'] == 2  # trzecie zdjęcie bez twarzy
+    assert face_index.template_count(data['employee_id']) == 2
+
+    with client.application.app_context():
+        emp = db.session.get(Employee, data['employee_id'])
+        assert [t.source for t in emp.face_templates] == ["enroll", "enroll"]
+
+    client.application.config["FACE_MAX_TEMPLATES"] = 2
+    res = client.post('/api/employees/register', json={
+        "first_name": "Za", "last_name": "Duzo", "email": "toomany@test.pl",
+        "images": ["data:image/jpeg;base64,AAA="] * 3
+    })
+    assert res.status_code == 400
+
+def test_register_multipart(client, clean_db):
+    """Rejestracja z plikiem w multipart/form-data - bez base64"""
+    import io
+    with open("faces_test/face.jpg", "rb") as f:
+        image = f.read()
+    res = client.post('/api/employees/register', content_type='multipart/form-data', data={
+        "first_name": "Multi", "last_name": "Part", "email": "multipart@test.pl",
+        "image": (io.BytesIO(image), "face.jpg", "image/jpeg"),
+    })
+    assert res.status_code == 201
+    assert res.get_json()['templates'] == 1
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+from app.services import encoding_format
+from app.services.face_service import FaceServices
+from app.services.face_index import FaceIndex
+
+
+def _faces(count, seed=0):
+    """Syntetyczne wzorce podobne do dlib: 128-d, wartości rzędu 0.1."""
+    rng = np.random.default_rng(seed)
+    return rng.normal(scale=0.09, size=(count, 128))
+
+
+def test_float32_roundtrip_with_header():
+    encoding = _faces(1)[0]
+    blob = encoding_format.pack(encoding)
+
+    assert len(blob) == encoding_format.HEADER.size + 128 * 4  # połowa starego 1 KB
+    assert encoding_format.parse_header(blob)[:3] == ("float32", 128, encoding_format.MODEL_VERSION)
+    decoded = encoding_format.unpack(blob)
+    assert decoded.dtype == np.float32
+    assert np.allclose(decoded, encoding, atol=1e-7)
+
+
+def test_legacy_float64_blob_still_readable():
+    """Stare bloby (surowe float64 bez nagłówka) czytamy bez migracji."""
+    encoding = _faces(1)[0]
+    legacy = encoding.tobytes()
+
+    assert encoding_format.is_legacy(legacy)
+    assert np.array_equal(FaceServices.bytes_to_encoding(legacy), encoding)
+    with pytest.raises(ValueError):
+        FaceServices.bytes_to_encoding(b"fake-encoding-bytes")
+
+
+def test_int8_blob_is_close_to_float64():
+    encoding = _faces(1)[0]
+    blob = encoding_format.pack(encoding, dtype="int8")
+
+    assert len(blob) < 150
+    assert np.linalg.norm(encoding_format.unpack(blob) - encoding) < 0.01
+
+
+def test_encoding_dtype_from_config(app):
+    encoding = _faces(1)[0]
+    with app.app_context():
+        assert encoding_format.parse_header(FaceServices.encoding_to_bytes(encoding))[0] == "float32"
+        app.config["FACE_ENCODING_DTYPE"] = "float64"
+        assert encoding_format.parse_header(FaceServices.encoding_to_bytes(encoding))[0] == "float64"
+
+
+@pytest.mark.parametrize("dtype, quantize, max_error", [
+    (np.float32, False, 1e-5),
+    (np.float32, True, 0.02),
+])
+def test_index_matches_float64_path(dtype, quantize, max_error):
+    """Identyfikacja na float32 / int8 daje te same osoby co float64, odległości w granicach błędu."""
+    known = _faces(500)
+    rng = np.random.default_rng(1)
+    # Połowa zapytań to znane osoby (mały szum), połowa - obce twarze
+    queries = np.vstack([known[:100] + rng.normal(scale=0.02, size=(100, 128)), _faces(100, seed=2)])
+
+    reference = FaceIndex(dtype=np.float64)
+    compact = FaceIndex(dtype=dtype, quantize=quantize)
+    for index in (reference, compact):
+        index.load((i + 1, enc) for i, enc in enumerate(known))
+
+    for query in queries:
+        ref_id, ref_distance = reference.identify(query)
+        compact_id, compact_distance = compact.identify(query)
+        assert compact_id == ref_id
+        assert abs(compact_distance - ref_distance) < max_error
+
+
+def test_index_memory_halved_or_better():
+    known = _faces(1000)
+    sizes = {}
+    for name, kwargs in {"float64": {"dtype": np.float64}, "float32": {}, "int8": {"quantize": True}}.items():
+        index = FaceIndex(**kwargs)
+        index.load((i + 1, enc) for i, enc in enumerate(known))
+        sizes[name] = index.memory_bytes()
+
+    assert sizes["float32"] <= sizes["float64"] * 0.55  # ID (int64) zostają bez zmian
+    assert sizes["int8"] <= sizes["float64"] * 0.25
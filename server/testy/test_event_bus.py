@@ -0,0 +1,73 @@
+import json
+import pytest
+from app.services.event_bus import EventBus, EventBusFull, event_bus
+
+
+def parse(encoded):
+    """Zdarzenia SSE -> lista (id, typ, dane)."""
+    events = []
+    for block in "".join(encoded).strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((fields.get("id"), fields.get("event"), json.loads(fields.get("data", "null"))))
+    return events
+
+
+def test_bus_resumes_from_last_event_id_and_bounds_buffers():
+    bus = EventBus(history_size=3, client_buffer=3, max_subscribers=2)
+    first = bus.publish("access", {"n": 1})
+    for n in range(2, 5):
+        bus.publish("access", {"n": n})
+
+    # Zdarzenie 1 wypadło z historii (3 ostatnie) - nic nie zgubione przy wznowieniu od 1
+    resync, events = bus.subscribe(first).get(timeout=0)
+    assert not resync
+    assert [data["n"] for _, _, data in parse(events)] == [2, 3, 4]
+
+    # Za stare / z poprzedniego procesu -> resync
+    assert bus.subscribe("0-1").get(timeout=0) == (True, [])
+    with pytest.raises(EventBusFull):
+        bus.subscribe()
+
+    # Wolny klient: bufor 2 zdarzeń, starsze wypadają, klient dostaje resync
+    bus2 = EventBus(client_buffer=2)
+    slow = bus2.subscribe()
+    for n in range(5):
+        bus2.publish("access", {"n": n})
+    resync, events = slow.get(timeout=0)
+    assert resync
+    assert [data["n"] for _, _, data in parse(events)] == [3, 4]
+    assert bus2.stats()["dropped"] == 3
+
+
+def test_access_logs_published_after_commit(client, app):
+    """Log dostępu z bramki trafia do subskrybenta razem z przyrostem liczników."""
+    subscription = event_bus.subscribe()
+    try:
+        client.post('/api/auth/qr', json={'qr_code': 'invalid_code_xyz'})
+        resync, events = subscription.get(timeout=1)
+    finally:
+        event_bus.unsubscribe(subscription)
+
+    events = parse(events)
+    assert not resync
+    assert [event_type for _, event_type, _ in events] == ["access", "stats"]
+    assert events[0][2]["status"] == "denied"
+    assert events[0][2]["verification_method"] == "qr"
+    assert events[0][2]["id"] is not None
+    assert events[1][2]["today_access"] == 1 and events[1][2]["today_denied"] == 1
+
+
+def test_events_endpoint_streams_missed_events(client, app):
+    seen = event_bus.publish("access", {"n": 1})
+    event_bus.publish("access", {"n": 2})
+
+    response = client.get('/api/admin/events', headers={'Last-Event-ID': seen}, buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    chunks = iter(response.response)
+    assert next(chunks).startswith(b"retry:")
+    events = parse([next(chunks).decode()])
+    response.close()
+
+    assert [(event_type, data) for _, event_type, data in events] == [("access", {"n": 2})]
+    assert event_bus.stats()["subscribers"] == 0  # zamknięcie strumienia odpina subskrybenta
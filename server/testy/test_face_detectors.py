@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from unittest.mock import patch, MagicMock
+from app.services import face_detectors
+from app.services.face_detectors import (OpenCVCascadeDetector, DlibHogDetector, DetectorUnavailable,
+                                         get_detector, resolve_detector)
+from app.services.face_service import FaceServices
+
+
+def test_cascade_boxes_converted_to_face_recognition_order():
+    detector = OpenCVCascadeDetector.__new__(OpenCVCascadeDetector)
+    detector._cv2 = MagicMock()
+    detector._lock = MagicMock()
+    detector.scale_factor, detector.min_neighbors, detector.min_size = 1.1, 5, 40
+    detector._cascade = MagicMock()
+    # (x, y, w, h); większa twarz ma być pierwsza
+    detector._cascade.detectMultiScale.return_value = np.array([[10, 20, 30, 30], [100, 50, 80, 80]])
+
+    boxes = detector.detect(np.zeros((200, 200), dtype=np.uint8), {})
+    assert boxes == [(50, 180, 130, 100), (20, 40, 50, 10)]
+
+
+def test_unknown_and_unavailable_detectors():
+    with pytest.raises(ValueError):
+        get_detector("nope")
+
+    with patch.object(face_detectors, 'OpenCVCascadeDetector', side_effect=DetectorUnavailable("no cv2")):
+        with pytest.raises(DetectorUnavailable):
+            get_detector("lbp", cascade_dir="/missing")
+        # Ścieżka requestu nie wywraca się - wraca do dlib
+        assert isinstance(resolve_detector("lbp", "/missing"), DlibHogDetector)
+
+
+def test_configured_detector_used_for_encoding(app):
+    app.config["FACE_DETECTOR"] = "haar"
+    fake = MagicMock()
+    fake.detect.return_value = []
+    with app.app_context():
+        profile = FaceServices.get_profile("verify")
+        assert profile["detector"] == "haar"
+        with patch('app.services.face_service.resolve_detector', return_value=fake) as m_resolve:
+            assert FaceServices.get_encoding_from_image(open("faces_test/face.jpg", "rb"), profile=profile) is None
+    m_resolve.assert_called_once_with("haar", None)
+    assert fake.detect.call_count == 1
+
+
+def test_unknown_detector_in_config_fails_at_startup():
+    """Literówka w FACE_DETECTOR / FACE_PROFILES zatrzymuje create_app zamiast 500 na każdym requeście."""
+    from main import create_app
+    with pytest.raises(ValueError, match="FACE_DETECTOR"):
+        create_app({"FACE_DETECTOR": "hog", "TESTING": True})
+    with pytest.raises(ValueError, match='FACE_PROFILES\\["verify"\\]'):
+        create_app({"FACE_PROFILES": {"verify": {"detector": "cnn"}}, "TESTING": True})
+
+    face_detectors.validate_config({"FACE_DETECTOR": "haar", "FACE_PROFILES": {"enroll": {"detector": "dlib"}}})
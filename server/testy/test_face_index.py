@@ -0,0 +1,87 @@
+import numpy as np
+from unittest.mock import patch
+from app.services.face_index import FaceIndex, face_index
+
+
+def test_identify_returns_nearest():
+    """Najbliższy wzorzec wygrywa, odległość zgadza się z liczoną wprost."""
+    rng = np.random.default_rng(0)
+    encodings = rng.normal(size=(50, 128)) * 0.1
+    index = FaceIndex(initial_capacity=4)  # wymusza kilka powiększeń macierzy
+    index.load((i + 1, enc) for i, enc in enumerate(encodings))
+
+    query = encodings[17] + 0.001
+    employee_id, distance = index.identify(query)
+
+    assert employee_id == 18
+    assert np.isclose(distance, np.linalg.norm(encodings[17] - query))
+
+
+def test_identify_no_match_above_tolerance():
+    index = FaceIndex()
+    index.add(1, np.zeros(128))
+
+    employee_id, distance = index.identify(np.ones(128), tolerance=0.6)
+    assert employee_id is None
+    assert distance > 0.6
+
+
+def test_add_replace_and_remove():
+    """Podmiana wzorca nie dubluje wierszy, usunięcie przenosi ostatni wiersz."""
+    index = FaceIndex()
+    index.add(1, np.zeros(128))
+    index.add(2, np.full(128, 0.5))
+    index.add(3, np.ones(128))
+    index.add(1, np.full(128, 0.1))
+    assert len(index) == 3
+
+    assert index.remove(1) is True
+    assert index.remove(1) is False
+    assert len(index) == 2
+    assert index.identify(np.ones(128))[0] == 3
+    assert index.identify(np.full(128, 0.5))[0] == 2
+
+
+def test_identify_endpoint_syncs_with_register_and_delete(client):
+    """Rejestracja dodaje wzorzec do indeksu, usunięcie go zabiera."""
+    encoding = np.full(128, 0.25)
+    with patch('app.services.face_service.FaceServices.get_encoding_from_image') as m_enc:
+        m_enc.return_value = encoding
+        reg = client.post('/api/employees/register', json={
+            'first_name': 'Ida', 'last_name': 'Indeks',
+            'email': 'ida.index@test.pl', 'image': 'data:image/jpeg;base64,AAA='
+        })
+        assert reg.status_code == 201
+        emp_id = reg.get_json()['employee_id']
+        assert emp_id in face_index
+
+        res = client.post('/api/auth/face/identify', json={'image': 'data:image/jpeg;base64,AAA='})
+        assert res.status_code == 200
+        assert res.get_json()['employee_id'] == emp_id
+
+        client.delete(f'/api/employees/{emp_id}/delete')
+        assert emp_id not in face_index
+
+        res = client.post('/api/auth/face/identify', json={'image': 'data:image/jpeg;base64,AAA='})
+        assert res.status_code == 401
+
+
+def test_multiple_templates_per_employee():
+    """Kilka wzorców jednej osoby: dopasowanie do najbliższego, usuwanie pojedynczo i hurtem."""
+    index = FaceIndex()
+    index.add(1, np.zeros(128), template_id=10)
+    index.add(1, np.full(128, 0.5), template_id=11)
+    index.add(2, np.ones(128), template_id=12)
+    assert len(index) == 3
+    assert index.template_count(1) == 2
+
+    assert index.identify(np.full(128, 0.49))[0] == 1
+    assert index.identify(np.full(128, 0.01))[0] == 1
+
+    assert index.remove_template(1, 11) is True
+    assert index.identify(np.full(128, 0.49), tolerance=0.6)[0] is None
+    assert index.identify(np.ones(128))[0] == 2
+
+    assert index.remove(1) is True
+    assert 1 not in index
+    assert len(index) == 1
@@ -0,0 +1,49 @@
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+import pytest
+from app.services.face_pool import FaceWorkerPool, FacePoolBusy, FacePoolTimeout
+
+
+@pytest.fixture
+def thread_pool():
+    """Pula z wątkiem zamiast procesu - testujemy samą kolejkę i limity."""
+    pool = FaceWorkerPool()
+    pool._executor = ThreadPoolExecutor(max_workers=1)
+    pool._slots = threading.BoundedSemaphore(2)  # 1 liczony + 1 w kolejce
+    pool.timeout = 0.2
+    yield pool
+    pool.shutdown(wait=False)
+
+
+def test_pool_rejects_when_queue_full(app, thread_pool):
+    release = threading.Event()
+    with patch('app.services.face_pool._encode_job', side_effect=lambda *a: release.wait(5)):
+        first = thread_pool.submit(b"img")
+        second = thread_pool.submit(b"img")
+        with pytest.raises(FacePoolBusy):
+            thread_pool.submit(b"img")
+        release.set()
+        first.result(5)
+        second.result(5)
+
+    assert thread_pool.stats()["rejected"] == 1
+    assert thread_pool.stats()["in_flight"] == 0
+
+
+def test_pool_job_timeout(app, thread_pool):
+    release = threading.Event()
+    with patch('app.services.face_pool._encode_job', side_effect=lambda *a: release.wait(5)):
+        with pytest.raises(FacePoolTimeout):
+            thread_pool.encode(b"img")
+        release.set()
+    assert thread_pool.timeouts == 1
+
+
+def test_face_endpoint_returns_503_when_pool_busy(client):
+    with patch('app.routes.auth.get_face_encoding', return_value=np.zeros(128)), \
+         patch('app.services.face_pool.face_pool.submit', side_effect=FacePoolBusy()):
+        res = client.post('/api/auth/face', json={'employee_id': 1, 'image': 'data:image/jpeg;base64,AAA='})
+    assert res.status_code == 503
+    assert res.headers.get('Retry-After') == "1"
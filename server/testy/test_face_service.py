@@ -0,0 +1,74 @@
+import os
+import io
+import numpy as np
+import pytest
+from app.services.face_service import FaceServices
+
+FACE_PATH = "faces_test/face.jpg"
+
+
+def test_downscale_keeps_small_images():
+    image = np.zeros((100, 200, 3), dtype=np.uint8)
+    small, scale = FaceServices.downscale(image, 480)
+    assert small is image
+    assert scale == 1.0
+
+
+def test_downscale_and_map_locations_back():
+    """Ramka z pomniejszonego obrazu wraca na współrzędne oryginału."""
+    image = np.zeros((1000, 2000, 3), dtype=np.uint8)
+    small, scale = FaceServices.downscale(image, 500)
+    assert small.shape[:2] == (250, 500)
+    assert scale == 0.25
+
+    mapped = FaceServices.scale_locations([(10, 60, 50, 20)], scale, image.shape)
+    assert mapped == [(40, 240, 200, 80)]
+
+
+def test_profile_overrides_from_config(app):
+    app.config["FACE_PROFILES"] = {"verify": {"max_dimension": 320}}
+    profile = FaceServices.get_profile("verify")
+    assert profile["max_dimension"] == 320
+    assert profile["num_jitters"] == 1
+    assert FaceServices.get_profile("enroll")["max_dimension"] > profile["max_dimension"]
+
+
+def test_downscaled_detection_matches_full_resolution(app):
+    """Encoding z detekcji na małym obrazie praktycznie pokrywa się z pełną rozdzielczością."""
+    if not os.path.exists(FACE_PATH):
+        pytest.skip("Brak pliku testowego")
+    with open(FACE_PATH, "rb") as f:
+        data = f.read()
+
+    full = FaceServices.get_encoding_from_image(
+        io.BytesIO(data),
+        profile={"max_dimension": None, "upsample": 1, "model": "hog", "num_jitters": 1}
+    )
+    fast = FaceServices.get_encoding_from_image(io.BytesIO(data), profile="verify")
+
+    assert full is not None and fast is not None
+    assert np.linalg.norm(full - fast) < 0.2
+
+
+def test_tracking_detects_in_roi_and_falls_back(app):
+    """Ramka z poprzedniej klatki: detekcja w ROI; zła ramka -> pełna detekcja i nowa ramka."""
+    if not os.path.exists(FACE_PATH):
+        pytest.skip("Brak pliku testowego")
+    with open(FACE_PATH, "rb") as f:
+        data = f.read()
+
+    track = {}
+    first = FaceServices.get_encoding_from_image(io.BytesIO(data), profile="verify", track=track)
+    box = track["box"]
+    assert first is not None and box is not None
+
+    timings = {}
+    tracked = FaceServices.get_encoding_from_image(io.BytesIO(data), profile="verify", timings=timings, track=track)
+    assert "detect_roi" in timings and "detect" not in timings
+    assert np.linalg.norm(first - tracked) < 0.2
+
+    # Ramka w rogu, gdzie twarzy nie ma - ROI pusty, pełna klatka znajduje twarz ponownie
+    timings, track = {}, {"box": (0, 40, 40, 0)}
+    FaceServices.get_encoding_from_image(io.BytesIO(data), profile="verify", timings=timings, track=track)
+    assert "detect_roi" in timings and "detect" in timings
+    assert abs(track["box"][0] - box[0]) < 20
@@ -0,0 +1,88 @@
+import io
+import numpy as np
+import pytest
+from unittest.mock import patch
+from PIL import Image, ImageFilter
+from app.services.frame_quality import FrameQualityService
+
+
+def _jpeg(img):
+    buf = io.BytesIO()
+    img.save(buf, "JPEG")
+    return buf.getvalue()
+
+
+@pytest.fixture(scope="module")
+def frames():
+    face = Image.open("faces_test/face.jpg").convert("RGB")
+    return {
+        "sharp": _jpeg(face),
+        "blurred": _jpeg(face.filter(ImageFilter.GaussianBlur(8))),
+        "dark": _jpeg(Image.eval(face, lambda v: v // 8)),
+    }
+
+
+def test_analyze_flags_blur_and_exposure(frames):
+    with patch.object(FrameQualityService, 'detect_faces', return_value=None):
+        sharp = FrameQualityService.analyze(frames["sharp"])
+        blurred = FrameQualityService.analyze(frames["blurred"])
+        dark = FrameQualityService.analyze(frames["dark"])
+    assert sharp.reasons == []
+    assert "blurry" in blurred.reasons
+    assert "too_dark" in dark.reasons
+    assert sharp.sharpness > 10 * blurred.sharpness
+
+
+def test_select_best_and_face_size(frames):
+    with patch.object(FrameQualityService, 'detect_faces', return_value=None):
+        best, reports = FrameQualityService.select_best([frames["dark"], frames["blurred"], frames["sharp"]])
+    assert best == 2
+    assert [bool(r.reasons) for r in reports] == [True, True, False]
+
+    # Pre-detektor widzi tylko małą twarz -> z require_face klatka odrzucona
+    settings = dict(FrameQualityService.get_settings(), require_face=True)
+    with patch.object(FrameQualityService, 'detect_faces', return_value=[(0, 20, 20, 0)]):
+        best, reports = FrameQualityService.select_best([frames["sharp"]], settings)
+    assert best is None
+    assert reports[0].reasons == ["face_too_small"]
+
+    # Nie da się zdekodować -> bez oceny, decyzję podejmie FaceServices
+    best, _ = FrameQualityService.select_best([b"not-an-image"])
+    assert best == 0
+
+
+def test_face_endpoint_encodes_only_best_frame(client, frames):
+    with patch('app.routes.auth.get_face_encoding', return_value=np.zeros(128)), \
+         patch.object(FrameQualityService, 'detect_faces', return_value=None), \
+         patch('app.services.face_service.FaceServices.get_encoding_from_image', return_value=np.zeros(128)) as m_enc, \
+         patch('app.services.face_service.FaceServices.compare_faces', return_value=False):
+        res = client.post('/api/auth/face', content_type='multipart/form-data', data={
+            'employee_id': '1',
+            'images': [(io.BytesIO(frames[name]), f"{name}.jpg", "image/jpeg") for name in ("blurred", "sharp", "dark")],
+        })
+        assert res.status_code == 401
+        assert m_enc.call_count == 1
+        assert m_enc.call_args[0][0].getvalue() == frames["sharp"]
+
+        res = client.post('/api/auth/face', content_type='multipart/form-data', data={
+            'employee_id': '1',
+            'images': [(io.BytesIO(frames[name]), f"{name}.jpg", "image/jpeg") for name in ("blurred", "dark")],
+        })
+        assert res.status_code == 400
+        blurred, dark = res.get_json()["frames"]
+        assert "blurry" in blurred["reasons"] and "too_dark" in dark["reasons"]
+        assert m_enc.call_count == 1
+
+
+def test_haar_miss_only_ranks_frames_by_default(frames):
+    """Domyślnie brak twarzy w kaskadzie Haara nie odrzuca klatki - decyduje detektor dlib."""
+    with patch.object(FrameQualityService, 'detect_faces', return_value=[]):
+        best, reports = FrameQualityService.select_best([frames["sharp"]])
+    assert best == 0
+    assert reports[0].reasons == []
+    assert reports[0].face_ratio == 0
+
+    # Klatka, w której pre-detektor widzi twarz, wygrywa z równie ostrą bez twarzy
+    with patch.object(FrameQualityService, 'detect_faces', side_effect=[[], [(0, 200, 200, 0)]]):
+        best, _ = FrameQualityService.select_best([frames["sharp"], frames["sharp"]])
+    assert best == 1
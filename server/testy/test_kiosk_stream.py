@@ -0,0 +1,132 @@
+import io
+import json
+from unittest.mock import patch
+import numpy as np
+import pytest
+from PIL import Image, ImageFilter
+from app.services.kiosk_stream import KioskStream
+
+
+class Closed(Exception):
+    pass
+
+
+class FakeWebSocket:
+    """
+    Paczki wiadomości: receive() bez timeoutu zaczyna kolejną paczkę,
+    receive(timeout=0) oddaje resztę bieżącej (tak jak bufor simple_websocket).
+    """
+
+    def __init__(self, *batches):
+        self.batches = [list(batch) for batch in batches]
+        self.current = []
+        self.sent = []
+
+    def receive(self, timeout=None):
+        if timeout is None:
+            if not self.batches:
+                raise Closed()
+            self.current = self.batches.pop(0)
+        return self.current.pop(0) if self.current else None
+
+    def send(self, data):
+        self.sent.append(json.loads(data))
+
+
+def run_stream(app, ws, kiosk_id="kiosk-1"):
+    stream = KioskStream(ws, kiosk_id=kiosk_id)
+    with app.test_request_context("/api/kiosk/stream"):
+        with pytest.raises(Closed):
+            stream.run()
+    return stream
+
+
+def register(client, email):
+    with patch('app.services.face_service.FaceServices.get_encoding_from_image', return_value=np.zeros(128)), \
+         patch('app.services.face_service.FaceServices.encoding_to_bytes', return_value=b"fake-encoding-bytes"):
+        response = client.post('/api/employees/register', json={
+            'first_name': 'Kiosk', 'last_name': 'Stream', 'email': email, 'image': 'data:image/jpeg;base64,AAA='
+        })
+    assert response.status_code == 201
+    return response.get_json()
+
+
+def _jpeg(radius=0):
+    with Image.open("faces_test/face.jpg") as face:
+        face = face.convert("RGB")
+        if radius:
+            face = face.filter(ImageFilter.GaussianBlur(radius))
+        buffer = io.BytesIO()
+        face.save(buffer, "JPEG")
+        return buffer.getvalue()
+
+
+def test_stream_picks_best_frame_of_burst(client, app):
+    """Seria w buforze: encoding dostaje najostrzejsza klatka, nie najnowsza (rozmyta)."""
+    employee = register(client, 'kiosk.burst@example.com')
+    sharp, blurred = _jpeg(), _jpeg(radius=8)
+    ws = FakeWebSocket(
+        [json.dumps({"type": "qr", "qr_code": employee['qr_code'], "attempt": 1})],
+        [blurred, sharp, blurred],
+    )
+    encoded = []
+
+    def fake_encoding(file_storage, profile=None, timings=None, track=None):
+        encoded.append(file_storage.read())
+        return np.zeros(128)
+
+    with patch('app.services.face_service.FaceServices.get_encoding_from_image', side_effect=fake_encoding), \
+         patch('app.services.face_service.FaceServices.compare_faces', return_value=True):
+        stream = run_stream(app, ws)
+
+    assert encoded == [sharp]
+    assert stream.dropped == 0
+    assert [message["type"] for message in ws.sent] == ["ready", "qr", "result"]
+    assert ws.sent[-1]["status"] == "granted"
+    assert ws.sent[-1]["frame"] == 2
+    assert ws.sent[-1]["employee_id"] == employee['employee_id']
+    assert stream.qr_entry is None  # po wyniku kiosk skanuje kod od nowa
+
+    from app.models.access_log import AccessLog
+    logs = AccessLog.query.all()
+    assert [(l.employee_id, l.status, l.verification_method) for l in logs] == \
+        [(employee['employee_id'], "granted", "qr+face")]
+
+
+def test_stream_keeps_only_latest_burst(client, app):
+    """Ponad max_burst klatek w buforze - starsze odrzucone; sama seria rozmyta -> retry."""
+    app.config["FRAME_QUALITY"] = {"max_burst": 2}
+    employee = register(client, 'kiosk.latest@example.com')
+    sharp, blurred = _jpeg(), _jpeg(radius=8)
+    ws = FakeWebSocket(
+        [json.dumps({"type": "qr", "qr_code": employee['qr_code'], "attempt": 1})],
+        [sharp, blurred, blurred],
+    )
+    with patch('app.services.face_service.FaceServices.get_encoding_from_image') as m_enc:
+        stream = run_stream(app, ws)
+
+    m_enc.assert_not_called()
+    assert stream.dropped == 1
+    retry = ws.sent[-1]
+    assert (retry["type"], retry["reason"], retry["frame"]) == ("retry", "quality", 3)
+    assert [frame["reasons"] for frame in retry["frames"]] == [["blurry"], ["blurry"]]
+
+
+def test_stream_rejects_bad_qr_and_asks_for_retry(client, app):
+    ws = FakeWebSocket(
+        [json.dumps({"type": "qr", "qr_code": "invalid_code_xyz", "attempt": 1})],
+        ["not json"],
+        [b"stale-frame"],
+        [json.dumps({"type": "identify", "attempt": 2}), b"frame"],
+    )
+    with patch('app.services.face_service.FaceServices.get_encoding_from_image', return_value=None), \
+         patch('app.services.face_index.face_index.identify') as m_identify:
+        stream = run_stream(app, ws)
+
+    assert ws.sent[1] == {"type": "result", "status": "denied", "attempt": 1,
+                          "message": "Nieprawidłowy lub wygasły kod QR."}
+    assert ws.sent[2]["type"] == "error"
+    # Klatka spoza próby odrzucona; w próbie 1:N brak twarzy = prośba o kolejną klatkę
+    assert stream.dropped == 1
+    assert ws.sent[3:] == [{"type": "retry", "reason": "no_face", "frame": 2, "attempt": 2}]
+    m_identify.assert_not_called()
@@ -35,4 +35,77 @@ def test_get_id_gap_at_start(app):
         db.session.add(Employee(id=3, first_name="Edddd", last_name="Fddddd", email="easdasdasda@e.com"))
         db.session.commit()
 
-        assert get_next_available_id() == 1
\ No newline at end of file
+        assert get_next_available_id() == 1
+
+def test_get_id_reuses_deleted_id(app):
+    """Usunięte ID wraca na free-listę i jest wydawane jako pierwsze."""
+    from app.utils.helpers import allocate_employee_ids, release_employee_id
+    with app.app_context():
+        ids = allocate_employee_ids(3)
+        assert ids == [1, 2, 3]
+        for i in ids:
+            db.session.add(Employee(id=i, first_name="Xxx", last_name="Yyy", email=f"x{i}@reuse.pl"))
+        db.session.commit()
+
+        db.session.delete(db.session.get(Employee, 2))
+        release_employee_id(2)
+        db.session.commit()
+
+        assert get_next_available_id() == 2
+        assert get_next_available_id() == 4
+
+def test_get_id_without_gap_reuse(app):
+    """Przy EMPLOYEE_ID_REUSE_GAPS = False ID tylko rosną."""
+    app.config["EMPLOYEE_ID_REUSE_GAPS"] = False
+    with app.app_context():
+        db.session.add(Employee(id=1, first_name="Addd", last_name="Bddd", email="a@nogap.com"))
+        db.session.add(Employee(id=3, first_name="Cddd", last_name="Dddd", email="c@nogap.com"))
+        db.session.commit()
+
+        assert get_next_available_id() == 4
+        assert get_next_available_id() == 5
+
+def _expired_qr_codes(count):
+    from datetime import datetime, timedelta
+    from app.models.qr_code import QRCredential
+    now = datetime.utcnow()
+    for i in range(1, count + 1):
+        db.session.add(Employee(id=i, first_name="Qqq", last_name="Rrr", email=f"q{i}@expiry.pl"))
+        db.session.add(QRCredential(employee_id=i, qr_code_data=f"old-{i}",
+                                    expires_at=now - timedelta(hours=count - i + 1), is_active=True))
+    db.session.commit()
+
+def test_refresh_expired_qr_in_chunks(app):
+    """Wygasłe kody są rotowane paczkami, postęp trafia do job_checkpoint."""
+    from app.utils.helpers import refresh_expired_qr_codes, QR_REFRESH_JOB
+    from app.models.job_checkpoint import JobCheckpoint
+    from app.models.qr_code import QRCredential
+    with app.app_context():
+        _expired_qr_codes(5)
+        progress = []
+
+        refreshed = refresh_expired_qr_codes(chunk_size=2, progress=progress.append)
+
+        assert [r["employee_id"] for r in refreshed] == [1, 2, 3, 4, 5]
+        assert [p["processed"] for p in progress] == [2, 4, 5]
+        assert QRCredential.query.filter(QRCredential.qr_code_data.like("old-%")).count() == 0
+        checkpoint = db.session.get(JobCheckpoint, QR_REFRESH_JOB)
+        assert checkpoint.status == "idle"
+        assert checkpoint.total_processed == 5
+
+def test_refresh_expired_qr_resumes_after_interruption(app):
+    """Przerwany przebieg (status 'running') jest wznawiany od kursora."""
+    from app.utils.helpers import refresh_expired_qr_codes, QR_REFRESH_JOB
+    from app.models.job_checkpoint import JobCheckpoint
+    with app.app_context():
+        _expired_qr_codes(5)
+
+        first = refresh_expired_qr_codes(chunk_size=2, max_chunks=1)
+        assert [r["employee_id"] for r in first] == [1, 2]
+        assert db.session.get(JobCheckpoint, QR_REFRESH_JOB).status == "running"
+
+        rest = refresh_expired_qr_codes(chunk_size=2)
+        assert [r["employee_id"] for r in rest] == [3, 4, 5]
+        checkpoint = db.session.get(JobCheckpoint, QR_REFRESH_JOB)
+        assert checkpoint.status == "idle"
+        assert checkpoint.processed == 5
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from unittest.mock import patch
+from sqlalchemy import text
+from app.utils import metrics
+from app.utils.db import db
+from app.utils.metrics import Registry
+
+
+def test_histogram_renders_prometheus_text():
+    registry = Registry()
+    histogram = registry.histogram("demo_seconds", "Demo", ("stage",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, stage="detect")
+    histogram.observe(0.5, stage="detect")
+    histogram.observe(3.0, stage="detect")
+    registry.add_collector(lambda: [("demo_queue_depth", "gauge", "Kolejka", [({}, 7)])])
+
+    text = registry.render()
+    assert '# TYPE demo_seconds histogram' in text
+    assert 'demo_seconds_bucket{stage="detect",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{stage="detect",le="1"} 2' in text
+    assert 'demo_seconds_bucket{stage="detect",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{stage="detect"} 3' in text
+    assert 'demo_queue_depth 7' in text
+
+
+def test_metrics_endpoint_reports_stages_and_queries(client):
+    with patch('app.services.face_service.FaceServices.get_encoding_from_image', return_value=np.zeros(128)):
+        reg = client.post('/api/employees/register', json={
+            'first_name': 'Metryka', 'last_name': 'Test',
+            'email': 'metrics@test.pl', 'image': 'data:image/jpeg;base64,AAA='
+        })
+    assert reg.status_code == 201
+    for _ in range(2):  # pierwszy skan z bazy, drugi z cache
+        client.post('/api/auth/qr', json={'qr_code': reg.get_json()['qr_code']})
+
+    res = client.get('/api/admin/metrics')
+    assert res.status_code == 200
+    assert res.mimetype == "text/plain"
+    text = res.get_data(as_text=True)
+    assert 'http_request_duration_seconds_count{endpoint="employees.register_employee",method="POST",status="201"}' in text
+    assert 'face_stage_duration_seconds_count{stage="upload"}' in text
+    assert 'face_stage_duration_seconds_count{stage="queue"}' in text
+    assert 'qr_lookup_duration_seconds_count{source="cache"}' in text
+    assert 'db_queries_per_request_count{endpoint="employees.register_employee"}' in text
+    assert 'access_log_queue_depth ' in text
+    assert 'face_pool_in_flight 0' in text
+
+
+def test_failed_query_is_measured_and_leaves_nothing_on_connection(app):
+    # Histogram zapytań jest wspólny dla procesu - wątki w tle (zapis logów z innych
+    # testów) też go podbijają; dokładną liczbę sprawdzamy na liczniku błędów
+    before = metrics.DB_QUERY.snapshot(operation="SELECT")[0]
+    errors_before = metrics.DB_QUERY_ERRORS.value(operation="SELECT")
+    with db.engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(Exception):
+                conn.execute(text("SELECT * FROM no_such_table"))
+        assert not any(key.startswith("metrics") for key in conn.info)
+
+    assert metrics.DB_QUERY.snapshot(operation="SELECT")[0] >= before + 3
+    assert metrics.DB_QUERY_ERRORS.value(operation="SELECT") == errors_before + 3